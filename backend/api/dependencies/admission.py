@@ -0,0 +1,144 @@
+"""
+Shared admission controller and the middleware in front of expensive routes
+"""
+import json
+import math
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config.settings import settings
+from utils.admission import AdmissionController, AdmissionRoute, Overloaded, Ticket
+from api.dependencies.metrics import warmup_traffic
+
+# Milliseconds the client is prepared to wait for the response
+DEADLINE_HEADER = b"x-deadline-ms"
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.admission_max_concurrency,
+    max_queue=settings.admission_max_queue,
+    degrade_queue_depth=settings.admission_degrade_queue_depth,
+)
+
+_ticket: ContextVar = ContextVar("admission_ticket", default=None)
+
+
+def current_ticket() -> Optional[Ticket]:
+    """Admission of the request being handled; None for routes outside admission control"""
+    return _ticket.get()
+
+
+def degraded() -> bool:
+    """Whether the request being handled may only be served from cached or materialized results"""
+    ticket = _ticket.get()
+    return ticket is not None and ticket.degraded
+
+
+def overloaded(detail: str, reason: str = "degraded_miss") -> HTTPException:
+    """503 for a request the handler cannot serve under the current load, counted as shed"""
+    ticket = _ticket.get()
+    retry_after = (
+        admission_controller.record_shed(ticket, reason)
+        if ticket is not None
+        else admission_controller.retry_after()
+    )
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def _deadline(headers) -> Optional[float]:
+    """
+    time.monotonic() deadline from the request's deadline header or the default
+
+    Raises:
+        ValueError: The header is not a finite, positive number of milliseconds
+    """
+    for name, value in headers:
+        if name == DEADLINE_HEADER:
+            milliseconds = float(value)
+            if not math.isfinite(milliseconds) or milliseconds <= 0:
+                raise ValueError(f"{DEADLINE_HEADER.decode()} must be a positive number of milliseconds")
+            return time.monotonic() + milliseconds / 1000.0
+    if settings.admission_default_deadline_ms > 0:
+        return time.monotonic() + settings.admission_default_deadline_ms / 1000.0
+    return None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits requests for the given routes through the controller
+
+    Requests for other routes pass straight through, so health checks and
+    metrics are answered however long the queue is. A shed request gets 503
+    with Retry-After before its body is read.
+    """
+
+    def __init__(self, app, controller: AdmissionController, routes: Dict[Tuple[str, str], AdmissionRoute]):
+        """
+        Args:
+            app: Wrapped ASGI application
+            controller: Admission controller
+            routes: (method, path) -> route under admission control
+        """
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = self.routes.get((scope["method"], scope["path"]))
+        # Cold warm-up requests would skew the service time estimates
+        if route is None or warmup_traffic():
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            deadline = _deadline(scope["headers"])
+        except ValueError:
+            await self._send_json(
+                send, 400, {"detail": "X-Deadline-Ms must be a positive, finite number of milliseconds"}
+            )
+            return
+        try:
+            ticket = await self.controller.admit(route, deadline)
+        except Overloaded as e:
+            await self._reject(send, e)
+            return
+        token = _ticket.set(ticket)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _ticket.reset(token)
+            self.controller.release(ticket)
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: Dict[str, str], headers: Tuple = ()):
+        body = json.dumps(payload).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    *headers,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _reject(self, send, overloaded: Overloaded):
+        detail = (
+            "Server overloaded; the request could not be served before its deadline"
+            if overloaded.reason == "deadline"
+            else "Server overloaded; try again later"
+        )
+        await self._send_json(
+            send,
+            503,
+            {"detail": detail, "reason": overloaded.reason},
+            ((b"retry-after", str(overloaded.retry_after).encode("latin-1")),),
+        )
@@ -0,0 +1,12 @@
+"""
+Shared sampled capture of normalized recommendation requests
+"""
+from config.settings import settings
+from utils.capture import RequestCapture
+
+request_capture = RequestCapture(
+    settings.request_capture_file or None,
+    sample_rate=settings.request_capture_sample_rate,
+    buffer_size=settings.request_capture_buffer_size,
+    max_bytes=settings.request_capture_max_bytes,
+)
@@ -0,0 +1,140 @@
+"""
+Shared outfit catalog store
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from config.settings import settings
+from models.catalog import OutfitCatalog
+from models.catalog_store import CatalogStore
+from utils.preprocessing import STYLE_ALIASES
+from utils.serialization import FragmentCache
+from api.dependencies.scoring import outfit_model
+from api.schemas.recommendation import OutfitItem
+
+logger = logging.getLogger(__name__)
+
+# Held while a background thread rebuilds stale recommendation tables
+_tables_rebuild = threading.Lock()
+
+
+def attach_tables(catalog: OutfitCatalog):
+    """
+    Build the materialized recommendation tables and attach them as
+    ``catalog.recommendation_tables``
+
+    Tables built while the catalog changed are discarded.
+    """
+    tables = outfit_model.build_tables(
+        catalog, STYLE_ALIASES.values(), depth=settings.recommendation_table_depth
+    )
+    if tables.catalog_version == getattr(catalog, "version", 0):
+        catalog.recommendation_tables = tables
+        logger.info("Built %d recommendation tables in %.2fs", len(tables.buckets), tables.build_seconds)
+
+
+def get_fragments(catalog: OutfitCatalog) -> FragmentCache:
+    """
+    Pre-serialized outfits of a catalog, started afresh after an in-place change
+    """
+    fragments = getattr(catalog, "outfit_fragments", None)
+    version = getattr(catalog, "version", 0)
+    if fragments is None or fragments.version != version:
+        fragments = FragmentCache(OutfitItem, settings.response_fragment_cache_size, version)
+        catalog.outfit_fragments = fragments
+    return fragments
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], name: str):
+    """Record how long a preparation step took, even when it fails"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
+
+
+def prepare_catalog(catalog: OutfitCatalog):
+    """
+    Serialize outfits and attach the recommendation tables and the ANN
+    candidate index to a freshly loaded catalog
+
+    Runs in the loading thread. A failed build leaves the catalog without
+    tables or an index, so requests fall back to exhaustive scoring. Step
+    timings are kept as ``catalog.prepare_seconds``.
+    """
+    timings: Dict[str, float] = {}
+    catalog.prepare_seconds = timings
+    with _timed(timings, "response_fragments"):
+        get_fragments(catalog).preload(catalog)
+    if settings.recommendation_tables_enabled:
+        try:
+            with _timed(timings, "recommendation_tables"):
+                attach_tables(catalog)
+        except Exception:
+            logger.exception("Could not build recommendation tables; scoring without them")
+    if not settings.ann_enabled:
+        return
+    try:
+        with _timed(timings, "ann_index"):
+            # Loaded with the first catalog rather than at import
+            from models.ann import attach_index
+
+            attach_index(
+                catalog,
+                os.path.join(settings.model_path, settings.ann_index_file),
+                min_size=settings.ann_min_catalog_size,
+                candidates=settings.ann_candidates,
+                nprobe=settings.ann_nprobe,
+            )
+    except Exception:
+        logger.exception("Could not prepare the ANN index; scoring exhaustively")
+
+
+def _tables_stale(catalog: OutfitCatalog) -> bool:
+    tables = getattr(catalog, "recommendation_tables", None)
+    return tables is not None and tables.catalog_version != getattr(catalog, "version", 0)
+
+
+def _rebuild_tables(catalog: OutfitCatalog):
+    try:
+        # Changes made during a build make it stale again; build until current
+        while catalog is catalog_store.catalog and _tables_stale(catalog):
+            attach_tables(catalog)
+    except Exception:
+        logger.exception("Could not rebuild recommendation tables; scoring without them")
+        _tables_rebuild.release()
+        return
+    _tables_rebuild.release()
+    # A change that landed between the last check and the release found the lock held
+    if catalog is catalog_store.catalog and _tables_stale(catalog):
+        refresh_tables(catalog)
+
+
+def refresh_tables(catalog: OutfitCatalog):
+    """
+    Rebuild the tables in a background thread after an in-place catalog change
+
+    Stale tables are never used, so requests are scored without them until
+    the rebuild finishes. A change during a running rebuild is picked up by
+    that rebuild.
+    """
+    if not _tables_stale(catalog) or not _tables_rebuild.acquire(blocking=False):
+        return
+    threading.Thread(target=_rebuild_tables, args=(catalog,), name="tables-rebuild", daemon=True).start()
+
+
+catalog_store = CatalogStore(
+    os.path.join(settings.model_path, settings.catalog_file), prepare=prepare_catalog
+)
+catalog_store.add_listener(refresh_tables)
+
+
+def get_catalog() -> OutfitCatalog:
+    """Current catalog snapshot; read once per request"""
+    return catalog_store.catalog
@@ -0,0 +1,30 @@
+"""
+Shared style classifier behind a micro-batching queue
+"""
+from config.settings import settings
+from models.style_classifier import StyleClassifier
+from utils.batching import MicroBatcher
+from api.dependencies.metrics import metrics
+
+metrics.histogram(
+    "style_batch_size",
+    "Items per style classifier batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+metrics.histogram("style_batch_wait_seconds", "Time the oldest item in a batch waited before it ran")
+metrics.histogram("style_batch_run_seconds", "Style classifier time per batch")
+
+
+def _observe_batch(size: int, waited: float, ran: float):
+    metrics.observe("style_batch_size", size)
+    metrics.observe("style_batch_wait_seconds", waited)
+    metrics.observe("style_batch_run_seconds", ran)
+
+
+style_classifier = StyleClassifier()
+style_batcher = MicroBatcher(
+    style_classifier.classify_batch,
+    max_batch_size=settings.style_batch_max_size,
+    max_wait_ms=settings.style_batch_max_wait_ms,
+    observer=_observe_batch if metrics.enabled else None,
+)
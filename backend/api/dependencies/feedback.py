@@ -0,0 +1,13 @@
+"""
+Shared feedback ingestion pipeline
+"""
+from config.settings import settings
+from utils.feedback import FeedbackPipeline
+
+feedback_pipeline = FeedbackPipeline(
+    settings.feedback_dir or None,
+    buffer_size=settings.feedback_buffer_size,
+    batch_size=settings.feedback_batch_size,
+    segment_bytes=settings.feedback_segment_bytes,
+    fsync=settings.feedback_fsync,
+)
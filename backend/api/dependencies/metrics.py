@@ -0,0 +1,105 @@
+"""
+Shared metrics registry and request timing
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+from config.settings import settings
+from utils.metrics import NULL_STAGE_TIMER, MetricsRegistry, StageTimer
+
+metrics = MetricsRegistry(enabled=settings.metrics_enabled)
+metrics.counter("http_requests_total", "Requests handled, by route, method and status")
+metrics.histogram("http_request_duration_seconds", "Request latency, by route")
+metrics.histogram(
+    "recommendation_stage_seconds",
+    "Time spent in each stage of a recommendation request",
+)
+
+_stage_timer: ContextVar = ContextVar("stage_timer", default=NULL_STAGE_TIMER)
+_warmup: ContextVar = ContextVar("warmup", default=False)
+
+
+@contextmanager
+def warming_up() -> Iterator[None]:
+    """Tag requests sent from this context as startup warm-up traffic"""
+    token = _warmup.set(True)
+    try:
+        yield
+    finally:
+        _warmup.reset(token)
+
+
+def warmup_traffic() -> bool:
+    """
+    Whether the request being handled is startup warm-up traffic
+
+    Warm-up requests are neither timed, counted nor captured, so metrics and
+    replay captures describe real clients only.
+    """
+    return _warmup.get()
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record one stage duration (model and route stages share the histogram)"""
+    if _warmup.get():
+        return
+    metrics.observe("recommendation_stage_seconds", seconds, stage=stage)
+
+
+def current_stage_timer():
+    """
+    Stage timer of the request being handled
+
+    Returns a no-op timer outside a timed route or when metrics are disabled.
+    """
+    return _stage_timer.get()
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that counts requests and times them
+
+    The stage timer starts before the body is read and validated, so an
+    endpoint's first ``lap("validation")`` covers parsing and validation;
+    whatever follows the endpoint's last lap is recorded as serialization.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            if _warmup.get():
+                return await handler(request)
+            started = time.perf_counter()
+            timer = StageTimer(observe_stage)
+            token = _stage_timer.set(timer)
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                _stage_timer.reset(token)
+                if timer.used and status < 400:
+                    timer.lap("serialization")
+                metrics.inc("http_requests_total", path=path, method=request.method, status=str(status))
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - started, path=path)
+
+        return timed_handler
+
+
+# Routers built with this class are plain APIRoutes when metrics are off
+route_class = TimedRoute if metrics.enabled else APIRoute
@@ -0,0 +1,7 @@
+"""
+Shared user profile store
+"""
+from config.settings import settings
+from utils.profiles import ProfileStore
+
+profile_store = ProfileStore(settings.profile_store_file or None)
@@ -0,0 +1,20 @@
+"""
+Shared recommendation model and the pool that runs its scoring
+"""
+from config.settings import settings
+from models.outfit_model import OutfitRecommendationModel
+from models.scoring_pool import ScoringPool
+from api.dependencies.metrics import metrics, observe_stage
+
+# Initialize model (will be properly loaded later)
+outfit_model = OutfitRecommendationModel()
+if metrics.enabled:
+    outfit_model.stage_observer = observe_stage
+
+scoring_pool = ScoringPool(
+    outfit_model,
+    mode=settings.scoring_pool,
+    workers=settings.scoring_workers,
+    shard_min_size=settings.scoring_shard_min_size,
+    shards=settings.scoring_shards,
+)
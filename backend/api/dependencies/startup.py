@@ -0,0 +1,270 @@
+"""
+Background startup: catalog load, index builds and warm-up requests
+"""
+import asyncio
+import logging
+import signal
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+
+from api.dependencies.catalog import catalog_store
+from api.dependencies.feedback import feedback_pipeline
+from api.dependencies.metrics import warming_up
+from api.dependencies.profiles import profile_store
+
+logger = logging.getLogger(__name__)
+
+# One temperature per weather category, so every table bucket family is read
+WARMUP_TEMPERATURES = (0.0, 12.0, 18.0, 24.0, 32.0)
+WARMUP_BASE_URL = "http://warmup"
+
+
+def _drop_warmup_responses():
+    """Empty the response caches of the synthetic answers, and counts, the warm-up left"""
+    # Imported here: the routes import this package's dependencies
+    from api.routes.recommendations import occasion_payloads, ranking_cache, recommendation_cache
+
+    for cache in (recommendation_cache, ranking_cache, occasion_payloads):
+        cache.reset()
+
+
+def warmup_payloads(count: int) -> List[Dict[str, Any]]:
+    """
+    Recommendation requests built from the first outfits of the current catalog
+
+    Args:
+        count: Number of requests
+
+    Returns:
+        RecommendationRequest payloads cycling through the weather categories
+    """
+    # Removed outfits leave None slots
+    live = (outfit for outfit in catalog_store.catalog if outfit is not None)
+    outfits = list(islice(live, count)) or [
+        {"style": "casual", "colors": ["blue"], "occasion": "casual"}
+    ]
+    payloads = []
+    for i in range(count):
+        outfit = outfits[i % len(outfits)]
+        payloads.append(
+            {
+                "user_preferences": {
+                    "styles": [outfit.get("style") or "casual"],
+                    "colors": list(outfit.get("colors") or [])[:2],
+                },
+                "weather": {
+                    "temperature": WARMUP_TEMPERATURES[i % len(WARMUP_TEMPERATURES)],
+                    "condition": "sunny",
+                },
+                "occasion": outfit.get("occasion") or "casual",
+            }
+        )
+    return payloads
+
+
+def stop_process():
+    """Ask the server to shut down, so its supervisor starts a fresh worker"""
+    logger.critical("Startup kept failing; stopping the worker")
+    signal.raise_signal(signal.SIGTERM)
+
+
+class Startup:
+    """
+    Loads the catalog and warms every request path before the worker reports ready
+
+    Warm-up requests go through the application itself over an in-process
+    ASGI transport, so they exercise the same pools and lazily built
+    structures real traffic uses. They are tagged as warm-up traffic: not
+    captured, timed, counted or admission-controlled, and the responses they
+    leave in the caches are dropped afterwards. Each step's duration is kept
+    per component.
+    """
+
+    def __init__(self, on_failure: Callable[[], None] = stop_process):
+        """
+        Args:
+            on_failure: Called when loading or the warm-up fails on every attempt
+        """
+        self.on_failure = on_failure
+        self.ready = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Attempts made per retried step ("load", "warmup")
+        self.attempts: Dict[str, int] = {"load": 0, "warmup": 0}
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def component(self, name: str):
+        """Time a startup step and record whether it succeeded"""
+        entry: Dict[str, Any] = {"status": "running", "seconds": None}
+        self.components[name] = entry
+        started = time.perf_counter()
+        try:
+            yield entry
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        else:
+            entry["status"] = "ready"
+        finally:
+            entry["seconds"] = round(time.perf_counter() - started, 6)
+
+    async def run(
+        self,
+        app: FastAPI,
+        warmup_requests: int = 0,
+        attempts: int = 1,
+        retry_seconds: float = 1.0,
+    ):
+        """
+        Load the catalog, user profiles and feedback counters, then send
+        warm-up requests to the app
+
+        A failed load or warm-up is retried with exponential backoff, and
+        once every attempt has failed ``on_failure`` is called (by default
+        the worker stops, to be restarted) rather than leaving it unready
+        for good. The previous catalog, if any, keeps serving meanwhile.
+
+        Args:
+            app: Application to warm up
+            warmup_requests: Recommendation requests per warm-up round; 0
+                skips the warm-up
+            attempts: Attempts for the load and for the warm-up before giving up
+            retry_seconds: Wait before the first retry, doubled after each
+        """
+        self.started_at = time.time()
+        attempts = max(1, attempts)
+        step = "load"
+        try:
+            await self._retrying(step, self._load, attempts, retry_seconds)
+            if warmup_requests > 0:
+                step = "warmup"
+                await self._retrying(
+                    step, lambda: self._warm(app, warmup_payloads(warmup_requests)), attempts, retry_seconds
+                )
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("Startup %s failed %d times", step, self.attempts[step])
+            self.on_failure()
+            return
+        finally:
+            self.finished_at = time.time()
+        self.error = None
+        self.ready = True
+        logger.info("Ready after %.2fs", self.finished_at - self.started_at)
+
+    async def _retrying(
+        self, step: str, attempt: Callable[[], Awaitable[Any]], attempts: int, retry_seconds: float
+    ):
+        delay = retry_seconds
+        while True:
+            self.attempts[step] += 1
+            try:
+                return await attempt()
+            except Exception as e:
+                if self.attempts[step] >= attempts:
+                    raise
+                self.error = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "Startup %s attempt %d of %d failed (%s); retrying in %.1fs",
+                    step, self.attempts[step], attempts, self.error, delay,
+                )
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    async def _load(self):
+        with self.component("catalog") as entry:
+            catalog = await catalog_store.reload()
+            entry["outfits"] = len(catalog)
+        for step, seconds in getattr(catalog, "prepare_seconds", {}).items():
+            self.components[f"catalog.{step}"] = {"status": "ready", "seconds": round(seconds, 6)}
+        with self.component("profiles") as entry:
+            entry["profiles"] = await asyncio.to_thread(profile_store.load)
+        with self.component("feedback") as entry:
+            entry["events_replayed"] = await feedback_pipeline.load()
+
+    async def _warm(self, app: FastAPI, payloads: List[Dict[str, Any]]):
+        # Imported here so the client stack stays off the server's import path
+        import httpx
+
+        transport = httpx.ASGITransport(app=app)
+        try:
+            with warming_up():
+                async with httpx.AsyncClient(transport=transport, base_url=WARMUP_BASE_URL) as client:
+                    for name, requests in self._plan(payloads):
+                        with self.component(f"warmup.{name}") as entry:
+                            responses = await asyncio.gather(
+                                *(client.request(method, url, **kwargs) for method, url, kwargs in requests)
+                            )
+                            for response in responses:
+                                response.raise_for_status()
+                            entry["requests"] = len(responses)
+        finally:
+            _drop_warmup_responses()
+
+    @staticmethod
+    def _plan(payloads: List[Dict[str, Any]]) -> List[Tuple[str, List[Tuple[str, str, Dict[str, Any]]]]]:
+        """Warm-up rounds in order: (component name, [(method, url, request kwargs)])"""
+        occasions = sorted({payload["occasion"] for payload in payloads})
+        recommendations = [("POST", "/api/v1/recommendations", {"json": payload}) for payload in payloads]
+        return [
+            ("recommendations", recommendations),
+            # Same requests again: served by the response cache
+            ("recommendations_cached", recommendations),
+            ("recommendations_batch", [("POST", "/api/v1/recommendations/batch", {"json": {"requests": payloads}})]),
+            (
+                "occasion",
+                [
+                    ("POST", "/api/v1/recommendations/occasion", {"params": {"occasion": occasion}})
+                    for occasion in occasions
+                ],
+            ),
+            (
+                "occasion_stream",
+                [
+                    (
+                        "POST",
+                        "/api/v1/recommendations/occasion",
+                        {"params": {"occasion": occasion, "stream": "true", "limit": 5}},
+                    )
+                    for occasion in occasions
+                ],
+            ),
+            (
+                "styles_classify",
+                [
+                    (
+                        "POST",
+                        "/api/v1/styles/classify",
+                        {"json": {"description": f"{payload['user_preferences']['styles'][0]} outfit"}},
+                    )
+                    for payload in payloads
+                ],
+            ),
+            ("metrics", [("GET", "/api/v1/metrics", {})]),
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Readiness, error and per-component timings"""
+        if self.ready:
+            status = "ready"
+        elif self.finished_at is not None:
+            status = "failed"
+        else:
+            status = "warming_up"
+        finished = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            "status": status,
+            "error": self.error,
+            "attempts": self.attempts,
+            "seconds": round(finished - self.started_at, 6) if self.started_at is not None else None,
+            "components": self.components,
+        }
+
+
+startup = Startup()
@@ -0,0 +1,19 @@
+"""
+Shared weather provider
+"""
+from config.settings import settings
+from utils.weather import OpenWeatherMapUpstream, WeatherProvider
+
+weather_provider = WeatherProvider(
+    OpenWeatherMapUpstream(settings.weather_api_key, settings.weather_api_url),
+    ttl=settings.weather_cache_ttl,
+    stale_ttl=settings.weather_stale_ttl,
+    precision=settings.weather_cache_precision,
+    timeout=settings.weather_timeout,
+    max_connections=settings.weather_max_connections,
+)
+
+
+def get_weather_provider() -> WeatherProvider:
+    """Process-wide weather provider"""
+    return weather_provider
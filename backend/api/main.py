@@ -2,12 +2,71 @@
 OutfitGenie FastAPI Backend
 Main application entry point
 """
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from config.settings import settings
-from api.routes import recommendations, health
+from utils.admission import AdmissionRoute
+from api.dependencies.admission import AdmissionMiddleware, admission_controller
+from api.dependencies.capture import request_capture
+from api.dependencies.catalog import catalog_store
+from api.dependencies.classifier import style_batcher
+from api.dependencies.feedback import feedback_pipeline
+from api.dependencies.profiles import profile_store
+from api.dependencies.scoring import scoring_pool
+from api.dependencies.startup import startup
+from api.dependencies.weather import weather_provider
+from api.routes import recommendations, health, admin, feedback, metrics, profiles, styles
+
+
+async def _start(app: FastAPI):
+    await startup.run(
+        app, settings.warmup_requests, settings.startup_attempts, settings.startup_retry_seconds
+    )
+    if settings.catalog_watch_interval > 0:
+        await catalog_store.watch(settings.catalog_watch_interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the catalog, profiles and feedback counters and warm up, then watch
+    the catalog file and flush profile, feedback and captured-request
+    writes; close shared clients, queues and pools on exit
+    """
+    if settings.startup_background:
+        # Serve health checks while starting; readiness reports progress
+        starter = asyncio.create_task(_start(app))
+    else:
+        await startup.run(
+            app, settings.warmup_requests, settings.startup_attempts, settings.startup_retry_seconds
+        )
+        starter = None
+        if settings.catalog_watch_interval > 0:
+            starter = asyncio.create_task(catalog_store.watch(settings.catalog_watch_interval))
+    flusher = asyncio.create_task(profile_store.run(settings.profile_flush_interval))
+    feedback_writer = asyncio.create_task(
+        feedback_pipeline.run(settings.feedback_flush_interval, settings.feedback_compact_interval)
+    )
+    capture_writer = asyncio.create_task(request_capture.run(settings.request_capture_flush_interval))
+    yield
+    for task in (starter, flusher, feedback_writer, capture_writer):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    await asyncio.to_thread(profile_store.close)
+    await feedback_pipeline.close()
+    await request_capture.close()
+    await weather_provider.aclose()
+    await style_batcher.close()
+    scoring_pool.close()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -16,8 +75,26 @@ app = FastAPI(
     version=settings.api_version,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Admission control for the scoring routes; every other route bypasses it.
+# Added before CORS so shed responses still carry the CORS headers
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        routes={
+            ("POST", "/api/v1/recommendations"): AdmissionRoute("recommendations", degradable=True),
+            ("POST", "/api/v1/recommendations/occasion"): AdmissionRoute("occasion"),
+            ("POST", "/api/v1/styles/classify"): AdmissionRoute("styles_classify"),
+            # Queued behind single requests
+            ("POST", "/api/v1/recommendations/batch"): AdmissionRoute(
+                "recommendations_batch", priority=1, degradable=True
+            ),
+        },
+    )
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -54,6 +131,36 @@ app.include_router(
     tags=["recommendations"],
 )
 
+app.include_router(
+    feedback.router,
+    prefix="/api/v1",
+    tags=["feedback"],
+)
+
+app.include_router(
+    profiles.router,
+    prefix="/api/v1",
+    tags=["profiles"],
+)
+
+app.include_router(
+    styles.router,
+    prefix="/api/v1",
+    tags=["styles"],
+)
+
+app.include_router(
+    admin.router,
+    prefix="/api/v1",
+    tags=["admin"],
+)
+
+app.include_router(
+    metrics.router,
+    prefix="/api/v1",
+    tags=["metrics"],
+)
+
 
 # Exception handlers
 @app.exception_handler(Exception)
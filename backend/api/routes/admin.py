@@ -0,0 +1,128 @@
+"""
+Administrative endpoints
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from config.settings import settings
+from api.dependencies.admission import admission_controller
+from api.dependencies.capture import request_capture
+from api.dependencies.catalog import catalog_store
+from api.dependencies.feedback import feedback_pipeline
+from api.dependencies.metrics import route_class
+from api.dependencies.profiles import profile_store
+
+router = APIRouter(route_class=route_class)
+
+
+def _check_admin_token(token: Optional[str]):
+    """
+    Require X-Admin-Token when an admin token is configured
+
+    Without a configured token admin endpoints are only open in development.
+    """
+    if settings.admin_token:
+        if token != settings.admin_token:
+            raise HTTPException(status_code=403, detail="Invalid admin token")
+    elif settings.environment != "development":
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+
+
+@router.get("/admin/catalog")
+async def catalog_info(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Catalog store status
+
+    Returns:
+        dict: Catalog source, version and index statistics
+    """
+    _check_admin_token(x_admin_token)
+    return catalog_store.info()
+
+
+@router.post("/admin/catalog/reload")
+async def reload_catalog(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Reload the outfit catalog from disk and swap it in atomically
+
+    Returns:
+        dict: Catalog store status after the reload
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        await catalog_store.reload()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error reloading catalog: {str(e)}",
+        )
+    return {"success": True, **catalog_store.info()}
+
+
+@router.get("/admin/profiles")
+async def profile_store_info(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    User profile store status
+
+    Returns:
+        dict: Profile count, pending writes and flush counters
+    """
+    _check_admin_token(x_admin_token)
+    return profile_store.stats()
+
+
+@router.get("/admin/feedback")
+async def feedback_info(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Feedback pipeline status
+
+    Returns:
+        dict: Buffer fill, log write and compaction counters
+    """
+    _check_admin_token(x_admin_token)
+    return feedback_pipeline.stats()
+
+
+@router.post("/admin/feedback/compact")
+async def compact_feedback(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Fold closed feedback log segments into the counter snapshot now
+
+    Returns:
+        dict: Segments compacted and pipeline status
+    """
+    _check_admin_token(x_admin_token)
+    try:
+        compacted = await feedback_pipeline.compact()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error compacting feedback log: {str(e)}",
+        )
+    return {"success": True, "compacted_segments": compacted, **feedback_pipeline.stats()}
+
+
+@router.get("/admin/capture")
+async def request_capture_info(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Sampled request capture status
+
+    Returns:
+        dict: Sample rate, buffer fill, write counters and file size
+    """
+    _check_admin_token(x_admin_token)
+    return request_capture.stats()
+
+
+@router.get("/admin/admission")
+async def admission_info(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Admission control status
+
+    Returns:
+        dict: Slots in use, queue depth, degraded mode and per-route
+        in-flight, service time and shed counters
+    """
+    _check_admin_token(x_admin_token)
+    return admission_controller.stats()
@@ -0,0 +1,61 @@
+"""
+Recommendation feedback endpoints
+"""
+import time
+
+from fastapi import APIRouter, HTTPException, Path
+
+from api.dependencies.feedback import feedback_pipeline
+from api.dependencies.metrics import route_class
+from api.schemas.feedback import FeedbackRequest, FeedbackResponse, OutfitFeedbackResponse
+from utils.feedback import FeedbackEvent
+
+router = APIRouter(route_class=route_class)
+
+
+@router.post("/feedback", response_model=FeedbackResponse, status_code=202)
+async def submit_feedback(request: FeedbackRequest):
+    """
+    Record clicks, saves and dismissals of recommended outfits
+
+    Events are buffered in memory and written to the feedback log in the
+    background; a 202 means they were queued. When the buffer is full the
+    request is refused with 503 and Retry-After, and nothing is queued.
+
+    Args:
+        request: Feedback events
+
+    Returns:
+        FeedbackResponse: Number of events accepted
+    """
+    received = time.time()
+    events = [
+        FeedbackEvent(
+            event.timestamp if event.timestamp is not None else received,
+            event.outfit_id,
+            event.action,
+            event.user_id,
+        )
+        for event in request.events
+    ]
+    if not feedback_pipeline.submit(events):
+        raise HTTPException(
+            status_code=503,
+            detail="Feedback buffer is full, retry later",
+            headers={"Retry-After": "1"},
+        )
+    return FeedbackResponse(success=True, accepted=len(events), message="Feedback queued")
+
+
+@router.get("/feedback/outfits/{outfit_id}", response_model=OutfitFeedbackResponse)
+async def get_outfit_feedback(outfit_id: str = Path(..., min_length=1, max_length=128)):
+    """
+    Aggregated feedback for an outfit
+
+    Counts include every event written to the log so far; events still
+    buffered are not counted yet.
+
+    Returns:
+        OutfitFeedbackResponse: Events per action
+    """
+    return OutfitFeedbackResponse(outfit_id=outfit_id, counts=feedback_pipeline.counters.get(outfit_id))
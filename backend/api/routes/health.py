@@ -2,9 +2,13 @@
 Health check endpoints
 """
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-router = APIRouter()
+from api.dependencies.metrics import route_class
+from api.dependencies.startup import startup
+
+router = APIRouter(route_class=route_class)
 
 
 class HealthResponse(BaseModel):
@@ -33,12 +37,17 @@ async def readiness_check():
     """
     Readiness check endpoint
 
+    Answers 503 until the catalog is loaded and the warm-up requests have
+    run, so load balancers hold traffic back from a cold worker.
+
     Returns:
-        dict: Readiness status
+        dict: Readiness status with per-component startup timings
     """
-    # Check if models are loaded, database is accessible, etc.
-    # For now, return a simple success response
+    stats = startup.stats()
+    if not startup.ready:
+        message = "Startup failed" if stats["status"] == "failed" else "API is warming up"
+        return JSONResponse(status_code=503, content={**stats, "message": message})
     return {
-        "status": "ready",
+        **stats,
         "message": "API is ready to accept requests",
     }
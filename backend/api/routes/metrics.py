@@ -0,0 +1,221 @@
+"""
+Prometheus metrics endpoint
+"""
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api.dependencies.admission import admission_controller
+from api.dependencies.capture import request_capture
+from api.dependencies.catalog import catalog_store
+from api.dependencies.feedback import feedback_pipeline
+from api.dependencies.profiles import profile_store
+from api.dependencies.metrics import metrics, route_class
+from api.dependencies.scoring import scoring_pool
+from api.dependencies.weather import weather_provider
+from api.routes.recommendations import (
+    occasion_payloads,
+    ranking_cache,
+    recommendation_cache,
+    recommendation_flight,
+)
+
+router = APIRouter(route_class=route_class)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _collect_caches():
+    """Cache counters, read from the caches at scrape time"""
+    caches = {
+        "recommendations": recommendation_cache,
+        "rankings": ranking_cache,
+        "occasion_responses": occasion_payloads.entries,
+    }
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    yield "cache_entries", "gauge", "Entries currently cached", [
+        ({"cache": name}, values["size"]) for name, values in stats.items()
+    ]
+    for counter in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        yield f"cache_{counter}_total", "counter", f"Cache {counter}", [
+            ({"cache": name}, values[counter]) for name, values in stats.items()
+        ]
+
+
+def _collect_occasion_responses():
+    """Conditional and precompressed occasion responses"""
+    stats = occasion_payloads.stats()
+    yield "occasion_responses_total", "counter", "Occasion JSON responses, by outcome", [
+        ({"outcome": "not_modified"}, stats["not_modified"]),
+        *(({"outcome": encoding}, count) for encoding, count in stats["sent"].items()),
+    ]
+    yield "occasion_compressions_total", "counter", "Occasion payloads compressed", [
+        ({}, stats["compressions"])
+    ]
+    yield "occasion_response_bytes_saved_total", "counter", "Bytes not sent thanks to 304s and compression", [
+        ({}, stats["bytes_saved"])
+    ]
+
+
+def _collect_coalescing():
+    """Recommendation requests that started a computation or joined one"""
+    stats = recommendation_flight.stats()
+    yield "coalescing_inflight", "gauge", "Recommendation computations currently running", [
+        ({}, stats["inflight"])
+    ]
+    yield "coalescing_requests_total", "counter", "Recommendation requests, by single-flight role", [
+        ({"role": "leader"}, stats["leaders"]),
+        ({"role": "follower"}, stats["followers"]),
+    ]
+
+
+def _collect_catalog():
+    """Catalog size and version"""
+    yield "catalog_outfits", "gauge", "Outfits in the current catalog", [({}, len(catalog_store.catalog))]
+    yield "catalog_version", "gauge", "Catalog reloads since startup", [({}, catalog_store.version)]
+    yield "catalog_load_seconds", "gauge", "Time taken by the last catalog load", [
+        ({}, catalog_store.load_seconds)
+    ]
+    tables = getattr(catalog_store.catalog, "recommendation_tables", None)
+    if tables is not None:
+        stats = tables.stats()
+        yield "recommendation_table_lookups_total", "counter", "Recommendation table lookups, by outcome", [
+            ({"outcome": "hit"}, stats["hits"]),
+            ({"outcome": "miss"}, stats["misses"]),
+            ({"outcome": "uncertified"}, stats["uncertified"]),
+        ]
+        yield "recommendation_table_age_seconds", "gauge", "Time since the recommendation tables were built", [
+            ({}, time.time() - stats["built_at"])
+        ]
+        yield "recommendation_tables_stale", "gauge", "1 while the tables lag behind the catalog", [
+            ({}, int(stats["catalog_version"] != catalog_store.catalog.version))
+        ]
+    ann_index = getattr(catalog_store.catalog, "ann_index", None)
+    if ann_index is not None:
+        stats = ann_index.stats()
+        yield "ann_searches_total", "counter", "Candidate searches served by the ANN index", [
+            ({}, stats["searches"])
+        ]
+        yield "ann_exact_searches_total", "counter", "ANN searches whose candidates are exact", [
+            ({}, stats["exact_searches"])
+        ]
+        yield "ann_rows_scanned_total", "counter", "Catalog rows scored by ANN searches", [
+            ({}, ann_index.rows_scanned)
+        ]
+
+
+def _collect_profiles():
+    """User profile store size and write-behind progress"""
+    stats = profile_store.stats()
+    yield "profiles", "gauge", "User profiles in memory", [({}, stats["profiles"])]
+    yield "profile_dirty", "gauge", "Profiles changed since the last flush", [({}, stats["dirty"])]
+    yield "profile_rows_flushed_total", "counter", "Profile rows written to or deleted from the store", [
+        ({}, stats["rows_flushed"])
+    ]
+    yield "profile_flush_errors_total", "counter", "Profile flushes that failed", [({}, stats["flush_errors"])]
+
+
+def _collect_feedback():
+    """Feedback buffer fill, backpressure and log progress"""
+    stats = feedback_pipeline.stats()
+    yield "feedback_buffered", "gauge", "Feedback events waiting to be written", [({}, stats["buffered"])]
+    yield "feedback_buffer_capacity", "gauge", "Feedback events the buffer holds", [({}, stats["capacity"])]
+    yield "feedback_events_total", "counter", "Feedback events submitted, by outcome", [
+        ({"outcome": "accepted"}, stats["accepted"]),
+        ({"outcome": "rejected"}, stats["rejected"]),
+    ]
+    yield "feedback_events_written_total", "counter", "Feedback events written to the log", [
+        ({}, stats["written"])
+    ]
+    yield "feedback_fsyncs_total", "counter", "fsync calls on the feedback log", [({}, stats["fsyncs"])]
+    yield "feedback_write_errors_total", "counter", "Failed feedback log writes", [({}, stats["write_errors"])]
+    yield "feedback_segments", "gauge", "Feedback log segment files on disk", [({}, stats["segments"])]
+    yield "feedback_compactions_total", "counter", "Feedback log compactions", [({}, stats["compactions"])]
+
+
+def _collect_capture():
+    """Sampled request capture progress"""
+    stats = request_capture.stats()
+    yield "request_capture_total", "counter", "Sampled requests, by outcome", [
+        ({"outcome": "written"}, stats["written"]),
+        ({"outcome": "dropped"}, stats["dropped"]),
+    ]
+    yield "request_capture_bytes", "gauge", "Size of the request capture file", [({}, stats["file_bytes"])]
+
+
+def _collect_admission():
+    """Admission queue, shed requests and degraded mode"""
+    stats = admission_controller.stats()
+    routes = stats["routes"]
+    yield "admission_running", "gauge", "Admitted requests holding a slot", [({}, stats["running"])]
+    yield "admission_queue_depth", "gauge", "Requests waiting for an admission slot", [({}, stats["queue_depth"])]
+    yield "admission_in_flight", "gauge", "Admitted requests in progress, by route", [
+        ({"route": name}, route["in_flight"]) for name, route in routes.items()
+    ]
+    yield "admission_service_seconds", "gauge", "Recent mean service time, by route", [
+        ({"route": name}, route["service_ms"] / 1000) for name, route in routes.items()
+    ]
+    yield "admission_shed_total", "counter", "Requests refused with 503, by route and reason", [
+        ({"route": name, "reason": reason}, count)
+        for name, route in routes.items()
+        for reason, count in route["shed"].items()
+    ]
+    yield "admission_degraded_requests_total", "counter", "Requests admitted in degraded mode, by route", [
+        ({"route": name}, route["degraded"]) for name, route in routes.items()
+    ]
+    yield "admission_degraded", "gauge", "1 while degraded mode is on", [({}, int(stats["degraded_mode"]))]
+    yield "admission_degraded_activations_total", "counter", "Times degraded mode was turned on", [
+        ({}, stats["degraded_activations"])
+    ]
+
+
+def _collect_weather():
+    """Weather provider cache and upstream counters"""
+    stats = weather_provider.stats()
+    yield "weather_cache_entries", "gauge", "Locations in the weather cache", [({}, stats["size"])]
+    for counter in ("hits", "misses", "coalesced", "upstream_errors", "stale_served"):
+        yield f"weather_{counter}_total", "counter", f"Weather lookups: {counter.replace('_', ' ')}", [
+            ({}, stats[counter])
+        ]
+
+
+def _collect_scoring_pool():
+    """Requests by scoring path and shard tasks dispatched"""
+    stats = scoring_pool.stats()
+    yield "scoring_requests_total", "counter", "Recommendations scored, by scoring path", [
+        ({"path": path}, count) for path, count in stats["requests"].items()
+    ]
+    yield "scoring_shard_tasks_total", "counter", "Shard tasks sent to the scoring pool", [
+        ({}, stats["shard_tasks"])
+    ]
+    yield "scoring_process_fallbacks_total", "counter", "Process-pool requests retried on threads", [
+        ({}, stats["process_fallbacks"])
+    ]
+
+
+metrics.add_collector(_collect_caches)
+metrics.add_collector(_collect_occasion_responses)
+metrics.add_collector(_collect_coalescing)
+metrics.add_collector(_collect_catalog)
+metrics.add_collector(_collect_profiles)
+metrics.add_collector(_collect_feedback)
+metrics.add_collector(_collect_capture)
+metrics.add_collector(_collect_admission)
+metrics.add_collector(_collect_weather)
+metrics.add_collector(_collect_scoring_pool)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text format
+
+    Request counts and latency histograms are per worker process and empty
+    when METRICS_ENABLED is false; cache and catalog figures are always
+    reported.
+
+    Returns:
+        PlainTextResponse: Prometheus exposition text
+    """
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
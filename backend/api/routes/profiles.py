@@ -0,0 +1,70 @@
+"""
+User profile endpoints
+"""
+from fastapi import APIRouter, HTTPException, Path
+
+from api.dependencies.metrics import route_class
+from api.dependencies.profiles import profile_store
+from api.schemas.profile import ProfileResponse
+from api.schemas.recommendation import UserPreferences
+from utils.profiles import ProfileNotFoundError, UserProfile
+
+router = APIRouter(route_class=route_class)
+
+USER_ID = Path(..., min_length=1, max_length=128, description="User identifier")
+
+
+def _profile_response(user_id: str, profile: UserProfile) -> ProfileResponse:
+    return ProfileResponse(
+        user_id=user_id,
+        preferences=UserPreferences(**profile.preferences()),
+        color_features=profile.features(),
+        updated_at=profile.updated_at,
+    )
+
+
+@router.put("/profiles/{user_id}", response_model=ProfileResponse)
+async def put_profile(preferences: UserPreferences, user_id: str = USER_ID):
+    """
+    Store a user's preferences
+
+    Recommendation requests can then send ``profile_id`` instead of
+    ``user_preferences``; the preferences are normalized once, here.
+
+    Args:
+        preferences: Style and color preferences
+        user_id: User identifier
+
+    Returns:
+        ProfileResponse: The normalized profile
+    """
+    profile = profile_store.put(user_id, preferences.model_dump())
+    return _profile_response(user_id, profile)
+
+
+@router.get("/profiles/{user_id}", response_model=ProfileResponse)
+async def get_profile(user_id: str = USER_ID):
+    """
+    Get a stored profile
+
+    Returns:
+        ProfileResponse: The normalized profile
+    """
+    try:
+        profile = profile_store.get(user_id)
+    except ProfileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _profile_response(user_id, profile)
+
+
+@router.delete("/profiles/{user_id}")
+async def delete_profile(user_id: str = USER_ID):
+    """
+    Delete a stored profile
+
+    Returns:
+        dict: Success flag
+    """
+    if not profile_store.delete(user_id):
+        raise HTTPException(status_code=404, detail=f"No profile for user {user_id!r}")
+    return {"success": True}
@@ -1,21 +1,223 @@
 """
 Outfit recommendation endpoints
 """
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import asyncio
+import uuid
+from functools import partial
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from models.outfit_model import OutfitRecommendationModel
+from config.settings import settings
+from models.catalog import OutfitCatalog
+from models.scoring import Ranking
+from utils.cache import TTLCache
+from utils.payloads import EncodedPayload, PayloadCache, etag_matches, make_etag
+from utils.profiles import ProfileNotFoundError
+from utils.serialization import dumps, splice, split_envelope
+from utils.singleflight import SingleFlight
+from utils.weather import WeatherUnavailableError
+from utils.preprocessing import (
+    preprocess_occasion,
+    preprocess_user_preferences,
+    preprocess_weather_data,
+)
+from api.dependencies.admission import degraded, overloaded
+from api.dependencies.capture import request_capture
+from api.dependencies.catalog import catalog_store, get_catalog, get_fragments
+from api.dependencies.metrics import current_stage_timer, route_class, warmup_traffic
+from api.dependencies.profiles import profile_store
+from api.dependencies.scoring import outfit_model, scoring_pool
+from api.dependencies.weather import weather_provider
 from api.schemas.recommendation import (
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    BatchRecommendationResult,
     RecommendationRequest,
     RecommendationResponse,
     OutfitItem,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=route_class)
+
+# Scored outfits keyed on the normalized request; dropped whenever the catalog changes
+recommendation_cache = TTLCache(
+    maxsize=settings.recommendation_cache_size,
+    ttl=settings.recommendation_cache_ttl,
+)
+catalog_store.add_listener(recommendation_cache.clear)
+
+# Identical requests being scored right now share one computation
+recommendation_flight = SingleFlight()
+
+# Rankings behind streaming cursors, so later pages reuse the scoring;
+# entries are (query tag, ranking) and a cursor only resumes its own query
+ranking_cache = TTLCache(maxsize=256, ttl=300.0)
+catalog_store.add_listener(ranking_cache.clear)
+
+# Rendered non-streamed occasion responses with their compressed variants
+occasion_payloads = PayloadCache(
+    maxsize=settings.occasion_cache_size,
+    ttl=settings.occasion_cache_ttl,
+    min_compress_bytes=settings.response_compression_min_bytes,
+    gzip_level=settings.response_gzip_level,
+    brotli_quality=settings.response_brotli_quality,
+)
+catalog_store.add_listener(occasion_payloads.clear)
+
+
+def _catalog_tag(catalog: OutfitCatalog) -> Tuple[str, int]:
+    """
+    Identity of a catalog snapshot for cache and coalescing keys
+
+    Read in the same step as the catalog itself: a result computed from a
+    catalog that was replaced or changed while it was being scored is then
+    stored under a key no later request looks up.
+    """
+    return catalog_store.fingerprint(), getattr(catalog, "version", 0)
+
+
+def _recommendation_cache_key(
+    user_preferences: Dict[str, Any], weather_category: str, occasion: str, catalog_tag: Tuple
+) -> Tuple:
+    """
+    Build a cache key from normalized request fields and the catalog
+
+    Preference order does not affect scoring, so lists are sorted; duplicates
+    are kept because repeated colors are counted by the scorer. Stored
+    profiles carry the first three fields precomputed (UserProfile.key).
+    """
+    return (
+        tuple(sorted(user_preferences.get("styles") or ())),
+        tuple(sorted(user_preferences.get("colors") or ())),
+        tuple(sorted(user_preferences.get("avoid_colors") or ())),
+        weather_category,
+        occasion,
+        catalog_tag,
+    )
+
+
+async def _resolve_weather(request: RecommendationRequest) -> Dict[str, Any]:
+    """
+    Raw weather for a request, looked up from its location when not sent
+
+    Raises:
+        WeatherUnavailableError: The lookup failed and nothing stale was cached
+    """
+    if request.weather is not None:
+        return request.weather.model_dump()
+    return await weather_provider.get(request.location.latitude, request.location.longitude)
+
+
+def _normalize_request(
+    request: RecommendationRequest,
+    catalog: OutfitCatalog,
+    weather_data: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any], str, Tuple]:
+    """
+    Run the preprocessing pipeline on a request
+
+    Args:
+        request: Validated request
+        catalog: Catalog the request will be scored against, just read
+        weather_data: Raw weather from _resolve_weather; defaults to the
+            weather sent in the request
+
+    Returns:
+        Tuple of (user_preferences, weather, occasion, cache_key)
+
+    Raises:
+        ProfileNotFoundError: The request references a profile that is not stored
+    """
+    if weather_data is None:
+        weather_data = request.weather.model_dump()
+    weather = preprocess_weather_data(weather_data)
+    occasion = preprocess_occasion(request.occasion)
+    weather_category = outfit_model._get_weather_category(weather["temperature"])
+    if request.user_preferences is None:
+        # Normalized when the profile was stored
+        profile = profile_store.get(request.profile_id)
+        user_preferences = profile.preferences()
+        cache_key = (*profile.key, weather_category, occasion, _catalog_tag(catalog))
+    else:
+        user_preferences = preprocess_user_preferences(request.user_preferences.model_dump())
+        cache_key = _recommendation_cache_key(
+            user_preferences, weather_category, occasion, _catalog_tag(catalog)
+        )
+    return user_preferences, weather, occasion, cache_key
+
+
+def _to_outfit_items(outfits: List[Dict[str, Any]], occasion: str) -> List[OutfitItem]:
+    """Convert scored outfit dicts into response items"""
+    return [OutfitItem(**{**outfit, "occasion": occasion}) for outfit in outfits]
+
+
+# Envelope of every POST /recommendations response, split around its item list
+_RECOMMENDATIONS_PREFIX, _RECOMMENDATIONS_SUFFIX = split_envelope(
+    RecommendationResponse(
+        success=True, recommendations=[], message="Recommendations generated successfully"
+    ).model_dump(mode="json"),
+    "recommendations",
+)
+
+
+def _render_recommendations(
+    outfits: List[Dict[str, Any]], occasion: str, catalog: OutfitCatalog
+) -> Response:
+    """
+    RecommendationResponse body spliced from pre-serialized outfit fragments
+
+    Byte-for-byte what FastAPI renders for the same RecommendationResponse,
+    without building and validating one. Fragments come from the catalog the
+    outfits were scored against, which may have been replaced since.
+    """
+    fragments = get_fragments(catalog)
+    occasion_json = dumps(occasion)
+    items = [
+        fragments.get(outfit).render(occasion_json, fragments.score(outfit["confidence_score"]))
+        for outfit in outfits
+    ]
+    return Response(
+        _RECOMMENDATIONS_PREFIX + b",".join(items) + _RECOMMENDATIONS_SUFFIX,
+        media_type="application/json",
+    )
+
+
+async def _compute_recommendations(
+    user_preferences: Dict[str, Any],
+    weather: Dict[str, Any],
+    occasion: str,
+    catalog: OutfitCatalog,
+    cache_key: Tuple,
+) -> List[Dict[str, Any]]:
+    """Score a request in the scoring pool and cache the scored outfits"""
+    timer = current_stage_timer()
+    # Scored in the scoring pool, off the event loop
+    outfits = await scoring_pool.recommend(user_preferences, weather, occasion, catalog)
+    # The model reports its own stages
+    timer.mark()
+    recommendation_cache.set(cache_key, outfits)
+    return outfits
+
 
-# Initialize model (will be properly loaded later)
-outfit_model = OutfitRecommendationModel()
+# 503 detail for requests degraded mode cannot answer
+_DEGRADED_DETAIL = "Server overloaded; only cached and precomputed recommendations are served"
+
+
+def _table_recommendations(
+    user_preferences: Dict[str, Any], weather: Dict[str, Any], catalog: OutfitCatalog, cache_key: Tuple
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Recommendations from the materialized tables alone, cached when found
+
+    Used in degraded mode: a table lookup scores a short precomputed list
+    on the calling thread instead of queueing for the scoring pool.
+    """
+    outfits = outfit_model.table_recommend(user_preferences, weather, catalog)
+    if outfits is not None:
+        recommendation_cache.set(cache_key, outfits)
+    return outfits
 
 
 @router.post("/recommendations", response_model=RecommendationResponse)
@@ -23,44 +225,62 @@ async def get_recommendations(request: RecommendationRequest):
     """
     Get outfit recommendations based on user preferences and context
 
+    In degraded mode (see api.dependencies.admission) only cached,
+    coalesced and materialized-table results are served; other requests
+    get 503 with Retry-After.
+
     Args:
         request: Recommendation request with user preferences, weather, and occasion
 
     Returns:
         RecommendationResponse: List of recommended outfits
     """
+    timer = current_stage_timer()
+    timer.lap("validation")
+    if request.weather is None:
+        try:
+            weather_data = await _resolve_weather(request)
+        except WeatherUnavailableError as e:
+            raise HTTPException(status_code=503, detail=f"Weather unavailable: {str(e)}")
+        timer.lap("weather_lookup")
+    else:
+        weather_data = None
+
     try:
-        # TODO: Implement actual recommendation logic
-        # For now, return mock data
-        mock_outfits = [
-            OutfitItem(
-                id="1",
-                name="Casual Summer Outfit",
-                description="Light and comfortable outfit for warm weather",
-                items=["White T-shirt", "Blue Jeans", "Sneakers"],
-                colors=["White", "Blue"],
-                style="Casual",
-                occasion=request.occasion,
-                confidence_score=0.95,
-            ),
-            OutfitItem(
-                id="2",
-                name="Smart Casual Look",
-                description="Perfect balance between casual and formal",
-                items=["Button-up Shirt", "Chinos", "Loafers"],
-                colors=["Light Blue", "Beige"],
-                style="Smart Casual",
-                occasion=request.occasion,
-                confidence_score=0.88,
-            ),
-        ]
+        catalog = get_catalog()
+        user_preferences, weather, occasion, cache_key = _normalize_request(request, catalog, weather_data)
+        if not warmup_traffic():
+            request_capture.offer(user_preferences, weather, occasion)
+        timer.lap("preprocessing")
+        recommendations = recommendation_cache.get(cache_key)
+        timer.lap("cache_lookup")
+        if recommendations is None:
+            compute = partial(
+                _compute_recommendations, user_preferences, weather, occasion, catalog, cache_key
+            )
+            joined = recommendation_flight.join(cache_key) if settings.recommendation_coalescing else None
+            if joined is not None:
+                # An identical request is already being scored; share its result
+                recommendations = await joined
+                timer.lap("coalesced_wait")
+            elif degraded():
+                recommendations = _table_recommendations(user_preferences, weather, catalog, cache_key)
+                if recommendations is None:
+                    raise overloaded(_DEGRADED_DETAIL)
+                timer.mark()
+            elif settings.recommendation_coalescing:
+                recommendations = await recommendation_flight.do(cache_key, compute)
+            else:
+                recommendations = await compute()
 
-        return RecommendationResponse(
-            success=True,
-            recommendations=mock_outfits,
-            message="Recommendations generated successfully",
-        )
+        response = _render_recommendations(recommendations, occasion, catalog)
+        timer.lap("response_build")
+        return response
 
+    except HTTPException:
+        raise
+    except ProfileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -68,230 +288,402 @@ async def get_recommendations(request: RecommendationRequest):
         )
 
 
-@router.post("/recommendations/occasion")
-async def get_recommendations_by_occasion(
-    occasion: str,
-    style: Optional[str] = None,
-    colors: Optional[List[str]] = None,
-):
+@router.post("/recommendations/batch", response_model=BatchRecommendationResponse)
+async def get_recommendations_batch(batch: BatchRecommendationRequest):
     """
-    Get outfit recommendations filtered by occasion
+    Get outfit recommendations for many requests in one call
+
+    Identical normalized requests are computed once, cached results are
+    reused, and the remaining requests are scored together, grouped by
+    weather category and occasion. In degraded mode requests the cache and
+    the materialized tables cannot answer fail with an overload error.
 
     Args:
-        occasion: Type of occasion
-        style: Optional style preference
-        colors: Optional preferred colors
+        batch: List of recommendation requests
 
     Returns:
-        dict: Filtered recommendations
-    """
-    # Generate mock recommendations based on occasion
-    occasion_outfits = {
-        "casual": [
-            OutfitItem(
-                id="casual_1",
-                name="Classic Casual",
-                description="Comfortable everyday outfit",
-                items=["Cotton T-shirt", "Denim Jeans", "Sneakers", "Baseball Cap"],
-                colors=["White", "Blue", "Black"],
-                style=style or "Casual",
-                occasion=occasion,
-                confidence_score=0.92,
-            ),
-            OutfitItem(
-                id="casual_2",
-                name="Weekend Vibes",
-                description="Perfect for a relaxed weekend",
-                items=["Polo Shirt", "Khaki Shorts", "Canvas Shoes", "Sunglasses"],
-                colors=["Navy", "Khaki", "White"],
-                style=style or "Casual",
-                occasion=occasion,
-                confidence_score=0.88,
-            ),
-            OutfitItem(
-                id="casual_3",
-                name="Urban Casual",
-                description="Trendy streetwear look",
-                items=["Hoodie", "Joggers", "High-top Sneakers", "Backpack"],
-                colors=["Gray", "Black", "White"],
-                style=style or "Sporty",
-                occasion=occasion,
-                confidence_score=0.85,
-            ),
-        ],
-        "formal": [
-            OutfitItem(
-                id="formal_1",
-                name="Business Professional",
-                description="Classic formal business attire",
-                items=["Suit Jacket", "Dress Shirt", "Dress Pants", "Oxford Shoes", "Tie"],
-                colors=["Navy", "White", "Black"],
-                style=style or "Formal",
-                occasion=occasion,
-                confidence_score=0.95,
-            ),
-            OutfitItem(
-                id="formal_2",
-                name="Executive Style",
-                description="Sophisticated formal look",
-                items=["Charcoal Suit", "Light Blue Shirt", "Leather Dress Shoes", "Silk Tie"],
-                colors=["Charcoal", "Light Blue", "Brown"],
-                style=style or "Formal",
-                occasion=occasion,
-                confidence_score=0.93,
-            ),
-        ],
-        "business": [
-            OutfitItem(
-                id="business_1",
-                name="Business Casual",
-                description="Professional yet comfortable",
-                items=["Blazer", "Button-up Shirt", "Chinos", "Loafers"],
-                colors=["Navy", "White", "Khaki"],
-                style=style or "Business Casual",
-                occasion=occasion,
-                confidence_score=0.90,
-            ),
-            OutfitItem(
-                id="business_2",
-                name="Smart Professional",
-                description="Modern business attire",
-                items=["Sport Coat", "Dress Shirt", "Tailored Trousers", "Derby Shoes"],
-                colors=["Gray", "Blue", "Black"],
-                style=style or "Business",
-                occasion=occasion,
-                confidence_score=0.87,
-            ),
-        ],
-        "party": [
-            OutfitItem(
-                id="party_1",
-                name="Night Out",
-                description="Stylish party outfit",
-                items=["Fitted Shirt", "Dark Jeans", "Chelsea Boots", "Watch"],
-                colors=["Black", "Indigo", "Silver"],
-                style=style or "Party",
-                occasion=occasion,
-                confidence_score=0.89,
-            ),
-            OutfitItem(
-                id="party_2",
-                name="Club Ready",
-                description="Bold and trendy party look",
-                items=["Designer Shirt", "Slim Trousers", "Dress Shoes", "Leather Jacket"],
-                colors=["White", "Black", "Silver"],
-                style=style or "Trendy",
-                occasion=occasion,
-                confidence_score=0.86,
-            ),
-        ],
-        "sports": [
-            OutfitItem(
-                id="sports_1",
-                name="Active Wear",
-                description="Performance athletic outfit",
-                items=["Athletic Shirt", "Track Pants", "Running Shoes", "Sports Watch"],
-                colors=["Red", "Black", "White"],
-                style=style or "Sporty",
-                occasion=occasion,
-                confidence_score=0.91,
-            ),
-            OutfitItem(
-                id="sports_2",
-                name="Gym Session",
-                description="Comfortable workout gear",
-                items=["Tank Top", "Shorts", "Training Shoes", "Gym Bag"],
-                colors=["Gray", "Black", "Blue"],
-                style=style or "Athletic",
-                occasion=occasion,
-                confidence_score=0.88,
-            ),
-        ],
-        "outdoor": [
-            OutfitItem(
-                id="outdoor_1",
-                name="Adventure Ready",
-                description="Practical outdoor outfit",
-                items=["Hiking Jacket", "Cargo Pants", "Hiking Boots", "Backpack"],
-                colors=["Olive", "Brown", "Beige"],
-                style=style or "Outdoor",
-                occasion=occasion,
-                confidence_score=0.90,
-            ),
-            OutfitItem(
-                id="outdoor_2",
-                name="Nature Explorer",
-                description="Comfortable outdoor wear",
-                items=["Fleece Jacket", "Convertible Pants", "Trail Shoes", "Hat"],
-                colors=["Green", "Khaki", "Gray"],
-                style=style or "Casual",
-                occasion=occasion,
-                confidence_score=0.87,
-            ),
-        ],
-        "date": [
-            OutfitItem(
-                id="date_1",
-                name="Romantic Evening",
-                description="Elegant date night outfit",
-                items=["Dress Shirt", "Tailored Jeans", "Leather Shoes", "Watch"],
-                colors=["White", "Dark Blue", "Brown"],
-                style=style or "Smart Casual",
-                occasion=occasion,
-                confidence_score=0.92,
-            ),
-            OutfitItem(
-                id="date_2",
-                name="Casual Date",
-                description="Relaxed yet stylish",
-                items=["Henley Shirt", "Dark Chinos", "Clean Sneakers", "Belt"],
-                colors=["Navy", "Gray", "White"],
-                style=style or "Casual",
-                occasion=occasion,
-                confidence_score=0.88,
-            ),
-        ],
-        "wedding": [
-            OutfitItem(
-                id="wedding_1",
-                name="Wedding Guest",
-                description="Formal wedding attire",
-                items=["Three-piece Suit", "Dress Shirt", "Tie", "Oxford Shoes", "Pocket Square"],
-                colors=["Charcoal", "White", "Burgundy"],
-                style=style or "Formal",
-                occasion=occasion,
-                confidence_score=0.96,
-            ),
-            OutfitItem(
-                id="wedding_2",
-                name="Summer Wedding",
-                description="Light formal attire",
-                items=["Light Suit", "Linen Shirt", "Dress Shoes", "Tie", "Sunglasses"],
-                colors=["Light Gray", "White", "Blue"],
-                style=style or "Formal",
-                occasion=occasion,
-                confidence_score=0.94,
+        BatchRecommendationResponse: One result per request, in input order
+    """
+    results: List[Optional[BatchRecommendationResult]] = [None] * len(batch.requests)
+    positions_by_key: Dict[Tuple, List[int]] = {}
+    pending: Dict[Tuple, Tuple[Dict[str, Any], Dict[str, Any], str]] = {}
+
+    validated: Dict[int, RecommendationRequest] = {}
+    for index, raw_request in enumerate(batch.requests):
+        try:
+            validated[index] = RecommendationRequest.model_validate(raw_request)
+        except (ValidationError, ValueError, TypeError) as e:
+            results[index] = BatchRecommendationResult(index=index, success=False, error=str(e))
+
+    # Location-only items are looked up concurrently; the provider coalesces
+    # items that share a location
+    lookups = [index for index, request in validated.items() if request.weather is None]
+    looked_up = dict(
+        zip(
+            lookups,
+            await asyncio.gather(
+                *(_resolve_weather(validated[index]) for index in lookups), return_exceptions=True
             ),
-        ],
-    }
+        )
+    )
+
+    # Read after the lookups; every request of the batch is scored against it
+    catalog = get_catalog()
+    for index, request in validated.items():
+        try:
+            weather_data = looked_up.get(index)
+            if isinstance(weather_data, Exception):
+                raise weather_data
+            user_preferences, weather, occasion, cache_key = _normalize_request(
+                request, catalog, weather_data
+            )
+        except (ValueError, TypeError, AttributeError, WeatherUnavailableError, ProfileNotFoundError) as e:
+            results[index] = BatchRecommendationResult(index=index, success=False, error=str(e))
+            continue
+
+        if not warmup_traffic():
+            request_capture.offer(user_preferences, weather, occasion)
+        positions_by_key.setdefault(cache_key, []).append(index)
+        if cache_key not in pending:
+            pending[cache_key] = (user_preferences, weather, occasion)
+
+    resolved: Dict[Tuple, List[OutfitItem]] = {}
+    for cache_key in list(pending):
+        cached = recommendation_cache.get(cache_key)
+        if cached is not None:
+            resolved[cache_key] = _to_outfit_items(cached, pending[cache_key][2])
+            del pending[cache_key]
 
+    # Keys a concurrent request is already scoring are awaited, not rescored
+    joining: Dict[Tuple, Any] = {}
+    if settings.recommendation_coalescing:
+        for key in list(pending):
+            joined = recommendation_flight.join(key)
+            if joined is not None:
+                joining[key] = joined
+    if joining:
+        outcomes = await asyncio.gather(*joining.values(), return_exceptions=True)
+        for key, outcome in zip(joining, outcomes):
+            occasion = pending.pop(key)[2]
+            if isinstance(outcome, Exception):
+                for index in positions_by_key[key]:
+                    results[index] = BatchRecommendationResult(
+                        index=index,
+                        success=False,
+                        error=f"Error generating recommendations: {str(outcome)}",
+                    )
+            else:
+                resolved[key] = _to_outfit_items(outcome, occasion)
+
+    if pending and degraded():
+        for key in list(pending):
+            user_preferences, weather, occasion = pending[key]
+            outfits = _table_recommendations(user_preferences, weather, catalog, key)
+            if outfits is not None:
+                resolved[key] = _to_outfit_items(outfits, occasion)
+                del pending[key]
+        if pending:
+            # Counted as one shed request
+            error = overloaded(_DEGRADED_DETAIL).detail
+            for key in pending:
+                for index in positions_by_key[key]:
+                    results[index] = BatchRecommendationResult(index=index, success=False, error=error)
+            pending.clear()
+
+    if pending:
+        keys = list(pending)
+        try:
+            scored = await scoring_pool.recommend_batch([pending[key] for key in keys], catalog)
+        except Exception as e:
+            for key in keys:
+                for index in positions_by_key[key]:
+                    results[index] = BatchRecommendationResult(
+                        index=index,
+                        success=False,
+                        error=f"Error generating recommendations: {str(e)}",
+                    )
+        else:
+            for key, outfits in zip(keys, scored):
+                recommendation_cache.set(key, outfits)
+                resolved[key] = _to_outfit_items(outfits, pending[key][2])
+
+    for key, recommendations in resolved.items():
+        for index in positions_by_key[key]:
+            results[index] = BatchRecommendationResult(
+                index=index, success=True, recommendations=recommendations
+            )
+
+    failed = sum(1 for result in results if not result.success)
+    return BatchRecommendationResponse(
+        success=failed == 0,
+        results=results,
+        message=f"Generated recommendations for {len(results) - failed} of {len(results)} requests",
+    )
+
+
+@router.get("/recommendations/cache")
+async def get_recommendation_cache_stats():
+    """
+    Response cache statistics
+
+    Returns:
+        dict: Hit, miss and eviction counters
+    """
+    return recommendation_cache.stats()
+
+
+@router.get("/recommendations/model")
+async def get_model_info():
+    """
+    Model metadata and the state of the current catalog's recommendation tables
+
+    Returns:
+        dict: Model info; 'recommendation_tables' holds the catalog version
+        the tables were built from, the current version, whether they are
+        stale, their age and lookup counters
+    """
+    return outfit_model.get_model_info(get_catalog())
+
+
+@router.get("/recommendations/occasion/cache")
+async def get_occasion_cache_stats():
+    """
+    Occasion response cache statistics
+
+    Returns:
+        dict: Cache counters, 304s, responses sent per content coding and
+        bytes saved by conditional and compressed responses
+    """
+    return occasion_payloads.stats()
+
+
+@router.get("/recommendations/coalescing")
+async def get_recommendation_coalescing_stats():
+    """
+    Request coalescing statistics
+
+    Returns:
+        dict: Leader and follower counts and the share of requests coalesced
+    """
+    return recommendation_flight.stats()
+
+
+def _parse_cursor(cursor: Optional[str], query_tag: str) -> Tuple[Optional[str], int]:
+    """
+    Split a streaming cursor into (ranking id, offset)
+
+    Raises:
+        HTTPException: 400 when the cursor is malformed or was issued for
+            another query or catalog version
+    """
+    if not cursor:
+        return None, 0
+    ranking_id, _, rest = cursor.partition(":")
+    offset, _, tag = rest.partition(":")
+    try:
+        offset = max(0, int(offset))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if tag != query_tag:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor belongs to another query or catalog version; start again without it",
+        )
+    return ranking_id, offset
+
+
+def _ndjson_lines(
+    ranking: Ranking,
+    cursor_prefix: str,
+    offset: int,
+    limit: Optional[int],
+    render: Callable[[Dict[str, Any]], bytes],
+) -> Iterator[bytes]:
+    """
+    Yield one JSON line per scored outfit, then a trailer with the next cursor
+    """
+    count = 0
+    chunk_size = min(limit, 64) if limit else 64
+    for outfit in ranking.iter_from(offset, chunk_size=chunk_size):
+        if limit is not None and count == limit:
+            break
+        yield render(outfit) + b"\n"
+        count += 1
+
+    end = offset + count
+    yield dumps(
+        {
+            "next_cursor": cursor_prefix.format(end) if end < len(ranking) else None,
+            "count": count,
+            "total_count": len(ranking),
+        }
+    ) + b"\n"
+
+
+async def _stream_recommendations(
+    catalog: OutfitCatalog,
+    occasion: str,
+    style: Optional[str],
+    colors: Optional[List[str]],
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> StreamingResponse:
+    """
+    Stream ranked outfits as NDJSON
+
+    The catalog's own rows for the occasion are ranked in place, in the
+    scoring pool so the event loop stays free, and each line is spliced from the outfit's pre-serialized fragment. A cursor
+    names a cached ranking, an offset and the query it was issued for;
+    when the ranking has expired it is recomputed from the same query and
+    the offset still applies.
+    """
+    query_tag = make_etag(*_catalog_tag(catalog), occasion, style, colors).strip('"')[:16]
+    ranking_id, offset = _parse_cursor(cursor, query_tag)
+    cached = ranking_cache.get(ranking_id) if ranking_id else None
+    if cached is not None and cached[0] == query_tag:
+        ranking = cached[1]
+    else:
+        ranking = await scoring_pool.rank(
+            {"styles": [style] if style else [], "colors": colors or []},
+            None,
+            occasion,
+            catalog,
+            rows=catalog.rows(_occasion_slots(catalog, occasion, colors)),
+        )
+        ranking_id = uuid.uuid4().hex
+        ranking_cache.set(ranking_id, (query_tag, ranking))
+
+    fragments = get_fragments(catalog)
+    occasion_json = dumps(occasion)
+    style_json = dumps(style) if style else None
+
+    def render(outfit: Dict[str, Any]) -> bytes:
+        return fragments.get(outfit).render(
+            occasion_json, fragments.score(outfit["confidence_score"]), style_json
+        )
+
+    return StreamingResponse(
+        _ndjson_lines(ranking, f"{ranking_id}:{{}}:{query_tag}", offset, limit, render),
+        media_type="application/x-ndjson",
+    )
+
+
+def _occasion_slots(catalog: OutfitCatalog, occasion: str, colors: Optional[List[str]]) -> int:
+    """Slots for an occasion (casual if unknown), narrowed to the given colors when any match"""
     # Get recommendations for the occasion (default to casual if not found)
-    recommendations = occasion_outfits.get(occasion.lower(), occasion_outfits["casual"])
+    slots = catalog.occasion_slots(occasion) or catalog.occasion_slots("casual")
 
     # Filter by colors if provided
     if colors:
-        filtered_recommendations = []
-        for rec in recommendations:
-            # Check if any of the outfit colors match the preferred colors
-            if any(color.lower() in [c.lower() for c in colors] for color in rec.colors):
-                filtered_recommendations.append(rec)
-        recommendations = filtered_recommendations if filtered_recommendations else recommendations
-
-    return {
+        filtered_slots = slots & catalog.color_slots(colors)
+        slots = filtered_slots if filtered_slots else slots
+    return slots
+
+
+def _occasion_outfits(catalog: OutfitCatalog, occasion: str, colors: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Outfits for an occasion (casual if unknown), narrowed to the given colors when any match"""
+    return catalog.outfits_for(_occasion_slots(catalog, occasion, colors))
+
+
+def _render_occasion(
+    catalog: OutfitCatalog, occasion: str, style: Optional[str], colors: Optional[List[str]]
+) -> Tuple[bytes, str]:
+    """
+    Occasion response body and its ETag
+
+    Spliced from pre-serialized outfits instead of building OutfitItems.
+    The ETag covers the catalog's identity and version and the query, so
+    every worker process tags the same response the same way.
+    """
+    outfits = _occasion_outfits(catalog, occasion, colors)
+    fragments = get_fragments(catalog)
+    occasion_json = dumps(occasion)
+    style_json = dumps(style) if style else None
+    items = [
+        fragments.get(outfit).render(
+            occasion_json, fragments.score(outfit["confidence_score"]), style_json
+        )
+        for outfit in outfits
+    ]
+    envelope = {
         "success": True,
         "occasion": occasion,
         "style": style,
         "colors": colors,
-        "recommendations": [rec.model_dump() for rec in recommendations],
-        "message": f"Found {len(recommendations)} recommendations for {occasion}",
+        "recommendations": [],
+        "message": f"Found {len(outfits)} recommendations for {occasion}",
     }
+    etag = make_etag(*_catalog_tag(catalog), occasion, style, colors)
+    return splice(envelope, "recommendations", items), etag
+
+
+def _payload_headers(payload: EncodedPayload, encoding: Optional[str]) -> Dict[str, str]:
+    """ETag (per coding, as the bytes differ) and Vary headers for a payload response"""
+    etag = payload.etag if encoding is None else f'{payload.etag[:-1]}-{encoding}"'
+    return {"ETag": etag, "Vary": "Accept-Encoding"}
+
+
+async def _payload_response(payload: EncodedPayload, request: Request) -> Response:
+    """
+    304 when the client's If-None-Match matches, otherwise the payload in
+    the best content coding the client accepts
+
+    The conditional check comes first so a 304 never compresses anything;
+    a first-use compression runs in a worker thread, off the event loop.
+    """
+    encoding = occasion_payloads.negotiated(payload, request.headers.get("accept-encoding"))
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        occasion_payloads.record(payload, None, None)
+        return Response(status_code=304, headers=_payload_headers(payload, encoding))
+    if occasion_payloads.needs_compression(payload, encoding):
+        body, encoding = await asyncio.to_thread(occasion_payloads.encoded, payload, encoding)
+    else:
+        body, encoding = occasion_payloads.encoded(payload, encoding)
+    occasion_payloads.record(payload, body, encoding)
+    headers = _payload_headers(payload, encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=payload.media_type, headers=headers)
+
+
+@router.post("/recommendations/occasion")
+async def get_recommendations_by_occasion(
+    request: Request,
+    occasion: str,
+    style: Optional[str] = None,
+    colors: Optional[List[str]] = None,
+    stream: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1, description="Page size when streaming"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from a previous page"),
+):
+    """
+    Get outfit recommendations filtered by occasion
+
+    The JSON response is rendered once per query and catalog version and
+    carries an ETag: a request whose If-None-Match matches gets 304. It is
+    sent gzip- or brotli-encoded when the client accepts it, compressed
+    once per cached response. The query is a read despite the POST, so
+    If-None-Match is handled as for GET.
+
+    Args:
+        request: Incoming request, for the conditional and encoding headers
+        occasion: Type of occasion
+        style: Optional style preference
+        colors: Optional preferred colors
+        stream: Stream ranked outfits as NDJSON instead of one JSON document
+        limit: Maximum outfits per streamed page
+        cursor: Cursor returned in the trailer of the previous streamed page
+
+    Returns:
+        Response: Filtered recommendations as JSON, or an NDJSON stream of scored outfits
+        ending with a {"next_cursor", "count", "total_count"} line
+    """
+    catalog = get_catalog()
+    if not stream:
+        payload = occasion_payloads.get_or_render(
+            (occasion, style, tuple(colors) if colors is not None else None, _catalog_tag(catalog)),
+            partial(_render_occasion, catalog, occasion, style, colors),
+        )
+        return await _payload_response(payload, request)
+
+    return await _stream_recommendations(catalog, occasion, style, colors, limit, cursor)
@@ -0,0 +1,44 @@
+"""
+Style classification endpoints
+"""
+from fastapi import APIRouter, HTTPException
+
+from api.dependencies.classifier import style_batcher
+from api.dependencies.metrics import route_class
+from api.schemas.style import StyleClassificationRequest, StyleClassificationResponse
+
+router = APIRouter(route_class=route_class)
+
+
+@router.post("/styles/classify", response_model=StyleClassificationResponse)
+async def classify_style(request: StyleClassificationRequest):
+    """
+    Classify the style of an item description
+
+    Concurrent calls are grouped into batches for the classifier.
+
+    Args:
+        request: Item or outfit description
+
+    Returns:
+        StyleClassificationResponse: Predicted style with per-style scores
+    """
+    try:
+        result = await style_batcher.submit(request.description)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error classifying style: {str(e)}",
+        )
+    return StyleClassificationResponse(**result)
+
+
+@router.get("/styles/batching")
+async def get_batching_stats():
+    """
+    Micro-batching statistics for the style classifier
+
+    Returns:
+        dict: Batch counts, mean batch size, wait and run times
+    """
+    return style_batcher.stats()
@@ -0,0 +1,35 @@
+"""
+Pydantic schemas for feedback endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+
+class FeedbackEventIn(BaseModel):
+    """Interaction with a recommended outfit"""
+
+    outfit_id: str = Field(..., min_length=1, max_length=128, description="OutfitItem.id")
+    action: Literal["click", "save", "dismiss"]
+    user_id: Optional[str] = Field(default=None, max_length=128)
+    timestamp: Optional[float] = Field(default=None, description="Unix time of the interaction; defaults to receipt")
+
+
+class FeedbackRequest(BaseModel):
+    """Request model for feedback ingestion"""
+
+    events: List[FeedbackEventIn] = Field(..., min_length=1, max_length=1000)
+
+
+class FeedbackResponse(BaseModel):
+    """Response model for feedback ingestion"""
+
+    success: bool
+    accepted: int
+    message: str
+
+
+class OutfitFeedbackResponse(BaseModel):
+    """Aggregated feedback for one outfit"""
+
+    outfit_id: str
+    counts: Dict[str, int] = Field(..., description="Events per action")
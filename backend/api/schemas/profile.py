@@ -0,0 +1,16 @@
+"""
+Pydantic schemas for user profile endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict
+
+from api.schemas.recommendation import UserPreferences
+
+
+class ProfileResponse(BaseModel):
+    """Stored user profile"""
+
+    user_id: str
+    preferences: UserPreferences = Field(..., description="Normalized preferences")
+    color_features: Dict[str, Any] = Field(default_factory=dict, description="Features of the preferred colors")
+    updated_at: float = Field(..., description="Unix time of the last update")
@@ -1,8 +1,8 @@
 """
 Pydantic schemas for recommendation endpoints
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Optional
 
 
 class UserPreferences(BaseModel):
@@ -22,14 +22,41 @@ class WeatherData(BaseModel):
     wind_speed: Optional[float] = Field(default=None, description="Wind speed in km/h")
 
 
+class Location(BaseModel):
+    """Geographic coordinates"""
+
+    latitude: float = Field(..., ge=-90.0, le=90.0, description="Degrees north")
+    longitude: float = Field(..., ge=-180.0, le=180.0, description="Degrees east")
+
+
 class RecommendationRequest(BaseModel):
     """Request model for outfit recommendations"""
 
-    user_preferences: UserPreferences
-    weather: WeatherData
+    user_preferences: Optional[UserPreferences] = Field(
+        default=None, description="Style preferences; taken from the stored profile if omitted"
+    )
+    profile_id: Optional[str] = Field(
+        default=None, description="User id of a stored profile, used when user_preferences is omitted"
+    )
+    weather: Optional[WeatherData] = Field(
+        default=None, description="Current weather; looked up server-side from location if omitted"
+    )
+    location: Optional[Location] = Field(default=None, description="Used when weather is omitted")
     occasion: str = Field(..., description="Type of occasion")
     additional_notes: Optional[str] = Field(default=None, description="Additional context")
 
+    @model_validator(mode="after")
+    def require_weather_or_location(self) -> "RecommendationRequest":
+        if self.weather is None and self.location is None:
+            raise ValueError("Either weather or location is required")
+        return self
+
+    @model_validator(mode="after")
+    def require_preferences_or_profile(self) -> "RecommendationRequest":
+        if self.user_preferences is None and self.profile_id is None:
+            raise ValueError("Either user_preferences or profile_id is required")
+        return self
+
 
 class OutfitItem(BaseModel):
     """Individual outfit recommendation"""
@@ -54,9 +81,37 @@ class RecommendationResponse(BaseModel):
     total_count: Optional[int] = Field(default=None, description="Total number of recommendations")
 
 
+class BatchRecommendationRequest(BaseModel):
+    """Request model for batch outfit recommendations"""
+
+    requests: List[Dict[str, Any]] = Field(
+        ...,
+        max_length=1000,
+        description="RecommendationRequest objects, validated individually so one bad item does not fail the batch",
+    )
+
+
+class BatchRecommendationResult(BaseModel):
+    """Outcome of one item in a batch request"""
+
+    index: int = Field(..., description="Position of the item in the request")
+    success: bool
+    recommendations: List[OutfitItem] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model for batch outfit recommendations"""
+
+    success: bool
+    results: List[BatchRecommendationResult]
+    message: str
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
 
     success: bool = False
     message: str
     error: Optional[str] = None
+
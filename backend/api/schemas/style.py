@@ -0,0 +1,19 @@
+"""
+Pydantic schemas for style classification endpoints
+"""
+from pydantic import BaseModel, Field
+from typing import Dict
+
+
+class StyleClassificationRequest(BaseModel):
+    """Request model for style classification"""
+
+    description: str = Field(..., min_length=1, max_length=2000, description="Item or outfit description")
+
+
+class StyleClassificationResponse(BaseModel):
+    """Response model for style classification"""
+
+    style: str
+    confidence: float = Field(..., ge=0.0, le=1.0)
+    scores: Dict[str, float] = Field(default_factory=dict, description="Score per candidate style")
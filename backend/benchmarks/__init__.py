@@ -0,0 +1,7 @@
+"""
+Benchmarks for the recommendation hot path
+Run with ``python -m benchmarks`` from the backend directory
+"""
+from .harness import BenchmarkResult, find_regressions, run_async_benchmark, run_benchmark
+
+__all__ = ["BenchmarkResult", "find_regressions", "run_async_benchmark", "run_benchmark"]
@@ -0,0 +1,89 @@
+"""
+Run the benchmark suite
+
+Usage:
+    python -m benchmarks --sizes 1000,10000,100000 --save baseline.json
+    python -m benchmarks --compare baseline.json --threshold 0.2
+
+Exits with status 1 when ``--compare`` finds a regression past the threshold.
+"""
+import argparse
+import json
+import logging
+import sys
+from dataclasses import asdict
+
+from .harness import find_regressions, format_results, load_baseline, save_baseline
+from .suites import bench_api, bench_model, bench_preprocessing, bench_serialization
+
+SUITES = ("model", "preprocessing", "api", "serialization")
+
+
+def _sizes(value: str):
+    return [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation hot path")
+    parser.add_argument(
+        "--sizes",
+        type=_sizes,
+        default=[1_000, 10_000, 100_000],
+        help="Comma-separated catalog sizes, e.g. 1000,100000,1000000",
+    )
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent API clients")
+    parser.add_argument(
+        "--suites", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}"
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown as a fraction before a run fails (default 0.2)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Catalog publishes log at INFO on every size
+    logging.basicConfig(level=logging.WARNING)
+
+    selected = {name.strip() for name in args.suites.split(",")}
+    unknown = selected - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+
+    results = []
+    if "preprocessing" in selected:
+        results.extend(bench_preprocessing(args.iterations))
+    if "model" in selected:
+        results.extend(bench_model(args.sizes, args.iterations))
+    if "serialization" in selected:
+        results.extend(bench_serialization(args.sizes, args.iterations))
+    if "api" in selected:
+        results.extend(bench_api(args.sizes, args.iterations, args.concurrency))
+
+    if args.json:
+        print(json.dumps([asdict(result) for result in results], indent=2))
+    else:
+        print(format_results(results))
+
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        regressions = find_regressions(results, load_baseline(args.compare), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
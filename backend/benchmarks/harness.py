@@ -0,0 +1,216 @@
+"""
+Benchmark harness
+Times a callable, reports throughput, latency percentiles and peak memory,
+and compares runs against saved JSON baselines
+"""
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements for one benchmark"""
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_bytes: int
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _summarize(
+    name: str,
+    latencies_ns: List[int],
+    elapsed_ns: int,
+    peak_memory: int,
+    params: Optional[Dict[str, Any]],
+) -> BenchmarkResult:
+    latencies_ms = sorted(value / 1e6 for value in latencies_ns)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(latencies_ns),
+        ops_per_sec=round(len(latencies_ns) / (elapsed_ns / 1e9), 2) if elapsed_ns else 0.0,
+        p50_ms=round(percentile(latencies_ms, 0.50), 4),
+        p95_ms=round(percentile(latencies_ms, 0.95), 4),
+        p99_ms=round(percentile(latencies_ms, 0.99), 4),
+        peak_memory_bytes=peak_memory,
+        params=params or {},
+    )
+
+
+def _peak_memory(fn: Callable[[int], Any], iterations: int) -> int:
+    """
+    Peak Python heap allocated while running ``fn``
+
+    Runs separately from the timed loop because tracemalloc slows every
+    allocation down.
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        for index in range(iterations):
+            fn(index)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+
+def run_benchmark(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 3,
+    memory_iterations: int = 3,
+    params: Optional[Dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """
+    Benchmark a synchronous callable
+
+    Args:
+        name: Benchmark name (baseline key)
+        fn: Called with the iteration index
+        iterations: Timed calls
+        warmup: Untimed calls before measuring, with indexes past the timed
+            range so input pools with one entry per iteration stay unseen
+        memory_iterations: Calls made under tracemalloc for peak memory
+        params: Extra metadata stored with the result
+
+    Returns:
+        BenchmarkResult
+    """
+    for index in range(iterations, iterations + warmup):
+        fn(index)
+
+    latencies: List[int] = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for index in range(iterations):
+        call_started = clock()
+        fn(index)
+        latencies.append(clock() - call_started)
+    elapsed = clock() - started
+
+    peak = _peak_memory(fn, memory_iterations)
+    return _summarize(name, latencies, elapsed, peak, params)
+
+
+def run_async_benchmark(
+    name: str,
+    fn: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 3,
+    params: Optional[Dict[str, Any]] = None,
+) -> BenchmarkResult:
+    """
+    Benchmark a coroutine function with a fixed number of concurrent workers
+
+    Latency is measured per call; throughput over the whole run.
+    """
+
+    async def main():
+        for index in range(iterations, iterations + warmup):
+            await fn(index)
+
+        latencies: List[int] = []
+        counter = iter(range(iterations))
+        clock = time.perf_counter_ns
+
+        async def worker():
+            for index in counter:
+                call_started = clock()
+                await fn(index)
+                latencies.append(clock() - call_started)
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = clock()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = clock() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return latencies, elapsed, max(0, peak - baseline)
+
+    latencies, elapsed, peak = asyncio.run(main())
+    return _summarize(name, latencies, elapsed, peak, {"concurrency": concurrency, **(params or {})})
+
+
+def save_baseline(results: List[BenchmarkResult], path: str):
+    """Write results as a JSON baseline"""
+    payload = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payload, handle, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read a JSON baseline, keyed by benchmark name"""
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)["results"]
+
+
+def find_regressions(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+) -> List[str]:
+    """
+    Compare results with a baseline
+
+    A benchmark regresses when its throughput drops, or its p95 latency
+    grows, by more than ``threshold`` (a fraction, e.g. 0.2 for 20%).
+    Benchmarks missing from the baseline are ignored.
+
+    Returns:
+        Human-readable descriptions of each regression
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.ops_per_sec < previous["ops_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:.1f} ops/s vs baseline "
+                f"{previous['ops_per_sec']:.1f} ops/s"
+            )
+        if result.p95_ms > previous["p95_ms"] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: p95 {result.p95_ms:.3f} ms vs baseline {previous['p95_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    """Render results as a fixed-width table"""
+    header = f"{'benchmark':<44} {'ops/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>10}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.name:<44} {result.ops_per_sec:>11.1f} {result.p50_ms:>9.3f} "
+            f"{result.p95_ms:>9.3f} {result.p99_ms:>9.3f} {result.peak_memory_bytes / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+"""
+Benchmark suites for the recommendation hot path
+"""
+import asyncio
+from typing import Callable, Dict, List
+
+from models.catalog import OutfitCatalog
+from models.outfit_model import OutfitRecommendationModel
+from utils.preprocessing import (
+    normalize_color_names,
+    preprocess_occasion,
+    preprocess_user_preferences,
+    preprocess_weather_data,
+)
+
+from .harness import BenchmarkResult, run_async_benchmark, run_benchmark
+from .synthetic import OCCASIONS, generate_catalog, generate_profiles, generate_requests, generate_weather
+
+# Distinct inputs cycled through by each benchmark
+PROFILE_POOL_SIZE = 256
+
+
+def _scaled_iterations(iterations: int, size: int) -> int:
+    """Fewer iterations for very large catalogs so a run stays bounded"""
+    if size >= 500_000:
+        return max(10, iterations // 10)
+    if size >= 100_000:
+        return max(20, iterations // 4)
+    return iterations
+
+
+def bench_model(sizes: List[int], iterations: int) -> List[BenchmarkResult]:
+    """
+    OutfitRecommendationModel.recommend over indexed catalogs of each size
+
+    Inputs are preprocessed up front, matching what the route passes in.
+    """
+    model = OutfitRecommendationModel()
+    profiles = [preprocess_user_preferences(p) for p in generate_profiles(PROFILE_POOL_SIZE)]
+    weather = [preprocess_weather_data(w) for w in generate_weather(PROFILE_POOL_SIZE)]
+    occasions = [OCCASIONS[index % len(OCCASIONS)] for index in range(PROFILE_POOL_SIZE)]
+
+    results = []
+    for size in sizes:
+        catalog = OutfitCatalog(generate_catalog(size))
+
+        def recommend(index: int, catalog=catalog):
+            slot = index % PROFILE_POOL_SIZE
+            model.recommend(profiles[slot], weather[slot], occasions[slot], catalog)
+
+        results.append(
+            run_benchmark(
+                f"model.recommend[{size}]",
+                recommend,
+                _scaled_iterations(iterations, size),
+                params={"catalog_size": size},
+            )
+        )
+    return results
+
+
+def bench_preprocessing(iterations: int) -> List[BenchmarkResult]:
+    """The utils.preprocessing functions the routes call per request"""
+    profiles = generate_profiles(PROFILE_POOL_SIZE)
+    weather = generate_weather(PROFILE_POOL_SIZE)
+    occasions = [OCCASIONS[index % len(OCCASIONS)].title() for index in range(PROFILE_POOL_SIZE)]
+
+    cases: Dict[str, Callable[[int], object]] = {
+        "preprocess_user_preferences": lambda i: preprocess_user_preferences(
+            profiles[i % PROFILE_POOL_SIZE]
+        ),
+        "preprocess_weather_data": lambda i: preprocess_weather_data(weather[i % PROFILE_POOL_SIZE]),
+        "preprocess_occasion": lambda i: preprocess_occasion(occasions[i % PROFILE_POOL_SIZE]),
+        "normalize_color_names": lambda i: normalize_color_names(
+            profiles[i % PROFILE_POOL_SIZE]["colors"]
+        ),
+    }
+    # Cheap functions get more iterations for stable percentiles
+    return [
+        run_benchmark(f"preprocessing.{name}", fn, iterations * 20) for name, fn in cases.items()
+    ]
+
+
+def bench_api(sizes: List[int], iterations: int, concurrency: int) -> List[BenchmarkResult]:
+    """
+    End-to-end POST /api/v1/recommendations through an in-process ASGI client
+
+    Every request in a run is distinct and the response cache is cleared
+    before each size, so this measures the uncached path.
+    """
+    import httpx
+
+    from api.dependencies.catalog import catalog_store
+    from api.main import app
+
+    # ASGITransport opens no sockets, so one client can serve every run
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    results = []
+    for size in sizes:
+        count = _scaled_iterations(iterations, size)
+        payloads = generate_requests(count + 3)
+        # Publishing clears the response cache through its catalog listener
+        catalog_store.publish(OutfitCatalog(generate_catalog(size)))
+
+        async def post(index: int, payloads=payloads):
+            response = await client.post("/api/v1/recommendations", json=payloads[index % len(payloads)])
+            response.raise_for_status()
+
+        results.append(
+            run_async_benchmark(
+                f"api.recommendations[{size}]",
+                post,
+                count,
+                concurrency=concurrency,
+                params={"catalog_size": size},
+            )
+        )
+    asyncio.run(client.aclose())
+    return results
+
+
+def bench_serialization(sizes: List[int], iterations: int) -> List[BenchmarkResult]:
+    """
+    Response serialization of both recommendation endpoints, per catalog size
+
+    ``pydantic`` builds and validates OutfitItem/RecommendationResponse
+    objects and renders them with JSONResponse, as the endpoints did before
+    pre-serialized fragments; ``fragments`` is the splicing path the
+    endpoints use now. Both must produce the same bytes.
+    """
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+
+    from api.dependencies.catalog import catalog_store, prepare_catalog
+    from api.routes.recommendations import _render_recommendations, get_recommendations_by_occasion
+    from api.schemas.recommendation import OutfitItem, RecommendationResponse
+
+    model = OutfitRecommendationModel()
+    profiles = [preprocess_user_preferences(p) for p in generate_profiles(PROFILE_POOL_SIZE)]
+    weather = [preprocess_weather_data(w) for w in generate_weather(PROFILE_POOL_SIZE)]
+    occasions = [OCCASIONS[index % len(OCCASIONS)] for index in range(PROFILE_POOL_SIZE)]
+    response_adapter = TypeAdapter(RecommendationResponse)
+    loop = asyncio.new_event_loop()
+
+    def recommendations_pydantic(outfits, occasion) -> bytes:
+        response = RecommendationResponse(
+            success=True,
+            recommendations=[OutfitItem(**{**outfit, "occasion": occasion}) for outfit in outfits],
+            message="Recommendations generated successfully",
+        )
+        # What FastAPI does with a response_model: validate, dump, render
+        content = response_adapter.dump_python(response_adapter.validate_python(response), mode="json")
+        return JSONResponse(content).body
+
+    def occasion_pydantic(catalog, occasion) -> bytes:
+        slots = catalog.occasion_slots(occasion) or catalog.occasion_slots("casual")
+        recommendations = [
+            OutfitItem(**{**outfit.copy(), "style": outfit["style"], "occasion": occasion})
+            for outfit in catalog.outfits_for(slots)
+        ]
+        content = {
+            "success": True,
+            "occasion": occasion,
+            "style": None,
+            "colors": None,
+            "recommendations": [rec.model_dump() for rec in recommendations],
+            "message": f"Found {len(recommendations)} recommendations for {occasion}",
+        }
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def occasion_fragments(occasion) -> bytes:
+        response = loop.run_until_complete(
+            get_recommendations_by_occasion(occasion, None, None, False, None, None)
+        )
+        return response.body
+
+    results = []
+    for size in sizes:
+        catalog = OutfitCatalog(generate_catalog(size))
+        prepare_catalog(catalog)
+        catalog_store.publish(catalog)
+        scored = [
+            model.recommend(profiles[slot], weather[slot], occasions[slot], catalog)
+            for slot in range(PROFILE_POOL_SIZE)
+        ]
+        for slot in range(len(OCCASIONS)):
+            expected = recommendations_pydantic(scored[slot], occasions[slot])
+            if _render_recommendations(scored[slot], occasions[slot]).body != expected:
+                raise AssertionError(f"Fragment rendering differs from pydantic at size {size}")
+            if occasion_fragments(occasions[slot]) != occasion_pydantic(catalog, occasions[slot]):
+                raise AssertionError(f"Occasion rendering differs from pydantic at size {size}")
+
+        count = _scaled_iterations(iterations, size)
+        cases: Dict[str, Callable[[int], object]] = {
+            f"serialization.recommendations.pydantic[{size}]": lambda i, scored=scored: (
+                recommendations_pydantic(scored[i % PROFILE_POOL_SIZE], occasions[i % PROFILE_POOL_SIZE])
+            ),
+            f"serialization.recommendations.fragments[{size}]": lambda i, scored=scored: (
+                _render_recommendations(scored[i % PROFILE_POOL_SIZE], occasions[i % PROFILE_POOL_SIZE])
+            ),
+            f"serialization.occasion.pydantic[{size}]": lambda i, catalog=catalog: (
+                occasion_pydantic(catalog, OCCASIONS[i % len(OCCASIONS)])
+            ),
+            f"serialization.occasion.fragments[{size}]": lambda i: (
+                occasion_fragments(OCCASIONS[i % len(OCCASIONS)])
+            ),
+        }
+        for name, fn in cases.items():
+            # Occasion responses list about an eighth of the catalog each
+            calls = count if ".recommendations." in name else max(3, count // 10)
+            results.append(run_benchmark(name, fn, calls, params={"catalog_size": size}))
+    loop.close()
+    return results
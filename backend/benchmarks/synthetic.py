@@ -0,0 +1,133 @@
+"""
+Synthetic data for benchmarks
+Deterministic (seeded) outfit catalogs, preference profiles and weather
+"""
+import random
+from typing import Any, Dict, List
+
+STYLES = [
+    "Casual",
+    "Smart Casual",
+    "Formal",
+    "Business",
+    "Business Casual",
+    "Sporty",
+    "Party",
+    "Outdoor",
+    "Layered",
+    "Trendy",
+]
+COLORS = [
+    "White",
+    "Black",
+    "Navy",
+    "Gray",
+    "Blue",
+    "Light Blue",
+    "Beige",
+    "Khaki",
+    "Brown",
+    "Olive",
+    "Green",
+    "Red",
+    "Burgundy",
+    "Charcoal",
+    "Silver",
+    "Indigo",
+    "Pink",
+    "Yellow",
+]
+OCCASIONS = ["casual", "formal", "business", "party", "sports", "outdoor", "date", "wedding"]
+ITEMS = [
+    "T-shirt",
+    "Jeans",
+    "Sneakers",
+    "Blazer",
+    "Chinos",
+    "Loafers",
+    "Dress Shirt",
+    "Suit Jacket",
+    "Hoodie",
+    "Joggers",
+    "Boots",
+    "Watch",
+]
+CONDITIONS = ["clear sky", "few clouds", "light rain", "snow", "mist", "thunderstorm"]
+
+
+def generate_catalog(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate an outfit catalog
+
+    Args:
+        size: Number of outfits
+        seed: Random seed
+
+    Returns:
+        List of outfit dicts in catalog format
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"synthetic_{index}",
+            "name": f"Synthetic Outfit {index}",
+            "description": "Generated for benchmarking",
+            "items": rng.sample(ITEMS, rng.randint(2, 5)),
+            "colors": rng.sample(COLORS, rng.randint(1, 4)),
+            "style": rng.choice(STYLES),
+            "occasion": rng.choice(OCCASIONS),
+            "confidence_score": round(rng.uniform(0.5, 0.97), 2),
+        }
+        for index in range(size)
+    ]
+
+
+def generate_profiles(count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """
+    Generate user preference profiles (raw, as a client would send them)
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "styles": rng.sample(STYLES, rng.randint(1, 3)),
+            "colors": rng.sample(COLORS, rng.randint(1, 4)),
+            "avoid_colors": rng.sample(COLORS, rng.randint(0, 2)),
+        }
+        for _ in range(count)
+    ]
+
+
+def generate_weather(count: int, seed: int = 2) -> List[Dict[str, Any]]:
+    """
+    Generate weather observations
+
+    Temperatures follow a normal distribution around a temperate mean so
+    every weather category is exercised, with mild weather most common.
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "temperature": round(rng.gauss(18, 9), 1),
+            "condition": rng.choice(CONDITIONS),
+            "humidity": round(rng.uniform(20, 95)),
+            "wind_speed": round(rng.uniform(0, 40), 1),
+        }
+        for _ in range(count)
+    ]
+
+
+def generate_requests(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    """
+    Generate RecommendationRequest payloads
+    """
+    rng = random.Random(seed)
+    profiles = generate_profiles(count, seed)
+    weather = generate_weather(count, seed + 1)
+    return [
+        {
+            "user_preferences": profile,
+            "weather": observation,
+            "occasion": rng.choice(OCCASIONS),
+        }
+        for profile, observation in zip(profiles, weather)
+    ]
@@ -14,6 +14,112 @@ class Settings(BaseSettings):
     weather_api_key: Optional[str] = None
     api_version: str = "v1"
 
+    # Server-side weather lookups for requests that send a location
+    weather_api_url: str = "https://api.openweathermap.org/data/2.5/weather"
+    weather_cache_ttl: float = 600.0  # time bucket length in seconds
+    weather_stale_ttl: float = 3600.0  # max age served when the upstream fails
+    weather_cache_precision: int = 2  # decimal places of lat/lon in the cache key
+    weather_timeout: float = 3.0
+    weather_max_connections: int = 20
+
+    # Outfit catalog, loaded from model_path at startup
+    catalog_file: str = "catalog.json"
+    catalog_watch_interval: float = 5.0  # seconds between file checks, 0 disables
+    admin_token: Optional[str] = None
+
+    # Startup runs in the background; /health/ready answers 503 until the
+    # catalog is loaded and warm-up requests have gone through every route
+    startup_background: bool = True
+    warmup_requests: int = 10  # recommendation requests per warm-up round, 0 disables
+    # A failed load or warm-up is retried with doubling waits; after the last
+    # attempt the worker stops so its supervisor restarts it
+    startup_attempts: int = 5
+    startup_retry_seconds: float = 1.0
+
+    # ANN candidate retrieval for large catalogs: the index is saved in
+    # model_path and rebuilt when the catalog contents change
+    ann_enabled: bool = True
+    ann_min_catalog_size: int = 50000  # smaller catalogs are scored exhaustively
+    ann_index_file: str = "ann_index.npz"
+    ann_candidates: int = 300  # rows re-ranked by the rule-based scorer
+    ann_nprobe: int = 32  # most index cells read per request
+
+    # Materialized recommendation tables: per (weather category, style)
+    # bucket, the best rows before color scoring, rebuilt on catalog changes
+    recommendation_tables_enabled: bool = True
+    recommendation_table_depth: int = 256  # rows kept per bucket
+
+    # Where recommendation scoring runs: "thread" or "process" pools keep
+    # it off the event loop, "inline" scores on the loop
+    scoring_pool: str = "thread"
+    scoring_workers: int = 0  # 0 = one per CPU
+    scoring_shard_min_size: int = 200000  # catalogs this large are split into shards
+    scoring_shards: int = 0  # shards per request, 0 = one per worker
+
+    # Response cache for POST /recommendations
+    recommendation_cache_size: int = 1024
+    recommendation_cache_ttl: float = 300.0
+    # Identical requests arriving while one is being scored wait for its result
+    recommendation_coalescing: bool = True
+
+    # Server-side user profiles that requests can reference by profile_id,
+    # written behind to a SQLite file in a data directory of their own, like
+    # feedback_dir, so model_path can stay read-only ("" keeps them in memory)
+    profile_store_file: str = "./profiles/profiles.sqlite3"
+    profile_flush_interval: float = 1.0  # seconds between writes to the file
+
+    # Feedback events from POST /feedback: buffered in memory, then written in
+    # batches to a segmented append-only log in feedback_dir ("" keeps only
+    # the in-memory counters)
+    feedback_dir: str = "./feedback"
+    feedback_buffer_size: int = 65536  # events held before submissions get 503
+    feedback_batch_size: int = 4096  # events per log write (and fsync)
+    feedback_flush_interval: float = 0.2
+    feedback_segment_bytes: int = 16 * 1024 * 1024
+    feedback_fsync: bool = True
+    feedback_compact_interval: float = 300.0  # seconds, 0 disables compaction
+
+    # Sampled capture of normalized recommendation requests for offline
+    # replay with scripts/replay.py ("" disables capture)
+    request_capture_file: str = ""
+    request_capture_sample_rate: float = 0.01
+    request_capture_buffer_size: int = 10000  # requests held between writes
+    request_capture_max_bytes: int = 64 * 1024 * 1024  # capture stops at this file size
+    request_capture_flush_interval: float = 1.0
+
+    # Admission control for the scoring routes: at most
+    # admission_max_concurrency run at once and admission_max_queue wait;
+    # requests that cannot finish before their X-Deadline-Ms (or the
+    # default deadline) are refused with 503. While admission_degrade_queue_depth
+    # requests wait, recommendations are served from the cache or the
+    # materialized tables only (0 disables degraded mode)
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 64
+    admission_max_queue: int = 512
+    admission_degrade_queue_depth: int = 128
+    admission_default_deadline_ms: float = 0  # 0: no deadline without the header
+
+    # Non-streamed POST /recommendations/occasion responses, rendered once
+    # per query and catalog with an ETag; gzip and brotli (when installed)
+    # variants are compressed on first use and kept with the entry
+    occasion_cache_size: int = 512
+    occasion_cache_ttl: float = 3600.0  # the cache is also dropped on catalog changes
+    response_compression_min_bytes: int = 1024
+    response_gzip_level: int = 6  # level 9 costs several times the CPU for a few % smaller bodies
+    response_brotli_quality: int = 5
+
+    # Pre-serialized outfit JSON that responses are spliced from; this many
+    # outfits per catalog are serialized at load, the rest on first use
+    response_fragment_cache_size: int = 100000
+
+    # Micro-batching in front of the style classifier: a batch runs once it
+    # holds max_size items or its first item has waited max_wait_ms
+    style_batch_max_size: int = 32
+    style_batch_max_wait_ms: float = 5.0
+
+    # Request counters and stage latency histograms served at /metrics
+    metrics_enabled: bool = True
+
     class Config:
         env_file = ".env"
 
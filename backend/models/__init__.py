@@ -1,6 +1,36 @@
 """
 ML Models package
+
+Exports are imported on first access, so importing one module of the
+package (a scoring worker, a script) does not load all the others.
 """
-from .outfit_model import OutfitRecommendationModel
+from typing import TYPE_CHECKING
+
+from utils.lazy import lazy_exports
+
+_EXPORTS = {
+    "OutfitRecommendationModel": ".outfit_model",
+    "OutfitCatalog": ".catalog",
+    "IVFIndex": ".ann",
+    "RecommendationTables": ".tables",
+    "ColorMatcher": ".color_matcher",
+    "CatalogStore": ".catalog_store",
+    "OutfitRecord": ".catalog_store",
+    "MappedCatalog": ".columnar",
+    "write_columnar_catalog": ".columnar",
+    "ScoringPool": ".scoring_pool",
+}
+
+if TYPE_CHECKING:
+    from .outfit_model import OutfitRecommendationModel
+    from .catalog import OutfitCatalog
+    from .ann import IVFIndex
+    from .tables import RecommendationTables
+    from .color_matcher import ColorMatcher
+    from .catalog_store import CatalogStore, OutfitRecord
+    from .columnar import MappedCatalog, write_columnar_catalog
+    from .scoring_pool import ScoringPool
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
-__all__ = ["OutfitRecommendationModel"]
+__all__ = list(_EXPORTS)
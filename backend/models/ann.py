@@ -0,0 +1,614 @@
+"""
+Approximate nearest-neighbour candidate retrieval
+Outfits are embedded into fixed-length vectors whose inner product with a
+request's query vector equals the linear part of the rule-based score; an
+IVF (inverted file) index over k-means cells of those vectors narrows a
+request down to a few hundred candidates that the exact scorer re-ranks
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import OutfitCatalog, WEATHER_APPROPRIATE_STYLES
+from .scoring import (
+    AVOID_COLOR_PENALTY,
+    COLOR_MATCH_BOOST,
+    STYLE_BOOST,
+    CatalogMatrix,
+    top_k_indices,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+# Hashed dimensions for item names and the occasion tag
+ITEM_DIMS = 16
+OCCASION_DIMS = 8
+# Scale of the item/occasion dimensions relative to the scored ones; they
+# only shape the clustering (the query gives them zero weight)
+CONTENT_WEIGHT = 0.02
+# Extra weight of the base score when clustering: cells then also split by
+# base score, which tightens their score bounds
+CLUSTER_BASE_WEIGHT = 4.0
+# Rows encoded per chunk while clustering and assigning
+_CHUNK_ROWS = 65536
+# Arrays stored in a saved index
+_ARRAYS = ("centroids", "bounds", "list_offsets", "list_rows", "weather_bits")
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str, dims: int) -> int:
+    return zlib.crc32(token.lower().encode("utf-8")) % dims
+
+
+def catalog_signature(matrix: CatalogMatrix) -> str:
+    """
+    Fingerprint of the encoded columns an index was built from
+
+    Two catalogs with the same signature score identically row for row, so
+    an index saved for one is valid for the other.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([matrix._style_names, sorted(matrix.color_vocab.items())]).encode("utf-8"))
+    for column in (matrix.style_codes, matrix.base_scores, matrix.color_masks, matrix.live):
+        digest.update(np.ascontiguousarray(column).tobytes())
+    return digest.hexdigest()
+
+
+def scored_dims(matrix: CatalogMatrix) -> int:
+    """Length of the part of a vector that the rule-based score depends on"""
+    return 1 + len(matrix._style_names) + len(matrix.color_vocab)
+
+
+def vector_dims(matrix: CatalogMatrix) -> int:
+    """Length of an outfit vector for this catalog"""
+    return scored_dims(matrix) + ITEM_DIMS + OCCASION_DIMS
+
+
+def encode_outfits(matrix: CatalogMatrix, rows: np.ndarray, content: bool = False) -> np.ndarray:
+    """
+    Embed catalog rows as fixed-length vectors
+
+    Layout: [base score, STYLE_BOOST x style one-hot, COLOR_MATCH_BOOST x
+    color multi-hot] followed, when ``content`` is set, by hashed item and
+    occasion dimensions. The first part is scaled so that the inner product
+    with encode_query() is the unclipped rule-based score.
+
+    Args:
+        matrix: Encoded catalog
+        rows: Rows to embed
+        content: Include the item and occasion dimensions
+
+    Returns:
+        (len(rows), dims) float32 array
+    """
+    styles = len(matrix._style_names)
+    width = vector_dims(matrix) if content else scored_dims(matrix)
+    vectors = np.zeros((len(rows), width), dtype=np.float32)
+    vectors[:, 0] = matrix.base_scores[rows]
+    if styles:
+        vectors[np.arange(len(rows)), 1 + matrix.style_codes[rows]] = STYLE_BOOST
+    if matrix.color_vocab:
+        vectors[:, 1 + styles : scored_dims(matrix)] = matrix.color_membership(rows) * COLOR_MATCH_BOOST
+    if content:
+        _encode_content(matrix, rows, vectors[:, scored_dims(matrix) :])
+    return vectors
+
+
+def _encode_content(matrix: CatalogMatrix, rows: np.ndarray, out: np.ndarray):
+    """Hashed item and occasion dimensions, written into ``out``"""
+    columns = getattr(matrix, "content_columns", None)
+    if columns is not None:
+        # Memory-mapped catalogs: hash each vocabulary entry once and gather
+        item_codes, item_offsets, item_names, occasion_codes, occasions = columns()
+        item_buckets = np.array([_bucket(name, ITEM_DIMS) for name in item_names], dtype=np.intp)
+        occasion_buckets = np.array(
+            [ITEM_DIMS + _bucket(name, OCCASION_DIMS) for name in occasions] + [-1], dtype=np.intp
+        )
+        starts, ends = item_offsets[rows], item_offsets[rows + 1]
+        counts = (ends - starts).astype(np.intp)
+        owners = np.repeat(np.arange(len(rows)), counts)
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        if owners.size:
+            np.add.at(out, (owners, item_buckets[item_codes[positions]]), CONTENT_WEIGHT)
+        occasion = occasion_buckets[occasion_codes[rows]]
+        tagged = occasion >= 0
+        out[np.flatnonzero(tagged), occasion[tagged]] = CONTENT_WEIGHT
+        return
+
+    outfits = matrix.outfits
+    for position, row in enumerate(rows.tolist()):
+        outfit = outfits[row]
+        if outfit is None:
+            continue
+        for item in outfit.get("items") or ():
+            out[position, _bucket(item, ITEM_DIMS)] += CONTENT_WEIGHT
+        occasion = outfit.get("occasion") or ""
+        if occasion:
+            out[position, ITEM_DIMS + _bucket(occasion, OCCASION_DIMS)] = CONTENT_WEIGHT
+
+
+def encode_query(
+    matrix: CatalogMatrix,
+    user_styles: List[str],
+    user_colors: List[str],
+    avoid_colors: Optional[List[str]] = None,
+) -> np.ndarray:
+    """
+    Query vector for a preference profile
+
+    Its inner product with an encode_outfits() vector is base score +
+    style boost + color boosts - avoid penalties, before clipping.
+
+    Returns:
+        (vector_dims(matrix),) float32 array
+    """
+    styles = len(matrix._style_names)
+    query = np.zeros(vector_dims(matrix), dtype=np.float32)
+    query[0] = 1.0
+    query[1 + np.flatnonzero(matrix.style_matches(user_styles or []))] = 1.0
+    for color in user_colors or []:
+        code = matrix.color_code(color)
+        if code is not None:
+            query[1 + styles + code] += 1.0
+    for color in avoid_colors or []:
+        code = matrix.color_code(color)
+        if code is not None:
+            query[1 + styles + code] -= AVOID_COLOR_PENALTY / COLOR_MATCH_BOOST
+    return query
+
+
+def _cluster_vectors(matrix: CatalogMatrix, rows: np.ndarray) -> np.ndarray:
+    """Vectors in the space the cells are clustered in"""
+    vectors = encode_outfits(matrix, rows, content=True)
+    vectors[:, 0] *= CLUSTER_BASE_WEIGHT
+    return vectors
+
+
+def _kmeans(
+    matrix: CatalogMatrix, rows: np.ndarray, n_lists: int, iterations: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Lloyd's k-means on the given rows, returning (n_lists, dims) centroids"""
+    points = _cluster_vectors(matrix, rows)
+    centroids = points[rng.choice(len(points), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(points, centroids)
+        counts = np.bincount(assignment, minlength=n_lists)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+        # Re-seed empty cells from random points
+        empty = np.flatnonzero(~filled)
+        if empty.size:
+            centroids[empty] = points[rng.choice(len(points), empty.size, replace=False)]
+    return centroids
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (squared L2) for each point"""
+    return np.argmax(points @ centroids.T - 0.5 * np.einsum("ij,ij->i", centroids, centroids), axis=1)
+
+
+class IVFIndex:
+    """
+    Inverted-file index over k-means cells of the outfit vectors
+
+    Each cell keeps the per-dimension minimum and maximum of its vectors,
+    which bound the score any of its outfits can reach for a query. A
+    search visits cells from the highest bound down, scoring their rows with
+    the vector inner product plus any non-linear score term the caller
+    supplies (palette harmony), and stops once it holds ``candidates`` rows
+    and the weakest of them beats the next cell's bound (the candidate set
+    is then exact for the full score, as long as the caller's bound on its
+    extra term holds) or ``nprobe`` cells have been read.
+    Weather suitability is stored as one bit per category per row, so the
+    search also replaces the weather filter.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        bounds: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        weather_bits: np.ndarray,
+        weather_categories: List[str],
+        signature: str,
+        size: int,
+        candidates: int = 300,
+        nprobe: int = 32,
+    ):
+        """
+        Args:
+            centroids: (n_lists, dims) cell centroids, in the clustering space
+            bounds: (2, n_lists, scored dims) per-cell minimum and maximum vectors
+            list_offsets: (n_lists + 1,) start of each cell in list_rows
+            list_rows: Catalog rows grouped by cell, ascending within a cell
+            weather_bits: uint8 per row, bit i set if weather_categories[i] suits it
+            weather_categories: Weather category per bit
+            signature: catalog_signature() of the indexed catalog
+            size: Row count of the indexed catalog
+            candidates: Rows returned per search
+            nprobe: Most cells read per search once enough candidates are found
+        """
+        self.centroids = centroids
+        self.bounds = bounds
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.weather_bits = weather_bits
+        self.weather_categories = list(weather_categories)
+        self.weather_counts = {
+            category: int(np.count_nonzero(weather_bits & np.uint8(1 << bit)))
+            for bit, category in enumerate(self.weather_categories)
+        }
+        self.signature = signature
+        self.size = size
+        self.candidates = candidates
+        self.nprobe = nprobe
+        # Version of the catalog object the index was attached to; an
+        # in-place change makes the index stale
+        self.catalog_version = 0
+        self.build_seconds = 0.0
+        self.searches = 0
+        self.cells_read = 0
+        self.rows_scanned = 0
+        self.exact_searches = 0
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        matrix: CatalogMatrix,
+        weather_rules: Optional[Dict[str, List[str]]] = None,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 65536,
+        seed: int = 0,
+        candidates: int = 300,
+        nprobe: int = 32,
+    ) -> "IVFIndex":
+        """
+        Cluster the catalog and build the inverted lists
+
+        Args:
+            matrix: Encoded catalog
+            weather_rules: Weather category -> appropriate style keywords
+            n_lists: Number of cells; defaults to sqrt(rows) / 2, within [8, 1024]
+            iterations: k-means iterations
+            sample_size: Rows the centroids are trained on
+            seed: Random seed (builds are deterministic)
+            candidates: Rows returned per search
+            nprobe: Most cells read per search once enough candidates are found
+        """
+        started = time.perf_counter()
+        rules = weather_rules or WEATHER_APPROPRIATE_STYLES
+        live = matrix.live_rows()
+        if n_lists is None:
+            n_lists = int(np.clip(np.sqrt(live.size) / 2, 8, 1024))
+        n_lists = max(1, min(n_lists, live.size))
+
+        rng = np.random.default_rng(seed)
+        sample = live if live.size <= sample_size else np.sort(rng.choice(live, sample_size, replace=False))
+        centroids = _kmeans(matrix, sample, n_lists, iterations, rng)
+
+        assignment = np.empty(live.size, dtype=np.intp)
+        for start in range(0, live.size, _CHUNK_ROWS):
+            chunk = live[start : start + _CHUNK_ROWS]
+            assignment[start : start + chunk.size] = _nearest(
+                _cluster_vectors(matrix, chunk), centroids
+            )
+        # Stable sort keeps rows ascending within each cell
+        order = np.argsort(assignment, kind="stable")
+        list_rows = live[order].astype(np.int64)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+
+        width = scored_dims(matrix)
+        bounds = np.zeros((2, n_lists, width), dtype=np.float32)
+        for cell in range(n_lists):
+            rows = list_rows[list_offsets[cell] : list_offsets[cell + 1]]
+            if rows.size:
+                vectors = encode_outfits(matrix, rows)
+                bounds[0, cell] = vectors.min(axis=0)
+                bounds[1, cell] = vectors.max(axis=0)
+
+        weather_bits = np.zeros(len(matrix), dtype=np.uint8)
+        for bit, keywords in enumerate(rules.values()):
+            weather_bits |= matrix.style_contains(keywords).astype(np.uint8) << np.uint8(bit)
+
+        index = cls(
+            centroids,
+            bounds,
+            list_offsets,
+            list_rows,
+            weather_bits,
+            list(rules),
+            catalog_signature(matrix),
+            len(matrix),
+            candidates,
+            nprobe,
+        )
+        index.build_seconds = time.perf_counter() - started
+        return index
+
+    def _weather_bit(self, weather_category: Optional[str]) -> Optional[np.uint8]:
+        """Bit to filter on, or None when the category matches nothing (use every row)"""
+        if not weather_category or not self.weather_counts.get(weather_category):
+            return None
+        return np.uint8(1 << self.weather_categories.index(weather_category))
+
+    def upper_bounds(self, query: np.ndarray, extra_bound: float = 0.0) -> np.ndarray:
+        """
+        Highest clipped score any outfit in each cell can reach
+
+        Args:
+            query: encode_query() vector
+            extra_bound: Largest value the score's non-linear term can add
+        """
+        scored = query[: self.bounds.shape[2]]
+        bound = self.bounds[1] @ np.maximum(scored, 0.0) + self.bounds[0] @ np.minimum(scored, 0.0)
+        return np.clip(bound + extra_bound, 0.0, 1.0)
+
+    def search(
+        self,
+        matrix: CatalogMatrix,
+        query: np.ndarray,
+        weather_category: Optional[str] = None,
+        candidates: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        extra: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        extra_bound: float = 0.0,
+    ) -> np.ndarray:
+        """
+        Approximate best rows for a query
+
+        Args:
+            matrix: The indexed catalog's encoding
+            query: encode_query() vector
+            weather_category: Only return rows suited to this category
+            candidates: Rows to return (defaults to self.candidates)
+            nprobe: Cell cap (defaults to self.nprobe)
+            extra: Returns the non-linear score term of the given rows
+                (e.g. palette harmony), added before clipping
+            extra_bound: Largest value ``extra`` returns; added to every
+                cell's bound so the early stop stays exact
+
+        Returns:
+            Up to ``candidates`` catalog rows, ascending
+        """
+        candidates = candidates or self.candidates
+        nprobe = nprobe or self.nprobe
+        bit = self._weather_bit(weather_category)
+        scored = query[: scored_dims(matrix)]
+
+        bounds = self.upper_bounds(query, extra_bound)
+        cells = np.argsort(-bounds, kind="stable")
+        row_chunks: List[np.ndarray] = []
+        score_chunks: List[np.ndarray] = []
+        found = 0
+        threshold = -1.0
+        exact = True
+        for position, cell in enumerate(cells.tolist()):
+            if found >= candidates:
+                if threshold >= bounds[cell]:
+                    break
+                if position >= nprobe:
+                    exact = False
+                    break
+            rows = self.list_rows[self.list_offsets[cell] : self.list_offsets[cell + 1]]
+            if bit is not None:
+                rows = rows[(self.weather_bits[rows] & bit) != 0]
+            if not rows.size:
+                continue
+            # Clipped like the exact score, so ties at the top keep row order
+            scores = encode_outfits(matrix, rows) @ scored
+            if extra is not None:
+                scores = scores + extra(rows)
+            row_chunks.append(rows)
+            score_chunks.append(np.clip(scores, 0.0, 1.0))
+            found += rows.size
+            if found >= candidates:
+                threshold = float(np.partition(np.concatenate(score_chunks), found - candidates)[found - candidates])
+
+        self.searches += 1
+        self.cells_read += position + 1 if cells.size else 0
+        self.rows_scanned += found
+        self.exact_searches += exact
+        if not row_chunks:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(row_chunks)
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        if rows.size <= candidates:
+            return rows
+        approx = np.concatenate(score_chunks)[order]
+        return np.sort(rows[top_k_indices(approx, candidates)])
+
+    def matches(self, matrix: CatalogMatrix, version: int = 0) -> bool:
+        """Whether the index still describes this catalog"""
+        return len(matrix) == self.size and version == self.catalog_version
+
+    def save(self, path: str):
+        """Write the index to an .npz file (atomically, via a temporary file)"""
+        meta = {
+            "format": INDEX_FORMAT,
+            "signature": self.signature,
+            "size": self.size,
+            "weather_categories": self.weather_categories,
+        }
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as handle:
+            np.savez(
+                handle,
+                meta=np.array(json.dumps(meta)),
+                centroids=self.centroids,
+                bounds=self.bounds,
+                list_offsets=self.list_offsets,
+                list_rows=self.list_rows,
+                weather_bits=self.weather_bits,
+            )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        matrix: CatalogMatrix,
+        weather_rules: Optional[Dict[str, List[str]]] = None,
+        candidates: int = 300,
+        nprobe: int = 32,
+    ) -> Optional["IVFIndex"]:
+        """
+        Read a saved index if it was built for this catalog
+
+        Returns:
+            The index, or None when the file is missing, unreadable or was
+            built from different catalog contents or weather rules
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                arrays = {name: data[name] for name in _ARRAYS}
+        except (OSError, ValueError, KeyError):
+            return None
+        rules = weather_rules or WEATHER_APPROPRIATE_STYLES
+        if (
+            meta.get("format") != INDEX_FORMAT
+            or meta.get("size") != len(matrix)
+            or meta.get("weather_categories") != list(rules)
+            or arrays["centroids"].shape[1] != vector_dims(matrix)
+            or meta.get("signature") != catalog_signature(matrix)
+        ):
+            return None
+        return cls(
+            arrays["centroids"],
+            arrays["bounds"],
+            arrays["list_offsets"],
+            arrays["list_rows"],
+            arrays["weather_bits"],
+            meta["weather_categories"],
+            meta["signature"],
+            meta["size"],
+            candidates,
+            nprobe,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Index shape and search counters"""
+        return {
+            "lists": self.n_lists,
+            "rows": self.size,
+            "candidates": self.candidates,
+            "nprobe": self.nprobe,
+            "build_seconds": round(self.build_seconds, 3),
+            "searches": self.searches,
+            "exact_searches": self.exact_searches,
+            "mean_cells_read": round(self.cells_read / self.searches, 1) if self.searches else 0.0,
+            "mean_rows_scanned": round(self.rows_scanned / self.searches, 1) if self.searches else 0.0,
+            "bytes": int(sum(getattr(self, name).nbytes for name in _ARRAYS)),
+        }
+
+
+def attach_index(
+    catalog,
+    path: str,
+    min_size: int = 50000,
+    candidates: int = 300,
+    nprobe: int = 32,
+    n_lists: Optional[int] = None,
+) -> Optional[IVFIndex]:
+    """
+    Load or build the ANN index for a catalog and attach it as ``catalog.ann_index``
+
+    A saved index at ``path`` is reused when it matches the catalog;
+    otherwise a new one is built and saved there. Catalogs smaller than
+    ``min_size`` are scored exhaustively and get no index.
+
+    Args:
+        catalog: OutfitCatalog or MappedCatalog
+        path: Index file
+        min_size: Smallest catalog that gets an index
+        candidates: Rows returned per search
+        nprobe: Most cells read per search once enough candidates are found
+        n_lists: Number of cells for a new index (default: automatic)
+
+    Returns:
+        The attached index, or None
+    """
+    matrix = catalog.matrix if isinstance(catalog, OutfitCatalog) else catalog
+    if len(matrix) < min_size:
+        return None
+    rules = getattr(catalog, "weather_rules", None)
+    index = IVFIndex.load(path, matrix, rules, candidates, nprobe)
+    if index is None:
+        index = IVFIndex.build(matrix, rules, n_lists=n_lists, candidates=candidates, nprobe=nprobe)
+        logger.info("Built ANN index with %d lists in %.2fs", index.n_lists, index.build_seconds)
+        try:
+            index.save(path)
+        except OSError:
+            logger.exception("Could not save ANN index to %s", path)
+    index.catalog_version = getattr(catalog, "version", 0)
+    catalog.ann_index = index
+    return index
+
+
+def measure_recall(
+    model,
+    outfit_database,
+    requests: Sequence[Tuple[Dict[str, Any], Dict[str, Any], str]],
+    k: int = 5,
+) -> Dict[str, Any]:
+    """
+    Compare index-backed recommendations with exhaustive scoring
+
+    Args:
+        model: OutfitRecommendationModel
+        outfit_database: Catalog with an attached index
+        requests: (user_preferences, weather_data, occasion) tuples, preprocessed
+        k: Recommendations compared per request
+
+    Returns:
+        Dict with 'recall' (share of the exhaustive top-k ids also returned
+        via the index), 'tie_aware_recall' (share of ranks where both lists
+        have the same score; exhaustive scoring breaks ties by catalog
+        position, so outfits tied with the exhaustive pick count as found)
+        and the mean latency of each path in milliseconds
+    """
+    id_hits = score_hits = 0
+    approximate_seconds = exhaustive_seconds = 0.0
+    for user_preferences, weather_data, occasion in requests:
+        started = time.perf_counter()
+        approximate = model.recommend(user_preferences, weather_data, occasion, outfit_database)[:k]
+        approximate_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        exact = model.recommend(user_preferences, weather_data, occasion, outfit_database, use_index=False)[:k]
+        exhaustive_seconds += time.perf_counter() - started
+
+        id_hits += len({outfit["id"] for outfit in approximate} & {outfit["id"] for outfit in exact})
+        score_hits += sum(
+            a["confidence_score"] == e["confidence_score"] for a, e in zip(approximate, exact)
+        )
+
+    total = max(1, len(requests) * k)
+    count = max(1, len(requests))
+    return {
+        "queries": len(requests),
+        "k": k,
+        "recall": round(id_hits / total, 4),
+        "tie_aware_recall": round(score_hits / total, 4),
+        "approximate_ms": round(approximate_seconds / count * 1000, 3),
+        "exhaustive_ms": round(exhaustive_seconds / count * 1000, 3),
+    }
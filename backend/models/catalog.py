@@ -0,0 +1,289 @@
+"""
+Indexed outfit catalog
+Builds inverted indexes (weather category, style, color and occasion ->
+outfit slots)
+once at load time so filtering becomes bitmap intersections
+"""
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .scoring import CatalogMatrix
+
+# Styles considered appropriate for each weather category
+WEATHER_APPROPRIATE_STYLES = {
+    "very_cold": ["layered", "formal", "business"],
+    "cold": ["business", "formal", "casual"],
+    "mild": ["casual", "business", "smart casual"],
+    "warm": ["casual", "smart casual", "party"],
+    "hot": ["casual", "sporty", "outdoor"],
+}
+
+
+def bitmap_to_rows(bitmap: int, size: int) -> np.ndarray:
+    """
+    Convert an integer bitmap (bit i set = slot i) into sorted row indices
+    """
+    if not bitmap:
+        return np.empty(0, dtype=np.intp)
+    raw = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:size])
+
+
+def mask_to_bitmap(mask: np.ndarray) -> int:
+    """
+    Pack a boolean row mask into an integer bitmap
+    """
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def rows_to_bitmap(rows: List[int], size: int) -> int:
+    """
+    Pack row indices into an integer bitmap
+    """
+    mask = np.zeros(size, dtype=bool)
+    mask[rows] = True
+    return mask_to_bitmap(mask)
+
+
+class OutfitCatalog:
+    """
+    Outfit catalog with inverted indexes
+
+    Every outfit occupies a slot; the indexes map keys to integer bitmaps of
+    slots. Removed slots are recycled by later adds, and the columnar
+    CatalogMatrix used for scoring is kept in step row for row, so neither
+    the indexes nor the encoding are rebuilt on incremental changes.
+    """
+
+    def __init__(
+        self,
+        outfits: Iterable[Dict[str, Any]] = (),
+        weather_rules: Optional[Dict[str, List[str]]] = None,
+    ):
+        """
+        Build the catalog and its indexes
+
+        Args:
+            outfits: Outfit dicts; each must carry a unique 'id'
+            weather_rules: Weather category -> appropriate style keywords
+        """
+        self.weather_rules = weather_rules or WEATHER_APPROPRIATE_STYLES
+        self.version = 0
+        self._free_slots: List[int] = []
+        self._listeners: List[Callable[["OutfitCatalog"], None]] = []
+
+        started = time.perf_counter()
+        self._bulk_load(outfits)
+        self.build_seconds = time.perf_counter() - started
+
+    def add_listener(self, callback: Callable[["OutfitCatalog"], None]):
+        """
+        Register a callback invoked with the catalog after every change
+
+        Used by caches that hold results derived from the catalog.
+        """
+        self._listeners.append(callback)
+
+    def _changed(self):
+        self.version += 1
+        for callback in self._listeners:
+            callback(self)
+
+    def reload(self, outfits: Iterable[Dict[str, Any]]):
+        """Replace the whole catalog, rebuilding every index"""
+        started = time.perf_counter()
+        self._free_slots = []
+        self._bulk_load(outfits)
+        self.build_seconds = time.perf_counter() - started
+        self._changed()
+
+    def _bulk_load(self, outfits: Iterable[Dict[str, Any]]):
+        """
+        Build every index in one pass
+
+        The indexes are derived from the encoded matrix columns (one vector
+        scan per distinct style, color and weather category) and packed into
+        bitmaps once, which avoids re-copying ever-growing integers per add.
+        """
+        by_id = {outfit["id"]: outfit for outfit in outfits}
+        self.matrix = matrix = CatalogMatrix(list(by_id.values()))
+        self._slot_by_id: Dict[str, int] = {outfit_id: slot for slot, outfit_id in enumerate(by_id)}
+        self._style_categories: Dict[str, List[str]] = {}
+
+        self.style_index: Dict[str, int] = {
+            style: mask_to_bitmap(matrix.style_codes == code)
+            for style, code in matrix.style_vocab.items()
+        }
+        self.color_index: Dict[str, int] = {
+            color: mask_to_bitmap(matrix.color_hits([color]) > 0) for color in matrix.color_vocab
+        }
+        self.weather_index: Dict[str, int] = {
+            category: mask_to_bitmap(matrix.style_contains(keywords))
+            for category, keywords in self.weather_rules.items()
+        }
+        occasion_rows: Dict[str, List[int]] = {}
+        for slot, outfit in enumerate(matrix.outfits):
+            occasion = outfit.get("occasion")
+            if occasion:
+                occasion_rows.setdefault(occasion.lower(), []).append(slot)
+        self.occasion_index: Dict[str, int] = {
+            occasion: rows_to_bitmap(slots, len(matrix)) for occasion, slots in occasion_rows.items()
+        }
+        self._live = (1 << len(matrix)) - 1
+
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+
+    def __contains__(self, outfit_id: str) -> bool:
+        return outfit_id in self._slot_by_id
+
+    def __iter__(self):
+        return (self.matrix.outfits[slot] for slot in self._slot_by_id.values())
+
+    def get(self, outfit_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an outfit by id"""
+        slot = self._slot_by_id.get(outfit_id)
+        return None if slot is None else self.matrix.outfits[slot]
+
+    def _weather_categories(self, style: str) -> List[str]:
+        categories = self._style_categories.get(style)
+        if categories is None:
+            categories = self._style_categories[style] = [
+                category
+                for category, keywords in self.weather_rules.items()
+                if any(keyword in style for keyword in keywords)
+            ]
+        return categories
+
+    def _index_keys(self, outfit: Dict[str, Any]):
+        style = outfit.get("style", "").lower()
+        colors = {color.lower() for color in outfit.get("colors", [])}
+        occasion = (outfit.get("occasion") or "").lower()
+        return style, colors, self._weather_categories(style), occasion
+
+    def add(self, outfit: Dict[str, Any]) -> int:
+        """
+        Add an outfit (or replace the one with the same id)
+
+        Returns:
+            Slot the outfit was stored in
+        """
+        outfit_id = outfit["id"]
+        if outfit_id in self._slot_by_id:
+            self.remove(outfit_id)
+
+        slot = self._free_slots.pop() if self._free_slots else len(self.matrix)
+        bit = 1 << slot
+        style, colors, categories, occasion = self._index_keys(outfit)
+
+        self.style_index[style] = self.style_index.get(style, 0) | bit
+        if occasion:
+            self.occasion_index[occasion] = self.occasion_index.get(occasion, 0) | bit
+        for color in colors:
+            self.color_index[color] = self.color_index.get(color, 0) | bit
+        for category in categories:
+            self.weather_index[category] |= bit
+
+        self.matrix.set_row(slot, outfit)
+        self._slot_by_id[outfit_id] = slot
+        self._live |= bit
+        self._changed()
+        return slot
+
+    def remove(self, outfit_id: str) -> bool:
+        """
+        Remove an outfit by id
+
+        Returns:
+            True if the outfit was present
+        """
+        slot = self._slot_by_id.pop(outfit_id, None)
+        if slot is None:
+            return False
+
+        mask = ~(1 << slot)
+        style, colors, categories, occasion = self._index_keys(self.matrix.outfits[slot])
+        self.style_index[style] &= mask
+        if not self.style_index[style]:
+            del self.style_index[style]
+        if occasion:
+            self.occasion_index[occasion] &= mask
+            if not self.occasion_index[occasion]:
+                del self.occasion_index[occasion]
+        for color in colors:
+            self.color_index[color] &= mask
+            if not self.color_index[color]:
+                del self.color_index[color]
+        for category in categories:
+            self.weather_index[category] &= mask
+
+        self.matrix.clear_row(slot)
+        self._free_slots.append(slot)
+        self._live &= mask
+        self._changed()
+        return True
+
+    @property
+    def all_slots(self) -> int:
+        """Bitmap of every occupied slot"""
+        return self._live
+
+    def weather_slots(self, weather_category: str) -> int:
+        """Bitmap of weather-appropriate outfits (every outfit if the category is unknown)"""
+        if weather_category not in self.weather_index:
+            return self._live
+        return self.weather_index[weather_category]
+
+    def style_slots(self, styles: Iterable[str]) -> int:
+        """Bitmap of outfits whose style contains any of the given styles"""
+        tokens = [style.lower() for style in styles]
+        bitmap = 0
+        for style, slots in self.style_index.items():
+            if any(token in style for token in tokens):
+                bitmap |= slots
+        return bitmap
+
+    def color_slots(self, colors: Iterable[str]) -> int:
+        """Bitmap of outfits containing any of the given colors"""
+        bitmap = 0
+        for color in colors:
+            bitmap |= self.color_index.get(color.lower(), 0)
+        return bitmap
+
+    def occasion_slots(self, occasion: str) -> int:
+        """Bitmap of outfits tagged with the given occasion"""
+        return self.occasion_index.get(occasion.lower(), 0)
+
+    def rows(self, bitmap: int) -> np.ndarray:
+        """Matrix rows for a slot bitmap"""
+        return bitmap_to_rows(bitmap, len(self.matrix))
+
+    def outfits_for(self, bitmap: int) -> List[Dict[str, Any]]:
+        """Outfits for a slot bitmap, in slot order"""
+        outfits = self.matrix.outfits
+        return [outfits[row] for row in self.rows(bitmap).tolist()]
+
+    def memory_size(self) -> int:
+        """Approximate bytes held by the indexes and encoded columns"""
+        size = self.matrix.nbytes() + sys.getsizeof(self._slot_by_id)
+        size += sys.getsizeof(self._live) + sys.getsizeof(self._free_slots)
+        for index in (self.weather_index, self.style_index, self.color_index, self.occasion_index):
+            size += sys.getsizeof(index)
+            size += sum(sys.getsizeof(key) + sys.getsizeof(bitmap) for key, bitmap in index.items())
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        """Index statistics"""
+        return {
+            "outfits": len(self),
+            "slots": len(self.matrix),
+            "styles": len(self.style_index),
+            "colors": len(self.color_index),
+            "occasions": len(self.occasion_index),
+            "version": self.version,
+            "build_seconds": round(self.build_seconds, 6),
+            "memory_bytes": self.memory_size(),
+        }
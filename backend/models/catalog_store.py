@@ -0,0 +1,293 @@
+"""
+Outfit catalog store
+Loads the outfit catalog once from a file into immutable records and swaps
+in new versions atomically on reload
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .catalog import OutfitCatalog
+from .columnar import COLUMNAR_SUFFIX, MappedCatalog
+
+logger = logging.getLogger(__name__)
+
+# Separator for list-valued columns (items, colors) in CSV catalogs
+CSV_LIST_SEPARATOR = "|"
+
+
+@dataclass(frozen=True, slots=True)
+class OutfitRecord:
+    """
+    Immutable catalog outfit
+
+    Supports the read-only mapping calls (``get``, ``[]``, ``copy``) that
+    the scoring code uses on outfit dicts, so records can be scored directly.
+    """
+
+    id: str
+    name: str
+    description: str
+    items: Tuple[str, ...]
+    colors: Tuple[str, ...]
+    style: str
+    occasion: str = ""
+    confidence_score: float = 0.5
+    image_url: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OutfitRecord":
+        """Build a record from a raw catalog row"""
+        return cls(
+            id=str(data["id"]),
+            name=data["name"],
+            description=data.get("description") or "",
+            items=tuple(data.get("items") or ()),
+            colors=tuple(data.get("colors") or ()),
+            style=data.get("style") or "",
+            occasion=data.get("occasion") or "",
+            confidence_score=float(data.get("confidence_score", 0.5)),
+            image_url=data.get("image_url") or None,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def keys(self) -> Tuple[str, ...]:
+        return _RECORD_FIELDS
+
+    def copy(self) -> Dict[str, Any]:
+        """Mutable dict copy with list-valued items and colors"""
+        data = {name: getattr(self, name) for name in _RECORD_FIELDS}
+        data["items"] = list(self.items)
+        data["colors"] = list(self.colors)
+        return data
+
+
+_RECORD_FIELDS = tuple(field.name for field in fields(OutfitRecord))
+
+
+def _read_json(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return data["outfits"] if isinstance(data, dict) else data
+
+
+def _read_csv(path: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    for row in rows:
+        for column in ("items", "colors"):
+            value = row.get(column) or ""
+            row[column] = [part.strip() for part in value.split(CSV_LIST_SEPARATOR) if part.strip()]
+    return rows
+
+
+def _read_parquet(path: str) -> List[Dict[str, Any]]:
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise RuntimeError("Parquet catalogs require pandas and pyarrow") from e
+    rows = pd.read_parquet(path).to_dict("records")
+    for row in rows:
+        for column in ("items", "colors"):
+            if column in row and row[column] is not None:
+                row[column] = list(row[column])
+    return rows
+
+
+CATALOG_READERS: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {
+    ".json": _read_json,
+    ".csv": _read_csv,
+    ".parquet": _read_parquet,
+}
+
+
+def load_catalog_file(path: str) -> List[OutfitRecord]:
+    """
+    Read a catalog file into records
+
+    Args:
+        path: .json (list or {"outfits": [...]}), .csv or .parquet file
+
+    Returns:
+        List of OutfitRecord
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    reader = CATALOG_READERS.get(suffix)
+    if reader is None:
+        raise ValueError(f"Unsupported catalog format: {suffix or path}")
+    return [OutfitRecord.from_dict(row) for row in reader(path)]
+
+
+class CatalogStore:
+    """
+    Holds the current OutfitCatalog and replaces it atomically
+
+    A reload builds a complete new catalog off to the side and publishes it
+    with a single reference swap, so a request that read ``store.catalog``
+    keeps a consistent snapshot for its whole lifetime.
+    """
+
+    def __init__(self, path: str, prepare: Optional[Callable[[OutfitCatalog], None]] = None):
+        """
+        Args:
+            path: Catalog file (JSON, CSV, Parquet or columnar .ogcat)
+            prepare: Called with each newly loaded catalog before it is
+                published, in the loading thread (e.g. to attach an index)
+        """
+        self.path = path
+        self.prepare = prepare
+        self.catalog = OutfitCatalog()
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._listeners: List[Callable[[OutfitCatalog], None]] = []
+
+    def add_listener(self, callback: Callable[[OutfitCatalog], None]):
+        """
+        Register a callback invoked with the catalog after every reload or
+        in-place change of the current catalog
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, catalog: OutfitCatalog):
+        for callback in self._listeners:
+            callback(catalog)
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _build(self) -> Tuple[OutfitCatalog, Optional[Tuple[int, int]], float]:
+        """
+        Read the file and index it, without publishing
+
+        Columnar (.ogcat) files are memory-mapped instead of parsed, so every
+        worker process shares one copy of the catalog through the page cache.
+        """
+        started = time.perf_counter()
+        signature = self._signature()
+        if self.path.endswith(COLUMNAR_SUFFIX):
+            catalog = MappedCatalog.open(self.path)
+        else:
+            catalog = OutfitCatalog(load_catalog_file(self.path))
+        if self.prepare is not None:
+            self.prepare(catalog)
+        return catalog, signature, time.perf_counter() - started
+
+    def _publish(
+        self, catalog: OutfitCatalog, signature: Optional[Tuple[int, int]], seconds: float
+    ) -> OutfitCatalog:
+        catalog.add_listener(self._notify)
+        self.catalog = catalog
+        self._file_signature = signature
+        self.version += 1
+        self.loaded_at = time.time()
+        self.load_seconds = seconds
+        logger.info("Loaded %d outfits from %s", len(catalog), self.path)
+        self._notify(catalog)
+        return catalog
+
+    def publish(self, catalog: OutfitCatalog) -> OutfitCatalog:
+        """Publish an in-memory catalog (benchmarks, warm-up, tests)"""
+        return self._publish(catalog, None, 0.0)
+
+    def load(self) -> OutfitCatalog:
+        """
+        Load the catalog file and publish it
+
+        Returns:
+            The newly published catalog
+        """
+        return self._publish(*self._build())
+
+    def changed(self) -> bool:
+        """Whether the file's mtime or size differs from the last load"""
+        signature = self._signature()
+        return signature is not None and signature != self._file_signature
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload when the file changed since the last load
+
+        Returns:
+            True if a reload happened
+        """
+        if not self.changed():
+            return False
+        self.load()
+        return True
+
+    async def reload(self) -> OutfitCatalog:
+        """
+        Load the catalog without blocking the event loop
+
+        Parsing and indexing run in a worker thread; the new catalog is
+        published from the event loop.
+        """
+        return self._publish(*await asyncio.to_thread(self._build))
+
+    async def watch(self, interval: float):
+        """
+        Poll the catalog file and reload on change until cancelled
+
+        A failed reload keeps serving the previous catalog.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if not self.changed():
+                continue
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Catalog reload from %s failed", self.path)
+
+    def fingerprint(self) -> str:
+        """
+        Identity of the published catalog that every worker process agrees on
+
+        The file's mtime and size for catalogs loaded from the file, the
+        load counter for catalogs published from memory. In-place changes
+        are tracked separately by ``catalog.version``.
+        """
+        if self._file_signature is None:
+            return f"v{self.version}"
+        mtime_ns, size = self._file_signature
+        return f"{mtime_ns}-{size}"
+
+    def __iter__(self) -> Iterator[OutfitRecord]:
+        return iter(self.catalog)
+
+    def info(self) -> Dict[str, Any]:
+        """Store metadata and index statistics"""
+        ann_index = getattr(self.catalog, "ann_index", None)
+        tables = getattr(self.catalog, "recommendation_tables", None)
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 6),
+            "prepare_seconds": {
+                step: round(seconds, 6)
+                for step, seconds in getattr(self.catalog, "prepare_seconds", {}).items()
+            },
+            "catalog": self.catalog.stats(),
+            "ann_index": ann_index.stats() if ann_index is not None else None,
+            "recommendation_tables": tables.stats() if tables is not None else None,
+        }
@@ -1,16 +1,163 @@
 """
 Color matching logic for outfit coordination
+Pairwise harmony between canonical colors is precomputed once into a dense
+matrix, so scoring palettes against user colors is array lookups
 """
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Hue angle (degrees) of each chromatic color in the canonical vocabulary
+COLOR_HUES = {
+    "red": 0,
+    "coral": 16,
+    "orange": 30,
+    "gold": 45,
+    "yellow": 55,
+    "olive": 65,
+    "green": 120,
+    "mint": 150,
+    "turquoise": 175,
+    "teal": 180,
+    "blue": 220,
+    "indigo": 260,
+    "lavender": 270,
+    "purple": 280,
+    "pink": 330,
+    "burgundy": 345,
+    "maroon": 350,
+}
+
+# Colors that pair with anything
+NEUTRAL_COLORS = (
+    "black",
+    "white",
+    "gray",
+    "charcoal",
+    "silver",
+    "beige",
+    "cream",
+    "tan",
+    "khaki",
+    "brown",
+    "navy",
+)
+
+HARMONY_VOCABULARY = tuple(COLOR_HUES) + NEUTRAL_COLORS
+HARMONY_INDEX = {color: index for index, color in enumerate(HARMONY_VOCABULARY)}
+
+# Compatibility of each relation, 0 (clash) to 1 (same color)
+RELATION_SCORES = {
+    "same": 1.0,
+    "complementary": 0.9,
+    "analogous": 0.85,
+    "neutral": 0.8,
+    "triadic": 0.7,
+    "clash": 0.2,
+}
+
+# Relation preferences by style; unlisted relations keep weight 1.0
+STYLE_RELATION_BIAS = {
+    "formal": {"neutral": 1.15, "complementary": 0.85, "triadic": 0.8},
+    "business": {"neutral": 1.15, "complementary": 0.85, "triadic": 0.8},
+    "party": {"complementary": 1.1, "triadic": 1.1},
+    "sporty": {"complementary": 1.1, "triadic": 1.05},
+    "trendy": {"complementary": 1.1, "triadic": 1.1},
+}
+
+
+def color_relation(first: str, second: str) -> str:
+    """
+    Harmony relation between two canonical colors
+
+    Args:
+        first: Color in HARMONY_VOCABULARY
+        second: Color in HARMONY_VOCABULARY
+
+    Returns:
+        One of the RELATION_SCORES keys
+    """
+    if first == second:
+        return "same"
+    if first not in COLOR_HUES or second not in COLOR_HUES:
+        return "neutral"
+    distance = abs(COLOR_HUES[first] - COLOR_HUES[second]) % 360
+    distance = min(distance, 360 - distance)
+    if distance <= 40:
+        return "analogous"
+    if distance >= 150:
+        return "complementary"
+    if 105 <= distance <= 135:
+        return "triadic"
+    return "clash"
+
+
+def build_harmony_matrix() -> np.ndarray:
+    """
+    Dense harmony scores over HARMONY_VOCABULARY
+
+    Returns:
+        Read-only (n, n) float64 array, symmetric
+    """
+    size = len(HARMONY_VOCABULARY)
+    matrix = np.empty((size, size), dtype=np.float64)
+    for i, first in enumerate(HARMONY_VOCABULARY):
+        for j, second in enumerate(HARMONY_VOCABULARY):
+            matrix[i, j] = RELATION_SCORES[color_relation(first, second)]
+    matrix.setflags(write=False)
+    return matrix
+
+
+HARMONY_MATRIX = build_harmony_matrix()
+
+
+@lru_cache(maxsize=4096)
+def harmony_index(color: str) -> Optional[int]:
+    """
+    Position of a color in HARMONY_VOCABULARY
+
+    Modified names resolve to their base color ("light blue" -> blue,
+    "navy blue" -> navy); unknown colors return None.
+    """
+    name = color.lower().strip().replace("grey", "gray")
+    if name in HARMONY_INDEX:
+        return HARMONY_INDEX[name]
+    words = name.replace("-", " ").split()
+    for word in words:
+        if word in NEUTRAL_COLORS:
+            return HARMONY_INDEX[word]
+    for word in reversed(words):
+        if word in HARMONY_INDEX:
+            return HARMONY_INDEX[word]
+    return None
+
 
 class ColorMatcher:
     """
     Handles color matching and coordination
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, harmony_matrix: np.ndarray = HARMONY_MATRIX):
+        """
+        Args:
+            harmony_matrix: Pairwise scores over HARMONY_VOCABULARY
+        """
+        self.harmony_matrix = harmony_matrix
+
+    def color_affinity(self, colors: List[str]) -> Optional[np.ndarray]:
+        """
+        Mean harmony of every vocabulary color with the given colors
+
+        Returns:
+            (len(HARMONY_VOCABULARY),) array, or None if no color is known
+        """
+        indices = [index for index in map(harmony_index, colors) if index is not None]
+        if not indices:
+            return None
+        return self.harmony_matrix[:, indices].mean(axis=1)
 
-    def match_colors(self, primary_colors, style_preference):
+    def match_colors(self, primary_colors: List[str], style_preference: str = "") -> List[Dict[str, Any]]:
         """
         Match complementary colors based on preferences
 
@@ -19,7 +166,88 @@ class ColorMatcher:
             style_preference: User's style preference
 
         Returns:
-            List of matching color combinations
+            List of matching color combinations, best first, as dicts with
+            'colors', 'harmony' and 'relation' (relation to the first
+            chromatic primary color, else the first primary)
+        """
+        affinity = self.color_affinity(primary_colors)
+        if affinity is None:
+            return []
+
+        primaries = [index for index in map(harmony_index, primary_colors) if index is not None]
+        bias = STYLE_RELATION_BIAS.get((style_preference or "").lower(), {})
+        chromatic = [index for index in primaries if HARMONY_VOCABULARY[index] in COLOR_HUES]
+        anchor = HARMONY_VOCABULARY[(chromatic or primaries)[0]]
+
+        combinations = []
+        for index, color in enumerate(HARMONY_VOCABULARY):
+            if index in primaries:
+                continue
+            relation = color_relation(anchor, color)
+            harmony = min(1.0, float(affinity[index]) * bias.get(relation, 1.0))
+            combinations.append(
+                {
+                    "colors": list(primary_colors) + [color],
+                    "harmony": round(harmony, 3),
+                    "relation": relation,
+                }
+            )
+        combinations.sort(key=lambda combination: combination["harmony"], reverse=True)
+        return combinations
+
+    def palette_harmonies(self, matrix, user_colors: List[str]) -> Optional[np.ndarray]:
+        """
+        Harmony of each distinct palette of a catalog with the user's colors
+
+        Each palette scores the mean affinity of its known colors.
+
+        Args:
+            matrix: CatalogMatrix
+            user_colors: Preferred colors
+
+        Returns:
+            Array with one value in [0, 1] per palette of
+            ``matrix.palettes()``, or None when none of the user colors is known
+        """
+        affinity = self.color_affinity(user_colors)
+        if affinity is None:
+            return None
+
+        _, membership = matrix.palettes()
+        codes = np.fromiter(
+            (
+                -1 if (index := harmony_index(color)) is None else index
+                for color in matrix.color_vocab
+            ),
+            dtype=np.intp,
+            count=len(matrix.color_vocab),
+        )
+        known = codes >= 0
+        per_color = np.where(known, affinity[codes], 0.0)
+        counts = membership @ known.astype(np.float64)
+        totals = membership @ per_color
+        return np.divide(totals, counts, out=np.zeros_like(totals), where=counts > 0)
+
+    def palette_harmony(
+        self, matrix, user_colors: List[str], rows: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Harmony of every outfit palette in a catalog with the user's colors
+
+        The work is done once per distinct palette (palette_harmonies) and
+        then gathered per row.
+
+        Args:
+            matrix: CatalogMatrix
+            user_colors: Preferred colors
+            rows: Only these rows (the result is aligned with them)
+
+        Returns:
+            Array with one value in [0, 1] per catalog row (or per given
+            row), or None when none of the user colors is known
         """
-        # TODO: Implement color matching algorithm
-        pass
+        per_palette = self.palette_harmonies(matrix, user_colors)
+        if per_palette is None:
+            return None
+        palette_ids, _ = matrix.palettes()
+        return per_palette[palette_ids if rows is None else palette_ids[rows]]
@@ -0,0 +1,357 @@
+"""
+Memory-mapped columnar catalog format
+A binary, read-only catalog layout that worker processes map with mmap, so
+all workers share the same pages through the OS page cache and opening a
+catalog does no per-outfit parsing
+
+File layout (all integers little-endian):
+    8 bytes   magic b"OGCAT1\\n\\0"
+    8 bytes   header length (uint64)
+    header    UTF-8 JSON: row count, small vocabularies and a column table
+              {name: {"dtype", "shape", "offset"}}
+    columns   raw arrays, each starting on a 64-byte boundary
+
+Columns:
+    base_scores      float64 [rows]           confidence_score
+    style_codes      int32   [rows]           index into header "styles"
+    occasion_codes   int32   [rows]           index into header "occasions", -1 if none
+    color_masks      uint64  [rows, words]    bit per header "mask_colors" entry
+    color_codes      int32   [n], color_offsets int64 [rows + 1]
+                     per-outfit color lists, indexes into header "colors"
+    item_codes       int32   [n], item_offsets  int64 [rows + 1]
+                     per-outfit item lists, indexes into the item_name strings
+    <text>_data      uint8 UTF-8 bytes, <text>_offsets int64 [count + 1]
+                     string columns: id, name, description, image_url and the
+                     item_name vocabulary
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .catalog import mask_to_bitmap, bitmap_to_rows
+from .scoring import CatalogMatrix, DEFAULT_CONFIDENCE
+
+MAGIC = b"OGCAT1\n\0"
+COLUMNAR_SUFFIX = ".ogcat"
+_ALIGNMENT = 64
+_WORD_BITS = 64
+_TEXT_COLUMNS = ("id", "name", "description", "image_url")
+
+
+def _string_table(values: Iterable[str]):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _list_column(lists: List[List[int]]):
+    offsets = np.zeros(len(lists) + 1, dtype="<i8")
+    offsets[1:] = np.cumsum([len(values) for values in lists])
+    codes = np.fromiter((code for values in lists for code in values), dtype="<i4", count=int(offsets[-1]))
+    return codes, offsets
+
+
+def write_columnar_catalog(outfits: Sequence[Dict[str, Any]], path: str):
+    """
+    Write outfits in the columnar format
+
+    The file is written next to ``path`` and renamed into place, so readers
+    that already mapped the previous version keep a valid mapping.
+
+    Args:
+        outfits: Outfit dicts (or OutfitRecords)
+        path: Destination file
+    """
+    styles: Dict[str, int] = {}
+    occasions: Dict[str, int] = {}
+    colors: Dict[str, int] = {}
+    mask_colors: Dict[str, int] = {}
+    items: Dict[str, int] = {}
+
+    rows = len(outfits)
+    base_scores = np.empty(rows, dtype="<f8")
+    style_codes = np.empty(rows, dtype="<i4")
+    occasion_codes = np.empty(rows, dtype="<i4")
+    color_lists: List[List[int]] = []
+    item_lists: List[List[int]] = []
+    mask_bits: List[List[int]] = []
+
+    for row, outfit in enumerate(outfits):
+        base_scores[row] = outfit.get("confidence_score", DEFAULT_CONFIDENCE)
+        style_codes[row] = styles.setdefault(outfit.get("style", ""), len(styles))
+        occasion = outfit.get("occasion") or ""
+        occasion_codes[row] = occasions.setdefault(occasion.lower(), len(occasions)) if occasion else -1
+        outfit_colors = list(outfit.get("colors", []))
+        color_lists.append([colors.setdefault(color, len(colors)) for color in outfit_colors])
+        mask_bits.append(
+            [mask_colors.setdefault(color.lower(), len(mask_colors)) for color in outfit_colors]
+        )
+        item_lists.append([items.setdefault(item, len(items)) for item in outfit.get("items", [])])
+
+    words = max(1, -(-len(mask_colors) // _WORD_BITS))
+    color_masks = np.zeros((rows, words), dtype="<u8")
+    for row, bits in enumerate(mask_bits):
+        for bit in bits:
+            color_masks[row, bit // _WORD_BITS] |= np.uint64(1 << (bit % _WORD_BITS))
+
+    columns: Dict[str, np.ndarray] = {
+        "base_scores": base_scores,
+        "style_codes": style_codes,
+        "occasion_codes": occasion_codes,
+        "color_masks": color_masks,
+    }
+    columns["color_codes"], columns["color_offsets"] = _list_column(color_lists)
+    columns["item_codes"], columns["item_offsets"] = _list_column(item_lists)
+    columns["item_name_data"], columns["item_name_offsets"] = _string_table(items)
+    for name in _TEXT_COLUMNS:
+        values = [str(outfit.get(name) or "") for outfit in outfits]
+        columns[f"{name}_data"], columns[f"{name}_offsets"] = _string_table(values)
+
+    layout: Dict[str, Dict[str, Any]] = {}
+    header = {
+        "rows": rows,
+        "styles": list(styles),
+        "occasions": list(occasions),
+        "colors": list(colors),
+        "mask_colors": list(mask_colors),
+        "columns": layout,
+    }
+
+    # Column offsets depend on the header size, which depends on the offsets;
+    # reserve generously and pad the header to a fixed size
+    def encode_header(start: int) -> bytes:
+        offset = start
+        for name, array in columns.items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += array.nbytes
+        return json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    header_bytes = encode_header(0)
+    start = -(-(len(MAGIC) + 8 + len(header_bytes) + 1024) // _ALIGNMENT) * _ALIGNMENT
+    header_bytes = encode_header(start)
+    padding = start - len(MAGIC) - 8 - len(header_bytes)
+    if padding < 0:
+        raise ValueError("Columnar catalog header overflowed its reserved space")
+    header_bytes += b" " * padding
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(struct.pack("<Q", len(header_bytes)))
+        handle.write(header_bytes)
+        for name, array in columns.items():
+            handle.seek(layout[name]["offset"])
+            handle.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temp_path, path)
+
+
+class _StringColumn:
+    """Lazily decoded UTF-8 strings addressed by offset"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self._data[self._offsets[index] : self._offsets[index + 1]].tobytes().decode("utf-8")
+
+
+class _MappedRows:
+    """Sequence view that materializes outfit dicts from the columns on access"""
+
+    def __init__(self, count: int):
+        self._count = count
+        self._decode = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        return self._decode(row)
+
+    def __iter__(self):
+        return (self._decode(row) for row in range(self._count))
+
+
+class MappedCatalog(CatalogMatrix):
+    """
+    Read-only catalog backed by a memory-mapped columnar file
+
+    Scoring columns are NumPy views straight onto the mapping, so they cost
+    no resident memory until touched and are shared between processes. It
+    offers the read side of the OutfitCatalog interface used by the routes.
+    """
+
+    @classmethod
+    def open(cls, path: str) -> "MappedCatalog":
+        """
+        Map a columnar catalog file
+
+        Args:
+            path: File written by write_columnar_catalog
+        """
+        with open(path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            stat = os.fstat(handle.fileno())
+        if buffer[: len(MAGIC)] != MAGIC:
+            buffer.close()
+            raise ValueError(f"Not a columnar catalog: {path}")
+        (header_length,) = struct.unpack_from("<Q", buffer, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(buffer[start : start + header_length]))
+
+        arrays = {}
+        for name, spec in header["columns"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=spec["offset"]
+            ).reshape(spec["shape"])
+
+        rows = _MappedRows(int(header["rows"]))
+        catalog = cls.from_columns(
+            rows,
+            [style.lower() for style in header["styles"]],
+            {color: bit for bit, color in enumerate(header["mask_colors"])},
+            arrays["style_codes"],
+            arrays["base_scores"],
+            arrays["color_masks"],
+        )
+        catalog.path = path
+        # Identifies the mapped file even after ``path`` is replaced
+        catalog.file_id = (stat.st_dev, stat.st_ino)
+        catalog.row_count = int(header["rows"])
+        catalog.header = header
+        catalog.version = 0
+        catalog.build_seconds = 0.0
+        catalog._buffer = buffer
+        catalog._columns = arrays
+        catalog._text = {
+            name: _StringColumn(arrays[f"{name}_data"], arrays[f"{name}_offsets"])
+            for name in _TEXT_COLUMNS
+        }
+        catalog._item_names = _StringColumn(arrays["item_name_data"], arrays["item_name_offsets"])
+        catalog._occasion_bitmaps: Dict[str, int] = {}
+        catalog._color_bitmaps: Dict[str, int] = {}
+        catalog._slot_by_id: Optional[Dict[str, int]] = None
+        rows._decode = catalog.row
+        return catalog
+
+    def close(self):
+        """Release the mapping (views must no longer be used)"""
+        self._buffer.close()
+
+    def row(self, row: int) -> Dict[str, Any]:
+        """Decode one outfit"""
+        columns = self._columns
+        colors = self.header["colors"]
+        color_start, color_end = columns["color_offsets"][row : row + 2]
+        item_start, item_end = columns["item_offsets"][row : row + 2]
+        occasion_code = int(columns["occasion_codes"][row])
+        return {
+            "id": self._text["id"][row],
+            "name": self._text["name"][row],
+            "description": self._text["description"][row],
+            "items": [self._item_names[code] for code in columns["item_codes"][item_start:item_end].tolist()],
+            "colors": [colors[code] for code in columns["color_codes"][color_start:color_end].tolist()],
+            "style": self.header["styles"][int(self._style_codes[row])],
+            "occasion": self.header["occasions"][occasion_code] if occasion_code >= 0 else "",
+            "confidence_score": float(self._base_scores[row]),
+            "image_url": self._text["image_url"][row] or None,
+        }
+
+    def content_columns(self):
+        """
+        Item and occasion columns without decoding rows
+
+        Returns:
+            (item_codes, item_offsets, item names, occasion_codes, occasion names)
+        """
+        columns = self._columns
+        return (
+            columns["item_codes"],
+            columns["item_offsets"],
+            [self._item_names[code] for code in range(len(self._item_names))],
+            columns["occasion_codes"],
+            list(self.header["occasions"]),
+        )
+
+    # Read side of the OutfitCatalog interface
+
+    def __iter__(self):
+        return iter(self.outfits)
+
+    def __contains__(self, outfit_id: str) -> bool:
+        return self.get(outfit_id) is not None
+
+    def get(self, outfit_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an outfit by id (the id index is built on first use)"""
+        if self._slot_by_id is None:
+            ids = self._text["id"]
+            self._slot_by_id = {ids[row]: row for row in range(self.row_count)}
+        row = self._slot_by_id.get(outfit_id)
+        return None if row is None else self.row(row)
+
+    def add_listener(self, callback):
+        """Mapped catalogs are immutable; reloads replace the whole mapping"""
+
+    @property
+    def all_slots(self) -> int:
+        return (1 << self.row_count) - 1
+
+    def occasion_slots(self, occasion: str) -> int:
+        """Bitmap of outfits tagged with the given occasion (cached per occasion)"""
+        key = occasion.lower()
+        bitmap = self._occasion_bitmaps.get(key)
+        if bitmap is None:
+            try:
+                code = self.header["occasions"].index(key)
+            except ValueError:
+                return 0
+            bitmap = mask_to_bitmap(self._columns["occasion_codes"] == code)
+            self._occasion_bitmaps[key] = bitmap
+        return bitmap
+
+    def color_slots(self, colors: Iterable[str]) -> int:
+        """Bitmap of outfits containing any of the given colors (cached per color)"""
+        bitmap = 0
+        for color in colors:
+            key = color.lower()
+            slots = self._color_bitmaps.get(key)
+            if slots is None:
+                bit = self.color_vocab.get(key)
+                if bit is None:
+                    continue
+                word = self._columns["color_masks"][:, bit // _WORD_BITS]
+                slots = mask_to_bitmap((word & np.uint64(1 << (bit % _WORD_BITS))) != 0)
+                self._color_bitmaps[key] = slots
+            bitmap |= slots
+        return bitmap
+
+    def rows(self, bitmap: int) -> np.ndarray:
+        return bitmap_to_rows(bitmap, self.row_count)
+
+    def outfits_for(self, bitmap: int) -> List[Dict[str, Any]]:
+        return [self.row(row) for row in self.rows(bitmap).tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "outfits": self.row_count,
+            "styles": len(self.header["styles"]),
+            "colors": len(self.header["mask_colors"]),
+            "occasions": len(self.header["occasions"]),
+            "version": self.version,
+            "mapped_bytes": len(self._buffer),
+            "format": "columnar-mmap",
+        }
+
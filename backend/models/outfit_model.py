@@ -3,8 +3,19 @@ ML model for outfit recommendations
 Currently uses rule-based logic with mock data
 Future: Replace with actual ML model
 """
-from typing import List, Dict, Any
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 import random
+import time
+
+import numpy as np
+
+from .catalog import OutfitCatalog, WEATHER_APPROPRIATE_STYLES
+from .color_matcher import ColorMatcher
+from .scoring import DEFAULT_WEIGHTS, CatalogMatrix, Ranking, ScoringWeights, top_k_indices
+from .tables import RecommendationTables, style_tokens
+
+# CatalogMatrix includes memory-mapped columnar catalogs (models.columnar.MappedCatalog)
+OutfitSource = Union[List[Dict[str, Any]], OutfitCatalog, CatalogMatrix]
 
 
 class OutfitRecommendationModel:
@@ -13,12 +24,25 @@ class OutfitRecommendationModel:
     Currently uses mock data and rule-based logic
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        weights: ScoringWeights = DEFAULT_WEIGHTS,
+        temperature_thresholds: Optional[Dict[str, float]] = None,
+        version: str = "1.0.0",
+    ):
         """
         Initialize the model
         In production, this would load pre-trained weights
+
+        Args:
+            weights: Score adjustments
+            temperature_thresholds: Overrides of the upper temperature bound
+                of each weather category
+            version: Version reported by get_model_info
         """
         self.model_loaded = True
+        self.version = version
+        self.weights = weights
         self.temperature_thresholds = {
             "very_cold": 5,
             "cold": 15,
@@ -26,6 +50,76 @@ class OutfitRecommendationModel:
             "warm": 25,
             "hot": 30,
         }
+        self.temperature_thresholds.update(temperature_thresholds or {})
+        self.color_matcher = ColorMatcher()
+        # Most recently encoded catalog, reused while the same list is passed in
+        self._matrix_cache: Optional[CatalogMatrix] = None
+        # Called with (stage, seconds) for each stage of recommend(); None
+        # skips timing entirely
+        self.stage_observer: Optional[Callable[[str, float], None]] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "OutfitRecommendationModel":
+        """
+        Model version described by a config dict, as config() returns it
+
+        Args:
+            config: Optional 'version', 'weights' (ScoringWeights fields) and
+                'temperature_thresholds'; missing entries keep their defaults
+
+        Raises:
+            ValueError: Unknown weight or weather category
+        """
+        weights = config.get("weights") or {}
+        unknown = set(weights) - set(ScoringWeights._fields)
+        if unknown:
+            raise ValueError(f"Unknown scoring weights: {', '.join(sorted(unknown))}")
+        thresholds = config.get("temperature_thresholds") or {}
+        unknown = set(thresholds) - set(cls().temperature_thresholds)
+        if unknown:
+            raise ValueError(f"Unknown weather categories: {', '.join(sorted(unknown))}")
+        return cls(
+            weights=DEFAULT_WEIGHTS._replace(**{name: float(value) for name, value in weights.items()}),
+            temperature_thresholds={name: float(value) for name, value in thresholds.items()},
+            version=str(config.get("version", "1.0.0")),
+        )
+
+    def config(self) -> Dict[str, Any]:
+        """Version, weights and temperature thresholds of this model"""
+        return {
+            "version": self.version,
+            "weights": self.weights._asdict(),
+            "temperature_thresholds": dict(self.temperature_thresholds),
+        }
+
+    @property
+    def uses_prebuilt_structures(self) -> bool:
+        """Whether the catalog's tables and ANN index, built for DEFAULT_WEIGHTS, apply"""
+        return self.weights == DEFAULT_WEIGHTS
+
+    @staticmethod
+    def _lap(observe: Callable[[str, float], None], stage: str, started: float) -> float:
+        """Report the time since ``started`` for a stage and return the new start"""
+        now = time.perf_counter()
+        observe(stage, now - started)
+        return now
+
+    def _get_matrix(self, outfits: OutfitSource) -> CatalogMatrix:
+        """
+        Get the columnar encoding of a catalog, building it only once
+
+        Catalog lists are treated as immutable once passed in; a new list
+        (or a change in length) triggers a re-encode.
+        """
+        if isinstance(outfits, OutfitCatalog):
+            return outfits.matrix
+        if isinstance(outfits, CatalogMatrix):
+            return outfits
+        cached = self._matrix_cache
+        if cached is None or cached.source is not outfits or len(cached) != len(outfits):
+            cached = CatalogMatrix(outfits)
+            self._matrix_cache = cached
+        return cached
 
     def _get_weather_category(self, temperature: float) -> str:
         """Categorize weather based on temperature"""
@@ -41,22 +135,19 @@ class OutfitRecommendationModel:
             return "hot"
 
     def _filter_by_weather(
-        self, outfits: List[Dict[str, Any]], weather_category: str
+        self, outfits: Union[List[Dict[str, Any]], OutfitCatalog], weather_category: str
     ) -> List[Dict[str, Any]]:
         """
         Filter outfits based on weather
         In production, this would use ML model predictions
         """
-        # Simple rule-based filtering for now
-        weather_appropriate_styles = {
-            "very_cold": ["layered", "formal", "business"],
-            "cold": ["business", "formal", "casual"],
-            "mild": ["casual", "business", "smart casual"],
-            "warm": ["casual", "smart casual", "party"],
-            "hot": ["casual", "sporty", "outdoor"],
-        }
+        if isinstance(outfits, OutfitCatalog):
+            return outfits.outfits_for(
+                outfits.weather_slots(weather_category) or outfits.all_slots
+            )
 
-        appropriate_styles = weather_appropriate_styles.get(weather_category, [])
+        # Simple rule-based filtering for now
+        appropriate_styles = WEATHER_APPROPRIATE_STYLES.get(weather_category, [])
         if not appropriate_styles:
             return outfits
 
@@ -72,51 +163,264 @@ class OutfitRecommendationModel:
 
         return filtered if filtered else outfits
 
+    def _harmony_term(
+        self, matrix: CatalogMatrix, user_colors: List[str], rows: Optional[np.ndarray] = None
+    ) -> Optional[np.ndarray]:
+        """Per-row score term for palette harmony with the user's colors"""
+        harmony = self.color_matcher.palette_harmony(matrix, user_colors or [], rows)
+        return None if harmony is None else harmony * self.weights.color_harmony_boost
+
+    def _weather_rows(self, outfits: OutfitSource, weather_category: str) -> np.ndarray:
+        """
+        Row indices of weather-appropriate outfits in an encoded catalog
+        Falls back to every row when nothing matches, like _filter_by_weather
+        """
+        if isinstance(outfits, OutfitCatalog):
+            # Precomputed weather index: no per-request style scan
+            return outfits.rows(outfits.weather_slots(weather_category) or outfits.all_slots)
+
+        matrix = self._get_matrix(outfits)
+        appropriate_styles = WEATHER_APPROPRIATE_STYLES.get(weather_category, [])
+        if appropriate_styles:
+            rows = np.flatnonzero(matrix.style_contains(appropriate_styles))
+            if rows.size:
+                return rows
+        return matrix.live_rows()
+
+    def _index_candidates(
+        self,
+        outfits: OutfitSource,
+        weather_category: str,
+        user_styles: List[str],
+        user_colors: List[str],
+        avoid_colors: List[str],
+        top_k: int,
+    ) -> Optional[np.ndarray]:
+        """
+        Weather-appropriate candidate rows from the catalog's ANN index
+
+        Returns None (score exhaustively) when the catalog has no index, the
+        index is stale, or it yields fewer than ``top_k`` candidates.
+        """
+        index = getattr(outfits, "ann_index", None)
+        if index is None or not self.uses_prebuilt_structures:
+            return None
+        matrix = self._get_matrix(outfits)
+        if not index.matches(matrix, getattr(outfits, "version", 0)):
+            return None
+        # Only catalogs that carry an index need models.ann
+        from .ann import encode_query
+
+        query = encode_query(matrix, user_styles, user_colors, avoid_colors)
+        extra, extra_bound = None, 0.0
+        harmony = self.color_matcher.palette_harmonies(matrix, user_colors or [])
+        if harmony is not None:
+            # Candidates are picked and bounded on the full score, harmony included
+            palette_ids, _ = matrix.palettes()
+            boost = self.weights.color_harmony_boost
+            extra = lambda rows: harmony[palette_ids[rows]] * boost
+            extra_bound = float(harmony.max()) * boost if harmony.size else 0.0
+        rows = index.search(matrix, query, weather_category, extra=extra, extra_bound=extra_bound)
+        return rows if rows.size >= top_k else None
+
+    def _table_rows(
+        self,
+        outfits: OutfitSource,
+        weather_category: str,
+        user_styles: List[str],
+        user_colors: List[str],
+        avoid_colors: List[str],
+        top_k: int,
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Top rows from the catalog's materialized recommendation tables
+
+        Only the bucket's precomputed rows are scored with the request's
+        colors. Returns None (score normally) when the catalog has no
+        current tables, the model has non-default weights, the bucket was
+        not precomputed, or its rows cannot be shown to hold the exact top
+        ``top_k``.
+
+        Returns:
+            (rows, scores) of the best rows, highest score first, or None
+        """
+        tables = getattr(outfits, "recommendation_tables", None)
+        if tables is None or not self.uses_prebuilt_structures:
+            return None
+        matrix = self._get_matrix(outfits)
+        if not tables.matches(matrix, getattr(outfits, "version", 0)):
+            return None
+        bucket = tables.bucket(matrix, weather_category, user_styles)
+        if bucket is None:
+            return None
+        harmony = self._harmony_term(matrix, user_colors, bucket.rows)
+        scores = matrix.score(
+            user_styles, user_colors, avoid_colors, extra=harmony, rows=bucket.rows, weights=self.weights
+        )
+        order = top_k_indices(scores, top_k)
+        if not tables.certify(
+            matrix, bucket, bucket.rows[order], scores[order], user_colors, harmony is not None, top_k
+        ):
+            return None
+        return bucket.rows[order], scores[order]
+
+    def table_recommend(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Dict[str, Any],
+        outfit_database: OutfitSource,
+        top_k: int = 5,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        recommend() served from the materialized tables alone
+
+        Returns:
+            The same outfits recommend() would return, or None when the
+            tables cannot answer the request
+        """
+        observe = self.stage_observer
+        started = time.perf_counter() if observe is not None else 0.0
+        weather_category = self._get_weather_category(weather_data.get("temperature", 20))
+        found = self._table_rows(
+            outfit_database,
+            weather_category,
+            user_preferences.get("styles", []),
+            user_preferences.get("colors", []),
+            user_preferences.get("avoid_colors", []),
+            top_k,
+        )
+        if found is None:
+            return None
+        if observe is not None:
+            started = self._lap(observe, "table_lookup", started)
+        outfits = self.materialize(outfit_database, *found)
+        if observe is not None:
+            self._lap(observe, "materialize", started)
+        return outfits
+
+    def build_tables(
+        self, outfits: OutfitSource, styles: Iterable[str] = (), depth: int = 256
+    ) -> RecommendationTables:
+        """
+        Precompute recommendation tables for every weather category and style bucket
+
+        Args:
+            outfits: Catalog to precompute for
+            styles: Style keywords to add to those found in the catalog
+                (e.g. the canonical names requests are normalized to)
+            depth: Rows kept per bucket
+
+        Returns:
+            RecommendationTables for the catalog at its current version
+        """
+        version = getattr(outfits, "version", 0)
+        matrix = self._get_matrix(outfits)
+        weather_rows = {
+            weather_category: self._weather_rows(outfits, weather_category)
+            for weather_category in self.temperature_thresholds
+        }
+        tables = RecommendationTables.build(matrix, weather_rows, style_tokens(matrix, styles), depth)
+        tables.catalog_version = version
+        return tables
+
     def _match_user_preferences(
         self,
-        outfits: List[Dict[str, Any]],
+        outfits: OutfitSource,
         user_styles: List[str],
         user_colors: List[str],
         avoid_colors: List[str] = None,
+        top_k: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
     ) -> List[Dict[str, Any]]:
         """
         Score outfits based on user preferences
+        Includes a palette-harmony term from the ColorMatcher
         In production, this would use ML-based matching
+
+        Args:
+            outfits: List of outfits, an OutfitCatalog or a CatalogMatrix
+            user_styles: Preferred styles
+            user_colors: Preferred colors
+            avoid_colors: Colors to penalize
+            top_k: Only return the k best outfits (partial selection)
+            rows: Restrict scoring to these catalog rows
+
+        Returns:
+            Scored outfit copies sorted by confidence score
         """
-        scored_outfits = []
+        observe = self.stage_observer
+        started = time.perf_counter() if observe is not None else 0.0
 
-        for outfit in outfits:
-            score = outfit.get("confidence_score", 0.5)
+        matrix = self._get_matrix(outfits)
+        if rows is None:
+            rows = matrix.live_rows()
+        scores = matrix.score(
+            user_styles,
+            user_colors,
+            avoid_colors,
+            extra=self._harmony_term(matrix, user_colors, rows),
+            rows=rows,
+            weights=self.weights,
+        )
+        if observe is not None:
+            started = self._lap(observe, "scoring", started)
 
-            # Boost score if style matches
-            outfit_style = outfit.get("style", "").lower()
-            if any(style.lower() in outfit_style for style in user_styles):
-                score += 0.1
+        k = len(rows) if top_k is None else top_k
+        order = top_k_indices(scores, k)
+        if observe is not None:
+            started = self._lap(observe, "sorting", started)
 
-            # Boost score if colors match
-            outfit_colors = [c.lower() for c in outfit.get("colors", [])]
-            matching_colors = sum(
-                1 for color in user_colors if color.lower() in outfit_colors
-            )
-            score += matching_colors * 0.05
+        scored_outfits = self.materialize(matrix, rows[order], scores[order])
+        if observe is not None:
+            self._lap(observe, "materialize", started)
 
-            # Reduce score if contains avoided colors
-            if avoid_colors:
-                avoided = sum(
-                    1 for color in avoid_colors if color.lower() in outfit_colors
-                )
-                score -= avoided * 0.15
+        return scored_outfits
 
-            # Ensure score stays in valid range
-            score = max(0.0, min(1.0, score))
+    def top_rows(
+        self,
+        outfits: OutfitSource,
+        user_preferences: Dict[str, Any],
+        rows: np.ndarray,
+        top_k: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a set of rows and select the best, without materializing outfits
 
-            outfit_copy = outfit.copy()
-            outfit_copy["confidence_score"] = round(score, 2)
-            scored_outfits.append(outfit_copy)
+        Used for sharded scoring: shard results are merged with
+        models.scoring.merge_top_k and then materialized once.
+
+        Args:
+            outfits: List of outfits, an OutfitCatalog or a CatalogMatrix
+            user_preferences: Dict with 'styles', 'colors', 'avoid_colors'
+            rows: Catalog rows to consider, ascending
+            top_k: Number of rows to keep
 
-        # Sort by confidence score
-        scored_outfits.sort(key=lambda x: x["confidence_score"], reverse=True)
+        Returns:
+            (rows, scores) of the best rows, highest score first
+        """
+        matrix = self._get_matrix(outfits)
+        user_colors = user_preferences.get("colors", [])
+        scores = matrix.score(
+            user_preferences.get("styles", []),
+            user_colors,
+            user_preferences.get("avoid_colors", []),
+            extra=self._harmony_term(matrix, user_colors, rows),
+            rows=rows,
+            weights=self.weights,
+        )
+        order = top_k_indices(scores, top_k)
+        return rows[order], scores[order]
 
+    def materialize(
+        self, outfits: OutfitSource, rows: np.ndarray, scores: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """Scored outfit copies for the given rows, in order"""
+        catalog_outfits = self._get_matrix(outfits).outfits
+        scored_outfits = []
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            outfit_copy = catalog_outfits[row].copy()
+            outfit_copy["confidence_score"] = float(score)
+            scored_outfits.append(outfit_copy)
         return scored_outfits
 
     def recommend(
@@ -124,16 +428,24 @@ class OutfitRecommendationModel:
         user_preferences: Dict[str, Any],
         weather_data: Dict[str, Any],
         occasion: str,
-        outfit_database: List[Dict[str, Any]],
+        outfit_database: OutfitSource,
+        use_index: bool = True,
     ) -> List[Dict[str, Any]]:
         """
         Generate outfit recommendations based on input
 
+        Catalogs carrying an ANN index (models.ann) are scored in two
+        stages: the index retrieves a few hundred weather-appropriate
+        candidates and the rule-based scorer re-ranks only those. Catalogs
+        carrying materialized tables (models.tables) are first looked up
+        there; a table answer is identical to exhaustive scoring.
+
         Args:
             user_preferences: Dict with 'styles', 'colors', 'avoid_colors'
             weather_data: Dict with 'temperature', 'condition', etc.
             occasion: String representing the occasion
-            outfit_database: List of available outfits
+            outfit_database: List of available outfits, or an indexed OutfitCatalog
+            use_index: Use the catalog's tables and ANN index if it has them
 
         Returns:
             List of recommended outfits sorted by confidence score
@@ -141,24 +453,171 @@ class OutfitRecommendationModel:
         if not self.model_loaded:
             raise Exception("Model not loaded")
 
+        observe = self.stage_observer
+        started = time.perf_counter() if observe is not None else 0.0
+
         # Get weather category
         temperature = weather_data.get("temperature", 20)
         weather_category = self._get_weather_category(temperature)
 
-        # Filter by weather appropriateness
-        weather_filtered = self._filter_by_weather(outfit_database, weather_category)
-
         # Match user preferences
         user_styles = user_preferences.get("styles", [])
         user_colors = user_preferences.get("colors", [])
         avoid_colors = user_preferences.get("avoid_colors", [])
 
-        recommendations = self._match_user_preferences(
-            weather_filtered, user_styles, user_colors, avoid_colors
-        )
+        # Materialized tables answer most requests from a short precomputed list
+        if use_index:
+            scored_outfits = self.table_recommend(user_preferences, weather_data, outfit_database)
+            if scored_outfits is not None:
+                return scored_outfits
+
+        # Candidate retrieval from the ANN index also applies the weather filter
+        weather_rows = None
+        if use_index:
+            weather_rows = self._index_candidates(
+                outfit_database, weather_category, user_styles, user_colors, avoid_colors, top_k=5
+            )
+            if weather_rows is not None and observe is not None:
+                self._lap(observe, "candidate_retrieval", started)
+
+        # Filter by weather appropriateness
+        if weather_rows is None:
+            weather_rows = self._weather_rows(outfit_database, weather_category)
+            if observe is not None:
+                self._lap(observe, "weather_filter", started)
 
         # Return top recommendations
-        return recommendations[:5]  # Return top 5
+        return self._match_user_preferences(
+            outfit_database,
+            user_styles,
+            user_colors,
+            avoid_colors,
+            top_k=5,  # Return top 5
+            rows=weather_rows,
+        )
+
+    def rank(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Optional[Dict[str, Any]],
+        occasion: str,
+        outfit_database: OutfitSource,
+        rows: Optional[np.ndarray] = None,
+    ) -> Ranking:
+        """
+        Score the catalog for a request without materializing the results
+
+        Args:
+            user_preferences: Dict with 'styles', 'colors', 'avoid_colors'
+            weather_data: Dict with 'temperature'; None skips weather filtering
+            occasion: String representing the occasion
+            outfit_database: List of available outfits, or an indexed OutfitCatalog
+            rows: Catalog rows to rank, already filtered (weather_data is then ignored)
+
+        Returns:
+            Ranking that yields scored outfits in order on demand
+        """
+        if not self.model_loaded:
+            raise Exception("Model not loaded")
+
+        matrix = self._get_matrix(outfit_database)
+        if rows is None and weather_data is None:
+            rows = matrix.live_rows()
+        elif rows is None:
+            weather_category = self._get_weather_category(weather_data.get("temperature", 20))
+            rows = self._weather_rows(outfit_database, weather_category)
+
+        user_colors = user_preferences.get("colors", [])
+        scores = matrix.score(
+            user_preferences.get("styles", []),
+            user_colors,
+            user_preferences.get("avoid_colors", []),
+            extra=self._harmony_term(matrix, user_colors, rows),
+            rows=rows,
+            weights=self.weights,
+        )
+        return Ranking(matrix, rows, scores)
+
+    def recommend_iter(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Optional[Dict[str, Any]],
+        occasion: str,
+        outfit_database: OutfitSource,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generator version of recommend() that yields every match in rank order
+        """
+        yield from self.rank(user_preferences, weather_data, occasion, outfit_database).iter_from()
+
+    def recommend_batch(
+        self,
+        requests: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+        outfit_database: OutfitSource,
+        top_k: int = 5,
+        use_index: bool = True,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Generate recommendations for many requests at once
+
+        Each request first goes through the stages recommend() tries before
+        exhaustive scoring (the materialized tables, then the ANN index), so
+        it gets the same outfits it would get on its own. The rest are
+        grouped by (weather category, occasion); each group is
+        weather-filtered once and all of its preference profiles are scored
+        in a single vectorized pass.
+
+        Args:
+            requests: (user_preferences, weather_data, occasion) tuples
+            outfit_database: List of available outfits, or an indexed OutfitCatalog
+            top_k: Number of outfits per request
+            use_index: Use the catalog's tables and ANN index if it has them
+
+        Returns:
+            One recommendation list per request, in input order
+        """
+        if not self.model_loaded:
+            raise Exception("Model not loaded")
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in requests]
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for position, (user_preferences, weather_data, occasion) in enumerate(requests):
+            weather_category = self._get_weather_category(weather_data.get("temperature", 20))
+            if use_index:
+                outfits = self.table_recommend(user_preferences, weather_data, outfit_database, top_k)
+                if outfits is None:
+                    preferences = (
+                        user_preferences.get("styles", []),
+                        user_preferences.get("colors", []),
+                        user_preferences.get("avoid_colors", []),
+                    )
+                    rows = self._index_candidates(outfit_database, weather_category, *preferences, top_k)
+                    if rows is not None:
+                        outfits = self._match_user_preferences(
+                            outfit_database, *preferences, top_k=top_k, rows=rows
+                        )
+                if outfits is not None:
+                    results[position] = outfits
+                    continue
+            groups.setdefault((weather_category, occasion), []).append(position)
+
+        matrix = self._get_matrix(outfit_database)
+        for (weather_category, _), positions in groups.items():
+            rows = self._weather_rows(outfit_database, weather_category)
+            preferences = [requests[p][0] for p in positions]
+            extra = np.zeros((len(preferences), rows.size))
+            for index, preference in enumerate(preferences):
+                harmony = self._harmony_term(matrix, preference.get("colors") or [], rows)
+                if harmony is not None:
+                    extra[index] = harmony
+            scores = matrix.score_many(preferences, rows, extra, weights=self.weights)
+            for position, row_scores in zip(positions, scores):
+                for index in top_k_indices(row_scores, top_k).tolist():
+                    outfit_copy = matrix.outfits[rows[index]].copy()
+                    outfit_copy["confidence_score"] = float(row_scores[index])
+                    results[position].append(outfit_copy)
+
+        return results
 
     def predict_style_match(
         self, outfit_style: str, user_preferences: List[str]
@@ -173,12 +632,34 @@ class OutfitRecommendationModel:
         )
         return min(1.0, matches * 0.3 + 0.5)
 
-    def get_model_info(self) -> Dict[str, Any]:
-        """Get information about the loaded model"""
-        return {
+    def get_model_info(self, outfit_database: Optional[OutfitSource] = None) -> Dict[str, Any]:
+        """
+        Get information about the loaded model
+
+        Args:
+            outfit_database: Catalog whose materialized tables to describe
+
+        Returns:
+            Model metadata, plus the tables' version and staleness when a
+            catalog is given
+        """
+        info = {
             "model_type": "RuleBasedMock",
-            "version": "1.0.0",
+            "version": self.version,
             "loaded": self.model_loaded,
             "status": "Using mock data with rule-based logic",
             "future": "Will be replaced with ML model trained on fashion datasets",
         }
+        if outfit_database is not None:
+            tables = getattr(outfit_database, "recommendation_tables", None)
+            catalog_version = getattr(outfit_database, "version", 0)
+            if tables is None:
+                info["recommendation_tables"] = None
+            else:
+                info["recommendation_tables"] = {
+                    **tables.stats(),
+                    "current_catalog_version": catalog_version,
+                    "stale": not tables.matches(self._get_matrix(outfit_database), catalog_version),
+                    "age_seconds": round(time.time() - tables.built_at, 3),
+                }
+        return info
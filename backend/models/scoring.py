@@ -0,0 +1,512 @@
+"""
+Columnar scoring engine for outfit recommendations
+Encodes an outfit catalog once into NumPy arrays so that preference
+scoring and top-k selection run as array operations over the whole catalog
+"""
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Score adjustments applied by the rule-based scorer
+STYLE_BOOST = 0.1
+COLOR_MATCH_BOOST = 0.05
+AVOID_COLOR_PENALTY = 0.15
+# Scales palette harmony (0-1) with the user's colors, see ColorMatcher
+COLOR_HARMONY_BOOST = 0.05
+DEFAULT_CONFIDENCE = 0.5
+
+
+class ScoringWeights(NamedTuple):
+    """
+    Score adjustments of one model version
+
+    The materialized tables and the ANN index are built for DEFAULT_WEIGHTS;
+    a model with other weights scores without them.
+    """
+
+    style_boost: float = STYLE_BOOST
+    color_match_boost: float = COLOR_MATCH_BOOST
+    avoid_color_penalty: float = AVOID_COLOR_PENALTY
+    color_harmony_boost: float = COLOR_HARMONY_BOOST
+
+
+DEFAULT_WEIGHTS = ScoringWeights()
+
+_WORD_BITS = 64
+# Distinct style-token tuples whose per-style match masks are kept per catalog
+_STYLE_MATCH_CACHE_SIZE = 4096
+
+
+class CatalogMatrix:
+    """
+    Column-oriented encoding of an outfit catalog
+
+    Styles are dictionary-encoded into an integer column and colors into a
+    packed uint64 bitmask per outfit (one bit per distinct lowercase color).
+    Rows can be replaced or cleared in place so an OutfitCatalog can keep the
+    encoding in step with incremental adds and removes.
+    """
+
+    def __init__(self, outfits: List[Dict[str, Any]] = ()):
+        """
+        Encode the catalog
+
+        Args:
+            outfits: List of outfit dicts with 'style', 'colors' and
+                'confidence_score' keys
+        """
+        self.source = outfits
+        self.outfits: List[Optional[Dict[str, Any]]] = list(outfits)
+        self.style_vocab: Dict[str, int] = {}
+        self.color_vocab: Dict[str, int] = {}
+
+        size = len(self.outfits)
+        style_codes: List[int] = []
+        base_scores: List[float] = []
+        color_rows: List[int] = []
+        color_codes: List[int] = []
+
+        for row, outfit in enumerate(self.outfits):
+            style = outfit.get("style", "").lower()
+            style_codes.append(self.style_vocab.setdefault(style, len(self.style_vocab)))
+            base_scores.append(outfit.get("confidence_score", DEFAULT_CONFIDENCE))
+            for color in outfit.get("colors", []):
+                color_rows.append(row)
+                color_codes.append(self.color_vocab.setdefault(color.lower(), len(self.color_vocab)))
+
+        capacity = max(size, 1)
+        words = max(1, -(-len(self.color_vocab) // _WORD_BITS))
+        self._style_codes = np.zeros(capacity, dtype=np.int32)
+        self._style_codes[:size] = style_codes
+        self._base_scores = np.zeros(capacity, dtype=np.float64)
+        self._base_scores[:size] = base_scores
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[:size] = True
+        self._color_masks = np.zeros((capacity, words), dtype=np.uint64)
+        codes = np.asarray(color_codes, dtype=np.uint64)
+        np.bitwise_or.at(
+            self._color_masks,
+            (np.asarray(color_rows, dtype=np.intp), (codes // _WORD_BITS).astype(np.intp)),
+            np.left_shift(np.uint64(1), codes % np.uint64(_WORD_BITS)),
+        )
+        self._style_names = list(self.style_vocab)
+        self._style_matches: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._palettes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_columns(
+        cls,
+        outfits: Sequence[Dict[str, Any]],
+        style_names: List[str],
+        color_vocab: Dict[str, int],
+        style_codes: np.ndarray,
+        base_scores: np.ndarray,
+        color_masks: np.ndarray,
+    ) -> "CatalogMatrix":
+        """
+        Wrap already encoded columns without copying them
+
+        Used for catalogs stored in columnar form; the arrays may be
+        read-only (e.g. memory-mapped), in which case set_row/clear_row
+        cannot be used.
+
+        Args:
+            outfits: Sequence returning the outfit dict for a row
+            style_names: Lowercase style name per style code
+            color_vocab: Lowercase color -> bit position in color_masks
+            style_codes: int32 style code per row
+            base_scores: float64 base confidence per row
+            color_masks: (rows, words) uint64 color bitmasks
+        """
+        matrix = cls.__new__(cls)
+        matrix.source = outfits
+        matrix.outfits = outfits
+        matrix._style_names = list(style_names)
+        matrix.style_vocab = {}
+        for code, style in enumerate(matrix._style_names):
+            matrix.style_vocab.setdefault(style, code)
+        matrix.color_vocab = dict(color_vocab)
+        matrix._style_codes = style_codes
+        matrix._base_scores = base_scores
+        matrix._color_masks = color_masks
+        matrix._live = np.ones(len(outfits), dtype=bool)
+        matrix._style_matches = {}
+        matrix._palettes = None
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.outfits)
+
+    @property
+    def style_codes(self) -> np.ndarray:
+        return self._style_codes[: len(self)]
+
+    @property
+    def base_scores(self) -> np.ndarray:
+        return self._base_scores[: len(self)]
+
+    @property
+    def color_masks(self) -> np.ndarray:
+        return self._color_masks[: len(self)]
+
+    @property
+    def live(self) -> np.ndarray:
+        return self._live[: len(self)]
+
+    def live_rows(self) -> np.ndarray:
+        """Indices of rows that currently hold an outfit"""
+        return np.flatnonzero(self.live)
+
+    def _ensure_rows(self, size: int):
+        """Grow the row capacity geometrically"""
+        capacity = self._style_codes.shape[0]
+        if size <= capacity:
+            return
+        extra = max(size, capacity * 2) - capacity
+        self._style_codes = np.concatenate((self._style_codes, np.zeros(extra, dtype=np.int32)))
+        self._base_scores = np.concatenate((self._base_scores, np.zeros(extra, dtype=np.float64)))
+        self._live = np.concatenate((self._live, np.zeros(extra, dtype=bool)))
+        self._color_masks = np.vstack(
+            (self._color_masks, np.zeros((extra, self._color_masks.shape[1]), dtype=np.uint64))
+        )
+
+    def _color_code(self, color: str) -> int:
+        """Dictionary-encode a color, widening the bitmask when needed"""
+        code = self.color_vocab.get(color)
+        if code is None:
+            code = self.color_vocab[color] = len(self.color_vocab)
+            words = code // _WORD_BITS + 1
+            if words > self._color_masks.shape[1]:
+                padding = np.zeros((self._color_masks.shape[0], 1), dtype=np.uint64)
+                self._color_masks = np.hstack((self._color_masks, padding))
+        return code
+
+    def set_row(self, row: int, outfit: Dict[str, Any]):
+        """Encode an outfit into a row, appending when row == len(self)"""
+        if row == len(self):
+            self._ensure_rows(row + 1)
+            self.outfits.append(outfit)
+        else:
+            self.outfits[row] = outfit
+
+        style = outfit.get("style", "").lower()
+        code = self.style_vocab.get(style)
+        if code is None:
+            code = self.style_vocab[style] = len(self._style_names)
+            self._style_names.append(style)
+
+        self._style_codes[row] = code
+        self._base_scores[row] = outfit.get("confidence_score", DEFAULT_CONFIDENCE)
+        self._color_masks[row] = 0
+        for color in outfit.get("colors", []):
+            color_code = self._color_code(color.lower())
+            self._color_masks[row, color_code // _WORD_BITS] |= np.uint64(
+                1 << (color_code % _WORD_BITS)
+            )
+        self._live[row] = True
+        self._palettes = None
+
+    def clear_row(self, row: int):
+        """Mark a row as empty so it can be reused"""
+        self.outfits[row] = None
+        self._live[row] = False
+        self._color_masks[row] = 0
+        self._palettes = None
+
+    def palettes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distinct color palettes in the catalog
+
+        Catalogs reuse a small number of color combinations, so per-palette
+        work is far cheaper than per-outfit work. Cached until the next
+        set_row/clear_row.
+
+        Returns:
+            Tuple of (palette id per row, (palettes, len(color_vocab)) 0/1
+            membership array)
+        """
+        if self._palettes is None:
+            masks = self.color_masks
+            if masks.shape[1] == 1:
+                unique, ids = np.unique(masks[:, 0], return_inverse=True)
+                unique = unique[:, np.newaxis]
+            else:
+                unique, ids = np.unique(masks, axis=0, return_inverse=True)
+            packed = np.ascontiguousarray(unique).astype("<u8").view(np.uint8)
+            bits = np.unpackbits(packed, axis=1, bitorder="little")
+            membership = bits[:, : len(self.color_vocab)].astype(np.float64)
+            self._palettes = (ids.reshape(-1).astype(np.intp), membership)
+        return self._palettes
+
+    def style_matches(self, tokens: Iterable[str]) -> np.ndarray:
+        """
+        Boolean mask over style codes: which distinct styles contain any of the tokens
+
+        Masks are memoized per token tuple. Normalized requests carry
+        interned canonical styles, so the lookup hashes strings whose hash
+        is already cached, and the substring tests run once per distinct
+        token tuple instead of once per request. A mask is recomputed when
+        new styles have been added since. The returned array is read-only.
+        """
+        key = tuple(tokens)
+        cached = self._style_matches.get(key)
+        if cached is not None and cached.size == len(self._style_names):
+            return cached
+        lowered = [token.lower() for token in key]
+        mask = np.fromiter(
+            (any(token in style for token in lowered) for style in self._style_names),
+            dtype=bool,
+            count=len(self._style_names),
+        )
+        mask.setflags(write=False)
+        if len(self._style_matches) >= _STYLE_MATCH_CACHE_SIZE:
+            self._style_matches.clear()
+        self._style_matches[key] = mask
+        return mask
+
+    def color_code(self, color: str) -> Optional[int]:
+        """
+        Bit position of a color, None if no outfit has it
+
+        Canonical colors are already lowercase, so the exact lookup almost
+        always hits and only other spellings pay for ``lower()``.
+        """
+        code = self.color_vocab.get(color)
+        if code is None:
+            code = self.color_vocab.get(color.lower())
+        return code
+
+    def style_contains(self, tokens: Iterable[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Boolean mask of outfits whose style contains any of the tokens
+
+        The substring test runs once per distinct style, not once per outfit.
+
+        Args:
+            tokens: Style keywords
+            rows: Only test these rows (the mask is aligned with them)
+        """
+        per_style = self.style_matches(tokens)
+        size = len(self) if rows is None else len(rows)
+        if per_style.size == 0:
+            return np.zeros(size, dtype=bool)
+        if rows is None:
+            return per_style[self.style_codes] & self.live
+        return per_style[self.style_codes[rows]] & self.live[rows]
+
+    def color_hits(self, colors: Iterable[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Count, per outfit, how many of the given colors it contains
+
+        Duplicate entries in ``colors`` are counted each time, matching the
+        list-based scorer.
+
+        Args:
+            colors: Colors to look for
+            rows: Only count for these rows (the result is aligned with them)
+        """
+        masks = self.color_masks if rows is None else self.color_masks[rows]
+        hits = np.zeros(masks.shape[0], dtype=np.int64)
+        for color in colors:
+            code = self.color_code(color)
+            if code is None:
+                continue
+            bit = np.uint64(1 << (code % _WORD_BITS))
+            hits += (masks[:, code // _WORD_BITS] & bit) != 0
+        return hits
+
+    def score(
+        self,
+        user_styles: List[str],
+        user_colors: List[str],
+        avoid_colors: Optional[List[str]] = None,
+        extra: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None,
+        weights: ScoringWeights = DEFAULT_WEIGHTS,
+    ) -> np.ndarray:
+        """
+        Score every outfit in the catalog, or only the given rows
+
+        Args:
+            user_styles: Preferred styles
+            user_colors: Preferred colors
+            avoid_colors: Colors to penalize
+            extra: Additional per-row score term, added before clipping
+            rows: Only score these rows; the result is aligned with them and
+                equal to score(...)[rows]
+            weights: Score adjustments to apply
+
+        Returns:
+            Array of confidence scores rounded to two decimals
+        """
+        scores = self.base_scores.copy() if rows is None else self.base_scores[rows]
+        scores += np.where(self.style_contains(user_styles, rows), weights.style_boost, 0.0)
+        scores += self.color_hits(user_colors, rows) * weights.color_match_boost
+        if avoid_colors:
+            scores -= self.color_hits(avoid_colors, rows) * weights.avoid_color_penalty
+        if extra is not None:
+            scores += extra
+        np.clip(scores, 0.0, 1.0, out=scores)
+        return round_scores(scores)
+
+    def color_membership(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Unpacked color membership for the given rows
+
+        Returns:
+            (len(rows), len(color_vocab)) array of 0/1 values
+        """
+        packed = self.color_masks[rows].astype("<u8").view(np.uint8)
+        bits = np.unpackbits(packed, axis=1, bitorder="little")
+        return bits[:, : len(self.color_vocab)].astype(np.float64)
+
+    def _color_weights(self, colors: Iterable[str]) -> np.ndarray:
+        """Per-vocabulary-entry occurrence counts of the given colors"""
+        weights = np.zeros(len(self.color_vocab), dtype=np.float64)
+        for color in colors:
+            code = self.color_code(color)
+            if code is not None:
+                weights[code] += 1
+        return weights
+
+    def score_many(
+        self,
+        preferences: List[Dict[str, Any]],
+        rows: np.ndarray,
+        extra: Optional[np.ndarray] = None,
+        weights: ScoringWeights = DEFAULT_WEIGHTS,
+    ) -> np.ndarray:
+        """
+        Score several preference profiles against the same rows in one pass
+
+        Args:
+            preferences: Dicts with 'styles', 'colors' and 'avoid_colors'
+            rows: Catalog rows to score
+            extra: (len(preferences), len(rows)) additional score terms
+            weights: Score adjustments to apply
+
+        Returns:
+            (len(preferences), len(rows)) array of rounded scores, equal
+            row for row to score(...)[rows]
+        """
+        style_boost = np.array(
+            [self.style_matches(pref.get("styles") or []) for pref in preferences],
+            dtype=bool,
+        ).reshape(len(preferences), len(self._style_names))
+        membership = self.color_membership(rows)
+        color_weights = np.array(
+            [self._color_weights(pref.get("colors") or []) for pref in preferences]
+        ).reshape(len(preferences), len(self.color_vocab))
+        avoid_weights = np.array(
+            [self._color_weights(pref.get("avoid_colors") or []) for pref in preferences]
+        ).reshape(len(preferences), len(self.color_vocab))
+
+        scores = np.repeat(self.base_scores[rows][np.newaxis, :], len(preferences), axis=0)
+        if style_boost.size:
+            scores += np.where(style_boost[:, self.style_codes[rows]], weights.style_boost, 0.0)
+        scores += (color_weights @ membership.T) * weights.color_match_boost
+        scores -= (avoid_weights @ membership.T) * weights.avoid_color_penalty
+        if extra is not None:
+            scores += extra
+        np.clip(scores, 0.0, 1.0, out=scores)
+        return round_scores(scores.ravel()).reshape(scores.shape)
+
+    def nbytes(self) -> int:
+        """Memory held by the encoded columns"""
+        return (
+            self._style_codes.nbytes
+            + self._base_scores.nbytes
+            + self._color_masks.nbytes
+            + self._live.nbytes
+        )
+
+
+class Ranking:
+    """
+    Scored catalog rows that are ordered lazily
+
+    Scores are computed once; the ranked order is extended with partial
+    selection only as far as consumers actually read, so streaming the first
+    page of a large catalog does not pay for a full sort and later pages
+    reuse the same scores.
+    """
+
+    def __init__(self, matrix: CatalogMatrix, rows: np.ndarray, scores: np.ndarray):
+        self.matrix = matrix
+        self.rows = rows
+        self.scores = scores
+        self._order = np.empty(0, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return int(self.rows.size)
+
+    def _ensure_order(self, count: int):
+        if count > self._order.size and self._order.size < len(self):
+            self._order = top_k_indices(self.scores, max(count, 2 * self._order.size))
+
+    def iter_from(self, start: int = 0, chunk_size: int = 64) -> Iterator[Dict[str, Any]]:
+        """
+        Yield scored outfit copies in rank order, beginning at ``start``
+        """
+        position = start
+        while position < len(self):
+            self._ensure_order(position + chunk_size)
+            stop = min(self._order.size, position + chunk_size)
+            for index in self._order[position:stop].tolist():
+                outfit_copy = self.matrix.outfits[self.rows[index]].copy()
+                outfit_copy["confidence_score"] = float(self.scores[index])
+                yield outfit_copy
+            position = stop
+
+
+def round_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    Round scores to two decimals with the same result as ``round(x, 2)``
+
+    ``np.round`` can disagree with Python's correctly rounded ``round`` when
+    ``x * 100`` lands next to a .5 boundary, so those values fall back to
+    Python rounding (once per distinct value).
+    """
+    scaled = scores * 100.0
+    rounded = np.rint(scaled) / 100.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rows = np.flatnonzero(near_half)
+        exact = {value: round(value, 2) for value in np.unique(scores[rows]).tolist()}
+        rounded[rows] = [exact[value] for value in scores[rows].tolist()]
+    return rounded
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k largest values, highest first
+
+    Uses partial selection instead of a full sort. Ties are broken by
+    position so the result matches a stable descending sort.
+    """
+    size = values.size
+    if k <= 0 or size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= size:
+        return np.argsort(-values, kind="stable")
+
+    kth_value = values[np.argpartition(values, size - k)[size - k]]
+    above = np.flatnonzero(values > kth_value)
+    ties = np.flatnonzero(values == kth_value)[: k - above.size]
+    candidates = np.sort(np.concatenate((above, ties)))
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+def merge_top_k(parts: Sequence[Tuple[np.ndarray, np.ndarray]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge per-shard (rows, scores) top-k results into the overall top k
+
+    Ordered by score, then by row, which is the order top_k_indices gives
+    when the whole row set is scored at once.
+    """
+    if not parts:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+    rows = np.concatenate([part[0] for part in parts])
+    scores = np.concatenate([part[1] for part in parts])
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
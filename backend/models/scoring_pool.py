@@ -0,0 +1,444 @@
+"""
+Off-loop scoring
+Runs the CPU-bound part of a recommendation in a thread or process pool so
+the event loop keeps serving other connections, and splits large catalogs
+into row shards whose top-k results are merged
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import BrokenExecutor, Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import OutfitCatalog, WEATHER_APPROPRIATE_STYLES
+from .columnar import COLUMNAR_SUFFIX, MappedCatalog, write_columnar_catalog
+from .outfit_model import OutfitRecommendationModel, OutfitSource
+from .scoring import CatalogMatrix, Ranking, merge_top_k
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("inline", "thread", "process")
+# Outfits per recommendation, as in OutfitRecommendationModel.recommend
+TOP_K = 5
+
+# (path, (st_dev, st_ino)) of a columnar file; the file id detects a path
+# that was replaced by a newer file
+SnapshotSource = Tuple[str, Tuple[int, int]]
+
+
+class StaleSnapshotError(Exception):
+    """A worker found a different file than the one it was sent to score"""
+
+
+# Per-process state of process-pool workers
+_worker_model: Optional[OutfitRecommendationModel] = None
+_worker_catalog: Optional[MappedCatalog] = None
+
+
+def score_shard(
+    model: OutfitRecommendationModel,
+    matrix: CatalogMatrix,
+    start: int,
+    stop: int,
+    weather_keywords: Optional[Sequence[str]],
+    user_preferences: Dict[str, Any],
+    top_k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of one contiguous shard of a catalog
+
+    Args:
+        model: Scoring model
+        matrix: Encoded catalog
+        start: First row of the shard
+        stop: Row after the last row of the shard
+        weather_keywords: Only rows whose style contains one of these
+            (None keeps every row)
+        user_preferences: Dict with 'styles', 'colors', 'avoid_colors'
+        top_k: Rows to keep
+
+    Returns:
+        (rows, scores), highest score first
+    """
+    rows = np.arange(start, stop)
+    if weather_keywords:
+        rows = rows[matrix.style_contains(weather_keywords, rows)]
+    else:
+        rows = rows[matrix.live[start:stop]]
+    return model.top_rows(matrix, user_preferences, rows, top_k)
+
+
+def _file_id(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino
+
+
+def _process_shard(
+    source: SnapshotSource,
+    start: int,
+    stop: int,
+    weather_keywords: Optional[Sequence[str]],
+    user_preferences: Dict[str, Any],
+    top_k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """score_shard() in a pool process, against the memory-mapped file ``source``"""
+    global _worker_model, _worker_catalog
+    if _worker_model is None:
+        _worker_model = OutfitRecommendationModel()
+    path, file_id = source
+    if _worker_catalog is None or (_worker_catalog.path, _worker_catalog.file_id) != (path, file_id):
+        # The previous mapping is released with the last view onto it
+        catalog = MappedCatalog.open(path)
+        if catalog.file_id != file_id:
+            raise StaleSnapshotError(f"{path} was replaced")
+        _worker_catalog = catalog
+    return score_shard(_worker_model, _worker_catalog, start, stop, weather_keywords, user_preferences, top_k)
+
+
+class ScoringPool:
+    """
+    Dispatches recommendation scoring off the event loop
+
+    Modes:
+        inline   score on the calling thread (the event loop)
+        thread   score in a thread pool; NumPy releases the GIL for most of
+                 the array work
+        process  score shards in a process pool. Workers memory-map a
+                 columnar snapshot of the catalog (the catalog file itself
+                 for .ogcat catalogs), so no catalog data is pickled per
+                 call; only preferences go out and (rows, scores) come back
+
+    Catalogs with at least ``shard_min_size`` rows are split into
+    ``shards`` contiguous row ranges scored in parallel; the per-shard top-k
+    lists are merged and only the winners are materialized. Catalogs with a
+    usable ANN index are scored in one piece in a thread, since the index
+    already limits the work to a few hundred rows. Requests the catalog's
+    materialized tables can answer are served from them before sharding.
+    """
+
+    def __init__(
+        self,
+        model: OutfitRecommendationModel,
+        mode: str = "thread",
+        workers: int = 0,
+        shard_min_size: int = 200000,
+        shards: int = 0,
+        snapshot_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            model: Model used for thread and inline scoring
+            mode: "inline", "thread" or "process"
+            workers: Pool size; 0 means one per CPU
+            shard_min_size: Smallest catalog that is split into shards
+            shards: Shards per request; 0 means one per worker
+            snapshot_dir: Where process mode writes catalog snapshots
+                (default: a private temporary directory)
+        """
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown scoring pool mode: {mode} (expected one of {', '.join(POOL_MODES)})")
+        self.model = model
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_min_size = shard_min_size
+        self.shards = shards or self.workers
+        self._snapshot_dir = snapshot_dir
+        self._owns_snapshot_dir = snapshot_dir is None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[Executor] = None
+        # (catalog ref, catalog version, source) of the current snapshot
+        self._snapshot: Optional[Tuple[weakref.ref, int, SnapshotSource]] = None
+        self._snapshot_pending: Optional[Tuple[int, int]] = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshots_written = 0
+        # matrix -> {weather category: any row suits it}
+        self._weather_any: "weakref.WeakKeyDictionary[CatalogMatrix, Dict[str, bool]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.requests = {"inline": 0, "thread": 0, "table": 0, "sharded_thread": 0, "sharded_process": 0}
+        self.process_fallbacks = 0
+        self.shard_tasks = 0
+        self.seconds = 0.0
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+        return self._threads
+
+    @property
+    def processes(self) -> Executor:
+        if self._processes is None:
+            # multiprocessing is only loaded in "process" mode
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._processes
+
+    def _shard_bounds(self, size: int) -> List[Tuple[int, int]]:
+        shards = max(1, min(self.shards, size))
+        edges = np.linspace(0, size, shards + 1).astype(int).tolist()
+        return [(edges[i], edges[i + 1]) for i in range(shards) if edges[i] < edges[i + 1]]
+
+    def _has_index(self, catalog: OutfitSource, matrix: CatalogMatrix) -> bool:
+        index = getattr(catalog, "ann_index", None)
+        return index is not None and index.matches(matrix, getattr(catalog, "version", 0))
+
+    def _weather_keywords(
+        self, catalog: OutfitSource, matrix: CatalogMatrix, weather_category: str
+    ) -> Optional[Tuple[str, ...]]:
+        """
+        Style keywords a shard filters on, or None for every row
+
+        Mirrors OutfitRecommendationModel._weather_rows: a category no
+        outfit suits falls back to the whole catalog.
+        """
+        rules = getattr(catalog, "weather_rules", None) or WEATHER_APPROPRIATE_STYLES
+        keywords = rules.get(weather_category)
+        if not keywords:
+            return None
+        if isinstance(catalog, OutfitCatalog):
+            return tuple(keywords) if catalog.weather_slots(weather_category) else None
+        known = self._weather_any.setdefault(matrix, {})
+        if weather_category not in known:
+            known[weather_category] = bool(matrix.style_contains(keywords).any())
+        return tuple(keywords) if known[weather_category] else None
+
+    def _snapshot_source(self, catalog: OutfitSource, matrix: CatalogMatrix) -> Optional[SnapshotSource]:
+        """
+        Columnar file the process workers map for this catalog, if ready
+
+        Mapped catalogs are already files (usable while their path still
+        names the mapped file). For in-memory catalogs a snapshot is written
+        in the background the first time they are seen; until it is ready,
+        or once the catalog changes in place, requests are sharded across
+        threads instead.
+        """
+        if isinstance(catalog, MappedCatalog):
+            try:
+                same_file = _file_id(catalog.path) == catalog.file_id
+            except OSError:
+                same_file = False
+            return (catalog.path, catalog.file_id) if same_file else None
+        if not isinstance(catalog, OutfitCatalog):
+            return None
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0]() is catalog and snapshot[1] == catalog.version:
+            return snapshot[2]
+        key = (id(catalog), catalog.version)
+        with self._snapshot_lock:
+            if self._snapshot_pending == key or not matrix.live.all():
+                return None
+            self._snapshot_pending = key
+        self.threads.submit(self._write_snapshot, catalog, catalog.version)
+        return None
+
+    def _write_snapshot(self, catalog: OutfitCatalog, version: int):
+        try:
+            if self._snapshot_dir is None:
+                self._snapshot_dir = tempfile.mkdtemp(prefix="outfitgenie-scoring-")
+            self._snapshots_written += 1
+            path = os.path.join(self._snapshot_dir, f"catalog-{self._snapshots_written}{COLUMNAR_SUFFIX}")
+            write_columnar_catalog(catalog.matrix.outfits, path)
+            if catalog.version != version:
+                # Changed while writing: rows may not line up
+                os.remove(path)
+                return
+            previous = self._snapshot
+            self._snapshot = (weakref.ref(catalog), version, (path, _file_id(path)))
+            if previous is not None:
+                # Workers that mapped it keep a valid mapping
+                self._remove(previous[2][0])
+        except Exception:
+            logger.exception("Could not write a catalog snapshot for process scoring")
+        finally:
+            with self._snapshot_lock:
+                if self._snapshot_pending == (id(catalog), version):
+                    self._snapshot_pending = None
+
+    def _remove(self, path: str):
+        if self._snapshot_dir is not None and os.path.dirname(path) == self._snapshot_dir:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    async def _run_shards(
+        self,
+        executor: Executor,
+        function,
+        target: Any,
+        shards: List[Tuple[int, int]],
+        weather_keywords: Optional[Tuple[str, ...]],
+        user_preferences: Dict[str, Any],
+        top_k: int,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        loop = asyncio.get_running_loop()
+        self.shard_tasks += len(shards)
+        prefix = (self.model, target) if function is score_shard else (target,)
+        return await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, function, *prefix, start, stop, weather_keywords, user_preferences, top_k
+                )
+                for start, stop in shards
+            )
+        )
+
+    async def recommend(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Dict[str, Any],
+        occasion: str,
+        outfit_database: OutfitSource,
+    ) -> List[Dict[str, Any]]:
+        """
+        OutfitRecommendationModel.recommend, off the event loop
+
+        Returns the same outfits in the same order as the model would.
+        """
+        started = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                self.requests["inline"] += 1
+                return self.model.recommend(user_preferences, weather_data, occasion, outfit_database)
+
+            matrix = self.model._get_matrix(outfit_database)
+            if len(matrix) < self.shard_min_size or self._has_index(outfit_database, matrix):
+                self.requests["thread"] += 1
+                # Run in the request's context, as asyncio.to_thread does, so stage
+                # observations see its context variables
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.threads,
+                    contextvars.copy_context().run,
+                    self.model.recommend,
+                    user_preferences,
+                    weather_data,
+                    occasion,
+                    outfit_database,
+                )
+            return await self._recommend_sharded(user_preferences, weather_data, outfit_database, matrix)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    async def _recommend_sharded(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Dict[str, Any],
+        outfit_database: OutfitSource,
+        matrix: CatalogMatrix,
+    ) -> List[Dict[str, Any]]:
+        # A materialized-table answer only scores a few hundred rows; no shards needed
+        outfits = self.model.table_recommend(user_preferences, weather_data, outfit_database, TOP_K)
+        if outfits is not None:
+            self.requests["table"] += 1
+            return outfits
+
+        observe = self.model.stage_observer
+        started = time.perf_counter()
+        weather_category = self.model._get_weather_category(weather_data.get("temperature", 20))
+        keywords = self._weather_keywords(outfit_database, matrix, weather_category)
+        shards = self._shard_bounds(len(matrix))
+
+        parts = None
+        source = self._snapshot_source(outfit_database, matrix) if self.mode == "process" else None
+        if source is not None:
+            try:
+                parts = await self._run_shards(
+                    self.processes, _process_shard, source, shards, keywords, user_preferences, TOP_K
+                )
+                self.requests["sharded_process"] += 1
+            except StaleSnapshotError:
+                self.process_fallbacks += 1
+            except BrokenExecutor:
+                # A worker died (BrokenProcessPool); start a fresh pool on the next request
+                logger.exception("Scoring process pool broke; scoring on threads")
+                self._processes = None
+                self.process_fallbacks += 1
+        if parts is None:
+            parts = await self._run_shards(
+                self.threads, score_shard, matrix, shards, keywords, user_preferences, TOP_K
+            )
+            self.requests["sharded_thread"] += 1
+        rows, scores = merge_top_k(parts, TOP_K)
+        if observe is not None:
+            started = self.model._lap(observe, "sharded_scoring", started)
+
+        outfits = self.model.materialize(matrix, rows, scores)
+        if observe is not None:
+            self.model._lap(observe, "materialize", started)
+        return outfits
+
+    async def recommend_batch(
+        self,
+        requests: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+        outfit_database: OutfitSource,
+    ) -> List[List[Dict[str, Any]]]:
+        """OutfitRecommendationModel.recommend_batch, in the thread pool unless inline"""
+        if self.mode == "inline":
+            return self.model.recommend_batch(requests, outfit_database)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.threads, contextvars.copy_context().run, self.model.recommend_batch, requests, outfit_database
+        )
+
+    async def rank(
+        self,
+        user_preferences: Dict[str, Any],
+        weather_data: Optional[Dict[str, Any]],
+        occasion: str,
+        outfit_database: OutfitSource,
+        rows: Optional[np.ndarray] = None,
+    ) -> Ranking:
+        """OutfitRecommendationModel.rank, in the thread pool unless inline"""
+        if self.mode == "inline":
+            return self.model.rank(user_preferences, weather_data, occasion, outfit_database, rows)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.threads,
+            contextvars.copy_context().run,
+            self.model.rank,
+            user_preferences,
+            weather_data,
+            occasion,
+            outfit_database,
+            rows,
+        )
+
+    def close(self):
+        """Shut the pools down and delete snapshots this pool wrote"""
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        self._snapshot = None
+        if self._owns_snapshot_dir and self._snapshot_dir is not None:
+            shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+            self._snapshot_dir = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration and request counters"""
+        total = sum(self.requests.values())
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "shards": self.shards,
+            "shard_min_size": self.shard_min_size,
+            "requests": dict(self.requests),
+            "shard_tasks": self.shard_tasks,
+            "process_fallbacks": self.process_fallbacks,
+            "mean_ms": round(self.seconds / total * 1000, 3) if total else 0.0,
+            "snapshot": self._snapshot[2][0] if self._snapshot is not None else None,
+        }
@@ -1,15 +1,108 @@
 """
 Style classification logic
+Currently a keyword model over text descriptions, scored a whole batch at a
+time so a learned model can replace it behind the same batch interface
 """
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Keywords that indicate each style in an item or outfit description
+STYLE_KEYWORDS = {
+    "Formal": ["suit", "tuxedo", "gown", "tie", "bow", "oxfords", "cufflinks", "evening", "tailored"],
+    "Business": ["blazer", "dress shirt", "slacks", "pencil", "briefcase", "office", "button-down"],
+    "Smart Casual": ["chinos", "loafers", "polo", "cardigan", "knit", "desert boots"],
+    "Casual": ["t-shirt", "tee", "jeans", "denim", "sneakers", "hoodie", "shorts", "sweatshirt"],
+    "Sporty": ["joggers", "running", "athletic", "leggings", "trainers", "track", "gym", "sports"],
+    "Party": ["sequin", "glitter", "cocktail", "satin", "velvet", "metallic", "club"],
+    "Outdoor": ["parka", "hiking", "fleece", "waterproof", "boots", "rain", "puffer", "windbreaker"],
+}
+
+DEFAULT_STYLE = "Casual"
+
+_TOKEN = re.compile(r"[a-z]+(?:-[a-z]+)?")
+
+# (batch of inputs) -> one result dict per input
+ClassifierBackend = Callable[[Sequence[Any]], List[Dict[str, Any]]]
+
 
 class StyleClassifier:
     """
     Classifies and categorizes fashion styles
     """
 
-    def __init__(self):
-        # TODO: Load style classification model
-        pass
+    def __init__(self, backend: Optional[ClassifierBackend] = None):
+        """
+        Args:
+            backend: Batched inference function; defaults to the keyword model
+        """
+        self.styles = list(STYLE_KEYWORDS)
+        self.vocabulary: Dict[str, int] = {}
+        # Phrases are matched as single terms alongside single words
+        self.phrases: List[str] = []
+        rows: List[List[int]] = []
+        for style_index, keywords in enumerate(STYLE_KEYWORDS.values()):
+            for keyword in keywords:
+                if " " in keyword:
+                    self.phrases.append(keyword)
+                term = self.vocabulary.setdefault(keyword, len(self.vocabulary))
+                rows.append([term, style_index])
+
+        # term x style weight matrix, built once
+        self.weights = np.zeros((len(self.vocabulary), len(self.styles)), dtype=np.float32)
+        for term, style_index in rows:
+            self.weights[term, style_index] = 1.0
+        self.backend: ClassifierBackend = backend or self._keyword_batch
+
+    def _terms(self, text: str) -> List[int]:
+        lowered = text.lower()
+        terms = [self.vocabulary[token] for token in _TOKEN.findall(lowered) if token in self.vocabulary]
+        terms.extend(self.vocabulary[phrase] for phrase in self.phrases if phrase in lowered)
+        return terms
+
+    def _keyword_batch(self, items: Sequence[Any]) -> List[Dict[str, Any]]:
+        """One vectorized pass over a batch of text descriptions"""
+        counts = np.zeros((len(items), len(self.vocabulary)), dtype=np.float32)
+        for row, item in enumerate(items):
+            if isinstance(item, str):
+                np.add.at(counts[row], self._terms(item), 1.0)
+        scores = counts @ self.weights
+
+        results = []
+        totals = scores.sum(axis=1)
+        best = scores.argmax(axis=1)
+        for row in range(len(items)):
+            if totals[row] == 0:
+                results.append({"style": DEFAULT_STYLE, "confidence": 0.0, "scores": {}})
+                continue
+            probabilities = scores[row] / totals[row]
+            results.append(
+                {
+                    "style": self.styles[int(best[row])],
+                    "confidence": round(float(probabilities[best[row]]), 3),
+                    "scores": {
+                        style: round(float(value), 3)
+                        for style, value in zip(self.styles, probabilities)
+                        if value > 0
+                    },
+                }
+            )
+        return results
+
+    def classify_batch(self, items: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Classify several items in one forward pass
+
+        Args:
+            items: Text descriptions (images are not supported by the keyword model)
+
+        Returns:
+            One dict per item with 'style', 'confidence' and per-style 'scores'
+        """
+        if not items:
+            return []
+        return self.backend(items)
 
     def classify_style(self, image_or_description):
         """
@@ -21,5 +114,4 @@ class StyleClassifier:
         Returns:
             Style classification result
         """
-        # TODO: Implement style classification
-        pass
+        return self.classify_batch([image_or_description])[0]
@@ -0,0 +1,280 @@
+"""
+Materialized recommendation tables
+Once a request is normalized, the only part of its score that is not a
+color term is the base confidence plus the style boost, and that depends
+on nothing but the weather category and which catalog styles the request's
+style keywords match. The tables precompute, for every such bucket, the
+rows with the highest color-independent score; a request re-scores only
+its bucket's rows with its own colors and falls back to full scoring when
+the precomputed rows cannot be shown to contain its top k
+"""
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .scoring import (
+    COLOR_HARMONY_BOOST,
+    COLOR_MATCH_BOOST,
+    STYLE_BOOST,
+    CatalogMatrix,
+    round_scores,
+    top_k_indices,
+)
+
+# Absorbs floating-point differences between the bound and the scorer's sums
+_BOUND_EPSILON = 1e-9
+# Largest color bonus the saturation prefix is built for: four preferred
+# colors plus full palette harmony
+PREFIX_BONUS = 4 * COLOR_MATCH_BOOST + COLOR_HARMONY_BOOST
+
+
+class Bucket(NamedTuple):
+    """
+    Precomputed rows of one (weather category, matched styles) bucket
+
+    Besides the rows with the best color-independent scores, a bucket holds
+    the first rows in catalog order that the color bonus could push to the
+    1.0 cap, since capped scores tie and ties go to the lowest row.
+    """
+
+    rows: np.ndarray  # ascending catalog rows
+    floor: float  # best color-independent score of any row left out (-inf if none)
+    prefix_end: int  # every row up to here that could reach the cap is included
+    prefix_floor: float  # best color-independent score left out up to prefix_end
+
+
+def merge_buckets(buckets: Sequence[Bucket]) -> Bucket:
+    """
+    Bucket for a request matching the union of several buckets' styles
+
+    The union's color-independent score is the per-row maximum of the
+    buckets' scores, so its best rows are among theirs and its floors are
+    the largest of theirs.
+    """
+    if len(buckets) == 1:
+        return buckets[0]
+    return Bucket(
+        np.unique(np.concatenate([bucket.rows for bucket in buckets])),
+        max(bucket.floor for bucket in buckets),
+        min(bucket.prefix_end for bucket in buckets),
+        max(bucket.prefix_floor for bucket in buckets),
+    )
+
+
+def _build_bucket(rows: np.ndarray, scores: np.ndarray, depth: int) -> Bucket:
+    """
+    Bucket from a category's rows and their color-independent scores
+
+    Args:
+        rows: Ascending weather-appropriate rows
+        scores: Color-independent score per row (modified in place)
+        depth: Rows kept by score, and rows kept in the saturation prefix
+    """
+    keep = np.zeros(rows.size, dtype=bool)
+    keep[top_k_indices(scores, depth)] = True
+    prefix = np.flatnonzero(scores >= 1.0 - PREFIX_BONUS)
+    if prefix.size > depth:
+        prefix_end = int(rows[prefix[depth - 1]])
+        prefix = prefix[:depth]
+    else:
+        prefix_end = int(rows[-1]) if rows.size else -1
+    keep[prefix] = True
+
+    left_out = np.where(keep, -np.inf, scores)
+    floor = float(left_out.max()) if rows.size else -np.inf
+    prefix_rows = int(np.searchsorted(rows, prefix_end, side="right"))
+    prefix_floor = float(left_out[:prefix_rows].max()) if prefix_rows else -np.inf
+    return Bucket(rows[keep], floor, prefix_end, prefix_floor)
+
+
+def _bound(floor: float, bonus: float) -> float:
+    """Highest score a row with color-independent score ``floor`` can reach"""
+    if floor == -np.inf:
+        return -np.inf
+    bound = np.clip(np.array([floor + bonus + _BOUND_EPSILON]), 0.0, 1.0)
+    return float(round_scores(bound)[0])
+
+
+def style_tokens(matrix: CatalogMatrix, extra: Iterable[str] = ()) -> List[str]:
+    """
+    Style keywords worth a bucket: every catalog style, each word of it, and ``extra``
+    """
+    tokens = set()
+    for style in list(matrix.style_vocab) + [token.lower() for token in extra]:
+        if style:
+            tokens.add(style)
+            tokens.update(style.split())
+    return sorted(tokens)
+
+
+class RecommendationTables:
+    """
+    Per-bucket shortlists of a catalog's best rows before color scoring
+
+    A bucket is keyed by weather category and by the set of catalog style
+    codes the request's style keywords match, so aliases and keywords that
+    match the same styles share a bucket and keywords matching nothing use
+    the no-style bucket.
+
+    A shortlist is exact for a request when its k-th best re-scored row
+    beats the best score any row left out could reach: the bucket's
+    ``floor`` plus the largest color bonus the request can add.
+    """
+
+    def __init__(
+        self,
+        buckets: Dict[Tuple[str, Tuple[int, ...]], Bucket],
+        depth: int,
+        size: int,
+        styles: int,
+        build_seconds: float = 0.0,
+    ):
+        self.buckets = buckets
+        self.depth = depth
+        self.size = size
+        self.styles = styles
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+        # Catalog version the tables were built from (see matches)
+        self.catalog_version = 0
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.uncertified = 0
+
+    @classmethod
+    def build(
+        cls,
+        matrix: CatalogMatrix,
+        weather_rows: Dict[str, np.ndarray],
+        tokens: Iterable[str],
+        depth: int = 256,
+    ) -> "RecommendationTables":
+        """
+        Precompute every bucket of a catalog
+
+        Args:
+            matrix: Encoded catalog
+            weather_rows: Weather category -> ascending weather-appropriate rows
+            tokens: Style keywords to build buckets for; the no-style bucket
+                is always built
+            depth: Rows kept per bucket
+
+        Returns:
+            RecommendationTables
+        """
+        started = time.perf_counter()
+        style_sets = {()}
+        for token in tokens:
+            style_sets.add(tuple(np.flatnonzero(matrix.style_matches([token])).tolist()))
+
+        base_scores = matrix.base_scores
+        style_codes = matrix.style_codes
+        buckets: Dict[Tuple[str, Tuple[int, ...]], Bucket] = {}
+        for weather_category, rows in weather_rows.items():
+            base = base_scores[rows]
+            codes = style_codes[rows]
+            for style_set in style_sets:
+                matched = np.zeros(len(matrix.style_vocab), dtype=bool)
+                matched[list(style_set)] = True
+                scores = base + np.where(matched[codes], STYLE_BOOST, 0.0)
+                buckets[(weather_category, style_set)] = _build_bucket(rows, scores, depth)
+
+        return cls(buckets, depth, len(matrix), len(matrix.style_vocab), time.perf_counter() - started)
+
+    def matches(self, matrix: CatalogMatrix, version: int = 0) -> bool:
+        """Whether the tables still describe this catalog"""
+        return (
+            len(matrix) == self.size
+            and len(matrix.style_vocab) == self.styles
+            and version == self.catalog_version
+        )
+
+    def bucket(self, matrix: CatalogMatrix, weather_category: str, user_styles: List[str]) -> Optional[Bucket]:
+        """
+        Bucket for a request, or None when it was not precomputed
+
+        Requests with several styles get the merge of their styles' buckets.
+
+        Args:
+            matrix: Encoded catalog the tables were built from
+            weather_category: Request's weather category
+            user_styles: Preferred styles
+        """
+        self.lookups += 1
+        buckets = []
+        for style in user_styles or [""]:
+            style_set = tuple(np.flatnonzero(matrix.style_matches([style])).tolist()) if style else ()
+            bucket = self.buckets.get((weather_category, style_set))
+            if bucket is None:
+                self.misses += 1
+                return None
+            buckets.append(bucket)
+        return merge_buckets(buckets)
+
+    def certify(
+        self,
+        matrix: CatalogMatrix,
+        bucket: Bucket,
+        top_rows: np.ndarray,
+        top_scores: np.ndarray,
+        user_colors: List[str],
+        harmony: bool,
+        top_k: int,
+    ) -> bool:
+        """
+        Whether a bucket's re-scored top k is also the catalog's top k
+
+        A row left out scores at most its color-independent score plus the
+        largest color bonus: one boost per preferred color the catalog knows
+        (avoided colors only subtract) and the full harmony boost. The top k
+        is exact when that bound is below the k-th score, or equal to it
+        with every left-out row that could tie placed after the k-th row.
+
+        Args:
+            matrix: Encoded catalog
+            bucket: Bucket that was re-scored
+            top_rows: Best re-scored rows, highest score first
+            top_scores: Their scores
+            user_colors: Preferred colors of the request
+            harmony: Whether a palette-harmony term was added
+            top_k: Number of results requested
+        """
+        if bucket.floor == -np.inf:
+            # The bucket holds every weather-appropriate row
+            exact = True
+        elif top_scores.size < top_k:
+            exact = False
+        else:
+            known = sum(1 for color in user_colors if color.lower() in matrix.color_vocab)
+            bonus = known * COLOR_MATCH_BOOST + (COLOR_HARMONY_BOOST if harmony else 0.0)
+            kth_score = float(top_scores[top_k - 1])
+            bound = _bound(bucket.floor, bonus)
+            exact = kth_score > bound or (
+                kth_score == bound
+                and int(top_rows[top_k - 1]) <= bucket.prefix_end
+                and _bound(bucket.prefix_floor, bonus) < kth_score
+            )
+        if exact:
+            self.hits += 1
+        else:
+            self.uncertified += 1
+        return exact
+
+    def stats(self) -> Dict[str, Any]:
+        """Table shape, age and lookup counters"""
+        return {
+            "buckets": len(self.buckets),
+            "depth": self.depth,
+            "rows": self.size,
+            "catalog_version": self.catalog_version,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncertified": self.uncertified,
+            "hit_ratio": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "bytes": int(sum(bucket.rows.nbytes for bucket in self.buckets.values())),
+        }
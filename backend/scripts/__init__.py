@@ -0,0 +1,3 @@
+"""
+Maintenance and tooling scripts (run from the backend directory with python -m)
+"""
@@ -0,0 +1,73 @@
+"""
+Measure ANN candidate retrieval against exhaustive scoring
+
+Builds (or loads) the index for a catalog file, or for a synthetic catalog,
+and reports recall@k and latency of both paths for a set of requests
+
+Usage:
+    python -m scripts.ann_recall --size 200000 --queries 500
+    python -m scripts.ann_recall --catalog models/catalog.ogcat --nprobe 16
+"""
+import argparse
+import json
+import time
+
+from benchmarks.synthetic import OCCASIONS, generate_catalog, generate_profiles, generate_weather
+from config.settings import settings
+from models.ann import IVFIndex, attach_index, measure_recall
+from models.catalog import OutfitCatalog
+from models.catalog_store import CatalogStore
+from models.outfit_model import OutfitRecommendationModel
+from utils.preprocessing import preprocess_user_preferences, preprocess_weather_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall of ANN retrieval against exhaustive scoring")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--catalog", help="Catalog file (any format CatalogStore loads)")
+    source.add_argument("--size", type=int, default=200_000, help="Synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=200, help="Requests to compare")
+    parser.add_argument("--k", type=int, default=5, help="Recommendations compared per request")
+    parser.add_argument("--candidates", type=int, default=settings.ann_candidates)
+    parser.add_argument("--nprobe", type=int, default=settings.ann_nprobe)
+    parser.add_argument("--lists", type=int, help="Index cells (default: automatic)")
+    parser.add_argument("--index", help="Load/save the index at this path (default: build in memory)")
+    args = parser.parse_args()
+
+    if args.catalog:
+        catalog = CatalogStore(args.catalog).load()
+    else:
+        catalog = OutfitCatalog(generate_catalog(args.size))
+
+    started = time.perf_counter()
+    if args.index:
+        index = attach_index(
+            catalog, args.index, min_size=0, candidates=args.candidates, nprobe=args.nprobe, n_lists=args.lists
+        )
+    else:
+        matrix = catalog.matrix if isinstance(catalog, OutfitCatalog) else catalog
+        index = IVFIndex.build(
+            matrix,
+            getattr(catalog, "weather_rules", None),
+            n_lists=args.lists,
+            candidates=args.candidates,
+            nprobe=args.nprobe,
+        )
+        index.catalog_version = getattr(catalog, "version", 0)
+        catalog.ann_index = index
+    prepared = time.perf_counter() - started
+
+    requests = [
+        (preprocess_user_preferences(profile), preprocess_weather_data(weather), OCCASIONS[i % len(OCCASIONS)])
+        for i, (profile, weather) in enumerate(
+            zip(generate_profiles(args.queries), generate_weather(args.queries))
+        )
+    ]
+    report = measure_recall(OutfitRecommendationModel(), catalog, requests, k=args.k)
+    report["index_seconds"] = round(prepared, 3)
+    report["index"] = index.stats()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
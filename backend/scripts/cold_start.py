@@ -0,0 +1,128 @@
+"""
+Measure time-to-first-request and time-to-ready of a fresh API process
+
+Starts uvicorn the way the deployment does, then polls the liveness and
+readiness endpoints until each answers 200. Time-to-first-request is what
+a cold worker costs before it can answer anything (interpreter start,
+imports, app construction); time-to-ready adds the background catalog
+load and warm-up.
+
+Usage:
+    python -m scripts.cold_start
+    python -m scripts.cold_start --runs 5 --budget-ms 2000 --ready-budget-ms 10000
+
+Exits with status 1 when the median of either time is over its budget.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIVENESS_PATH = "/api/v1/health"
+READINESS_PATH = "/api/v1/health/ready"
+POLL_INTERVAL = 0.005
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _status(url: str) -> Optional[int]:
+    """HTTP status of a GET, or None when nothing is listening yet"""
+    try:
+        with urllib.request.urlopen(url, timeout=1.0) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout):
+        return None
+
+
+def measure(timeout: float = 60.0, env: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Start one API process and time its first answered request and readiness
+
+    Args:
+        timeout: Seconds to wait for readiness
+        env: Extra environment variables for the process
+
+    Returns:
+        Dict with first_request_ms and ready_ms, measured from process spawn
+
+    Raises:
+        RuntimeError: The process exited or did not get ready in time
+    """
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        first_request = None
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"API process exited:\n{process.stderr.read().decode()[-2000:]}")
+            if first_request is None:
+                if _status(base_url + LIVENESS_PATH) == 200:
+                    first_request = time.perf_counter() - started
+                    continue
+            elif _status(base_url + READINESS_PATH) == 200:
+                return {
+                    "first_request_ms": first_request * 1000.0,
+                    "ready_ms": (time.perf_counter() - started) * 1000.0,
+                }
+            time.sleep(POLL_INTERVAL)
+        raise RuntimeError(f"API process not ready after {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold start time of the API process")
+    parser.add_argument("--runs", type=int, default=3, help="Processes started; medians are reported")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for readiness per run")
+    parser.add_argument("--budget-ms", type=float, help="Fail when time-to-first-request exceeds this")
+    parser.add_argument("--ready-budget-ms", type=float, help="Fail when time-to-ready exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    runs = [measure(args.timeout) for _ in range(max(1, args.runs))]
+    result = {
+        name: round(statistics.median(run[name] for run in runs), 1) for name in ("first_request_ms", "ready_ms")
+    }
+    if args.json:
+        print(json.dumps({**result, "runs": runs}, indent=2))
+    else:
+        for run in runs:
+            print(f"first request {run['first_request_ms']:8.1f} ms   ready {run['ready_ms']:8.1f} ms")
+        print(f"median        {result['first_request_ms']:8.1f} ms   ready {result['ready_ms']:8.1f} ms")
+
+    failed = False
+    for name, budget in (("first_request_ms", args.budget_ms), ("ready_ms", args.ready_budget_ms)):
+        if budget is not None and result[name] > budget:
+            print(f"{name} {result[name]:.1f} is over the {budget:.0f} ms budget", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+"""
+Convert a JSON, CSV or Parquet catalog into the memory-mapped columnar format
+
+Usage:
+    python -m scripts.convert_catalog models/catalog.json models/catalog.ogcat
+"""
+import argparse
+
+from models.catalog_store import load_catalog_file
+from models.columnar import COLUMNAR_SUFFIX, write_columnar_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a catalog file to the columnar format")
+    parser.add_argument("source", help="JSON, CSV or Parquet catalog")
+    parser.add_argument("destination", help=f"Output file (conventionally *{COLUMNAR_SUFFIX})")
+    args = parser.parse_args()
+
+    records = load_catalog_file(args.source)
+    write_columnar_catalog(records, args.destination)
+    print(f"Wrote {len(records)} outfits to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Report what importing a module costs, per imported module
+
+Runs ``python -X importtime`` in fresh interpreters and lists the slowest
+modules by cumulative and self time, and the self time per top-level
+package. The fastest of several runs is kept per module, so the first
+run's bytecode compilation does not count.
+
+Usage:
+    python -m scripts.import_profile
+    python -m scripts.import_profile models.scoring_pool --top 15
+    python -m scripts.import_profile --budget-ms 1500
+
+Exits with status 1 when the import takes longer than ``--budget-ms``.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ImportTime(NamedTuple):
+    """One line of ``-X importtime`` output, in microseconds"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def _import_names(module: str) -> List[str]:
+    """The module and its parent packages, each imported at the top level"""
+    parts = module.split(".")
+    return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def profile_once(module: str) -> List[ImportTime]:
+    """
+    Import times of every module loaded by ``import <module>`` in a new
+    interpreter, leaving out what the interpreter imports at startup
+
+    Raises:
+        RuntimeError: The import failed
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    targets = set(_import_names(module))
+    times: List[ImportTime] = []
+    # A top-level entry is printed after everything it imported
+    subtree: List[ImportTime] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        subtree.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+        if depth == 0:
+            if subtree[-1].module in targets:
+                times.extend(subtree)
+            subtree = []
+    return times
+
+
+def profile(module: str, runs: int = 3) -> Dict[str, ImportTime]:
+    """
+    Fastest import time per module over several runs
+
+    Returns:
+        Module name -> ImportTime
+    """
+    best: Dict[str, ImportTime] = {}
+    for _ in range(runs):
+        for entry in profile_once(module):
+            if entry.module not in best or entry.cumulative_us < best[entry.module].cumulative_us:
+                best[entry.module] = entry
+    return best
+
+
+def total_ms(module: str, times: Dict[str, ImportTime]) -> float:
+    """Time taken by ``import <module>`` including its dependencies, in milliseconds"""
+    # Parent packages are imported before the module and reported separately
+    names = _import_names(module)
+    return sum(times[name].cumulative_us for name in names if name in times) / 1000.0
+
+
+def by_package(times: Dict[str, ImportTime]) -> Dict[str, float]:
+    """Self time per top-level package, in milliseconds, slowest first"""
+    packages: Dict[str, float] = defaultdict(float)
+    for entry in times.values():
+        packages[entry.module.split(".")[0]] += entry.self_us / 1000.0
+    return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+
+def format_report(module: str, times: Dict[str, ImportTime], top: int) -> str:
+    lines = [f"import {module}: {total_ms(module, times):.1f} ms, {len(times)} modules", ""]
+    lines.append(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    slowest = sorted(times.values(), key=lambda entry: entry.cumulative_us, reverse=True)[:top]
+    for entry in slowest:
+        lines.append(f"{entry.cumulative_us / 1000:>14.1f}{entry.self_us / 1000:>10.1f}  {entry.module}")
+    lines.extend(["", f"{'self ms':>14}  package"])
+    for package, ms in list(by_package(times).items())[:top]:
+        lines.append(f"{ms:>14.1f}  {package}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-module import cost")
+    parser.add_argument("module", nargs="?", default="api.main", help="Module to import (default api.main)")
+    parser.add_argument("--runs", type=int, default=3, help="Interpreters started; the fastest time is kept")
+    parser.add_argument("--top", type=int, default=25, help="Modules and packages listed")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the import takes longer")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    times = profile(args.module, max(1, args.runs))
+    total = total_ms(args.module, times)
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "module": args.module,
+                    "total_ms": round(total, 3),
+                    "packages_ms": {name: round(ms, 3) for name, ms in by_package(times).items()},
+                    "modules": [entry._asdict() for entry in times.values()],
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(format_report(args.module, times, args.top))
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(
+            f"\nimport {args.module} took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Replay captured requests against a candidate model version
+
+Reads a request capture (REQUEST_CAPTURE_FILE, see utils.capture), scores
+every request with the candidate and with the current model in a process
+pool, one worker per core, and reports each model's throughput and latency
+percentiles plus the ranking drift between them: top-k overlap, Spearman
+rank correlation of the two top-k lists, and how often the top outfit or
+the weather category changed.
+
+The candidate is the current model with overrides, given as a JSON file
+in the OutfitRecommendationModel.config() layout and/or ``--set`` options:
+
+    {"version": "1.1.0", "weights": {"style_boost": 0.12},
+     "temperature_thresholds": {"cold": 14}}
+
+Usage:
+    python -m scripts.replay captures.ndjson.gz --set weights.style_boost=0.12
+    python -m scripts.replay captures.ndjson.gz --candidate candidate.json --workers 4 --json
+    python -m scripts.replay captures.ndjson.gz --candidate candidate.json --min-overlap 0.9
+
+Exits with status 1 when the mean top-k overlap or rank correlation is
+below ``--min-overlap`` / ``--min-correlation``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.harness import percentile
+from config.settings import settings
+from models.catalog_store import CatalogStore
+from models.outfit_model import OutfitRecommendationModel
+from utils.capture import CapturedRequest, read_capture
+from utils.preprocessing import STYLE_ALIASES
+
+ROLES = ("candidate", "baseline")
+
+# Per-process state of replay workers
+_worker_catalog = None
+_worker_models: Dict[str, OutfitRecommendationModel] = {}
+
+
+def _prepare(catalog, model: OutfitRecommendationModel):
+    """Attach recommendation tables and the ANN index the way the API does"""
+    if settings.recommendation_tables_enabled:
+        catalog.recommendation_tables = model.build_tables(
+            catalog, STYLE_ALIASES.values(), depth=settings.recommendation_table_depth
+        )
+    if settings.ann_enabled:
+        from models.ann import attach_index
+
+        attach_index(
+            catalog,
+            os.path.join(settings.model_path, settings.ann_index_file),
+            min_size=settings.ann_min_catalog_size,
+            candidates=settings.ann_candidates,
+            nprobe=settings.ann_nprobe,
+        )
+
+
+def _init_worker(catalog_path: str, configs: Dict[str, Dict[str, Any]], use_index: bool):
+    global _worker_catalog, _worker_models
+    _worker_models = {role: OutfitRecommendationModel.from_config(config) for role, config in configs.items()}
+    _worker_catalog = CatalogStore(catalog_path).load()
+    if use_index:
+        # Tables and the index are built for the default weights, as in the API
+        _prepare(_worker_catalog, OutfitRecommendationModel())
+
+
+def _warm(_: int) -> int:
+    """Start a worker and run each model once"""
+    for model in _worker_models.values():
+        model.recommend({"styles": ["casual"], "colors": ["blue"]}, {"temperature": 20.0}, "casual", _worker_catalog)
+    return os.getpid()
+
+
+def _replay_chunk(
+    role: str, requests: Sequence[CapturedRequest], top_k: int
+) -> Tuple[List[int], List[List[str]]]:
+    """
+    Score requests with one model in a worker
+
+    Returns:
+        (latency in nanoseconds, ids of the top ``top_k`` outfits) per request
+    """
+    model = _worker_models[role]
+    latencies = []
+    rankings = []
+    for _, user_preferences, weather, occasion in requests:
+        started = time.perf_counter_ns()
+        outfits = model.recommend(user_preferences, weather, occasion, _worker_catalog)
+        latencies.append(time.perf_counter_ns() - started)
+        rankings.append([outfit.get("id") for outfit in outfits[:top_k]])
+    return latencies, rankings
+
+
+def rank_correlation(baseline: Sequence[str], candidate: Sequence[str]) -> float:
+    """
+    Spearman correlation of two top-k lists over the outfits in either
+
+    An outfit missing from one list ranks just below its last entry there.
+    """
+    items = list(dict.fromkeys([*baseline, *candidate]))
+    if not items:
+        return 1.0
+    ranks = np.array(
+        [
+            [ranking.index(item) if item in ranking else len(ranking) for item in items]
+            for ranking in (list(baseline), list(candidate))
+        ],
+        dtype=np.float64,
+    )
+    if (ranks[0] == ranks[1]).all():
+        return 1.0
+    if ranks[0].std() == 0 or ranks[1].std() == 0:
+        return 0.0
+    return float(np.corrcoef(ranks)[0, 1])
+
+
+def drift(
+    requests: Sequence[CapturedRequest],
+    baseline: Sequence[Sequence[str]],
+    candidate: Sequence[Sequence[str]],
+    models: Dict[str, OutfitRecommendationModel],
+    top_k: int,
+) -> Dict[str, Any]:
+    """Ranking drift of the candidate against the baseline over all requests"""
+    overlaps = []
+    correlations = []
+    overlap_counts = [0] * (top_k + 1)
+    identical = top_changed = category_changed = 0
+    for request, base, cand in zip(requests, baseline, candidate):
+        shared = len(set(base) & set(cand))
+        overlap_counts[shared] += 1
+        overlaps.append(shared / top_k)
+        correlations.append(rank_correlation(base, cand))
+        identical += list(base) == list(cand)
+        top_changed += bool(base or cand) and base[:1] != cand[:1]
+        temperature = request.weather.get("temperature", 20)
+        category_changed += models["baseline"]._get_weather_category(temperature) != models[
+            "candidate"
+        ]._get_weather_category(temperature)
+    count = max(1, len(overlaps))
+    return {
+        f"mean_top{top_k}_overlap": round(sum(overlaps) / count, 4),
+        "mean_rank_correlation": round(sum(correlations) / count, 4),
+        "identical_share": round(identical / count, 4),
+        "top1_changed_share": round(top_changed / count, 4),
+        "weather_category_changed_share": round(category_changed / count, 4),
+        "overlap_distribution": {str(shared): n for shared, n in enumerate(overlap_counts)},
+    }
+
+
+def _summarize(latencies_ns: List[int], elapsed: float) -> Dict[str, float]:
+    latencies_ms = sorted(value / 1e6 for value in latencies_ns)
+    return {
+        "requests": len(latencies_ms),
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies_ms) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies_ms) / max(1, len(latencies_ms)), 4),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 4),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 4),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 4),
+    }
+
+
+def replay(
+    requests: List[CapturedRequest],
+    catalog_path: str,
+    configs: Dict[str, Dict[str, Any]],
+    workers: int = 0,
+    chunk_size: int = 256,
+    top_k: int = 5,
+    use_index: bool = True,
+) -> Dict[str, Any]:
+    """
+    Score the requests with both models across a process pool
+
+    Each model runs over the whole log on its own, so its wall time gives
+    its throughput.
+
+    Args:
+        requests: Captured requests
+        catalog_path: Catalog file, in any format CatalogStore loads
+        configs: Model config per role ("candidate", "baseline")
+        workers: Processes; 0 means one per CPU
+        chunk_size: Requests sent to a worker at a time
+        top_k: Outfits compared per request
+        use_index: Build materialized tables and the ANN index as the API does
+
+    Returns:
+        Report with per-model throughput and latency and the ranking drift
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [requests[i : i + chunk_size] for i in range(0, len(requests), chunk_size)]
+    report: Dict[str, Any] = {"requests": len(requests), "workers": workers, "configs": configs}
+    rankings: Dict[str, List[List[str]]] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(catalog_path, configs, use_index),
+    ) as pool:
+        # Catalog loading and the first call are not timed
+        list(pool.map(_warm, range(workers)))
+        for role in ROLES:
+            started = time.perf_counter()
+            results = list(pool.map(_replay_chunk, [role] * len(chunks), chunks, [top_k] * len(chunks)))
+            elapsed = time.perf_counter() - started
+            report[role] = _summarize([value for latencies, _ in results for value in latencies], elapsed)
+            rankings[role] = [ranking for _, chunk_rankings in results for ranking in chunk_rankings]
+    models = {role: OutfitRecommendationModel.from_config(config) for role, config in configs.items()}
+    report["drift"] = drift(requests, rankings["baseline"], rankings["candidate"], models, top_k)
+    return report
+
+
+def _load_config(path: Optional[str], overrides: Sequence[str]) -> Dict[str, Any]:
+    """Model config from a JSON file plus ``section.name=value`` overrides"""
+    config: Dict[str, Any] = {}
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+    for override in overrides:
+        key, sep, value = override.partition("=")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got {override!r}")
+        if key == "version":
+            config["version"] = value
+            continue
+        section, _, name = key.partition(".")
+        if section not in ("weights", "temperature_thresholds") or not name:
+            raise ValueError(f"Unknown setting {key!r}; use weights.<name> or temperature_thresholds.<category>")
+        config.setdefault(section, {})[name] = float(value)
+    # Validates names
+    return OutfitRecommendationModel.from_config(config).config()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    configs = report["configs"]
+    lines = [
+        f"{report['requests']} requests, {report['workers']} workers",
+        f"baseline  {configs['baseline']['version']}   candidate {configs['candidate']['version']}",
+        "",
+        f"{'':10}{'req/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for role in ROLES:
+        row = report[role]
+        lines.append(
+            f"{role:10}{row['requests_per_sec']:>10.1f}{row['mean_ms']:>10.3f}"
+            f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+        )
+    lines.append("")
+    for name, value in report["drift"].items():
+        lines.append(f"{name:32}{value}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay captured requests against a candidate model")
+    parser.add_argument("capture", help="Request capture file (REQUEST_CAPTURE_FILE)")
+    parser.add_argument(
+        "--catalog",
+        default=os.path.join(settings.model_path, settings.catalog_file),
+        help="Catalog file (default: the API's catalog)",
+    )
+    parser.add_argument("--candidate", help="JSON model config of the candidate")
+    parser.add_argument("--baseline", help="JSON model config of the baseline (default: the current model)")
+    parser.add_argument(
+        "--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+        help="Candidate override, e.g. weights.style_boost=0.12 or temperature_thresholds.cold=14",
+    )
+    parser.add_argument("--workers", type=int, default=0, help="Processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Requests per worker task")
+    parser.add_argument("--limit", type=int, help="Replay only the first N captured requests")
+    parser.add_argument("--k", type=int, default=5, help="Recommendations compared per request")
+    parser.add_argument("--no-index", action="store_true", help="Score without tables or the ANN index")
+    parser.add_argument("--min-overlap", type=float, help="Fail when the mean top-k overlap is lower")
+    parser.add_argument("--min-correlation", type=float, help="Fail when the mean rank correlation is lower")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        configs = {
+            "candidate": _load_config(args.candidate, args.overrides),
+            "baseline": _load_config(args.baseline, []),
+        }
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    requests = list(islice(read_capture(args.capture), args.limit))
+    if not requests:
+        print(f"No requests in {args.capture}", file=sys.stderr)
+        return 1
+
+    report = replay(
+        requests,
+        args.catalog,
+        configs,
+        workers=args.workers,
+        chunk_size=max(1, args.chunk_size),
+        top_k=args.k,
+        use_index=not args.no_index,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+    drift_report = report["drift"]
+    failed = False
+    for name, key, floor in (
+        ("top-k overlap", f"mean_top{args.k}_overlap", args.min_overlap),
+        ("rank correlation", "mean_rank_correlation", args.min_correlation),
+    ):
+        if floor is not None and drift_report[key] < floor:
+            print(f"Mean {name} {drift_report[key]:.4f} is below {floor}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
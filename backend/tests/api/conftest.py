@@ -0,0 +1,52 @@
+"""
+Fixtures for the API tests
+
+Requests go through the full ASGI app (middleware included) without its
+lifespan: each test publishes the catalog it needs.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from models.catalog import OutfitCatalog
+from tests.factories import make_catalog
+
+
+@pytest.fixture
+def app():
+    from api.main import app
+
+    return app
+
+
+@pytest.fixture
+def catalog_store():
+    from api.dependencies.catalog import catalog_store
+
+    return catalog_store
+
+
+@pytest.fixture
+def catalog(catalog_store) -> OutfitCatalog:
+    """A fresh 200-outfit catalog, published (which also empties the response caches)"""
+    return catalog_store.publish(make_catalog())
+
+
+@pytest.fixture
+def run(app):
+    """
+    Run a coroutine function with an HTTP client for the app
+
+    ``run(scenario)`` calls ``scenario(client)`` in a new event loop.
+    """
+
+    def runner(scenario):
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+                return await scenario(client)
+
+        return asyncio.run(main())
+
+    return runner
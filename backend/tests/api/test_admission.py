@@ -0,0 +1,31 @@
+"""
+Tests for the admission middleware's deadline header
+"""
+import pytest
+
+from api.dependencies.admission import admission_controller
+from tests.factories import recommendation_request
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-inf", "0", "-5", "soon"])
+def test_invalid_deadline_is_rejected(catalog, run, value):
+    async def scenario(client):
+        admitted = admission_controller.stats()["routes"].get("recommendations", {}).get("admitted", 0)
+        response = await client.post(
+            "/recommendations", json=recommendation_request(), headers={"X-Deadline-Ms": value}
+        )
+        assert response.status_code == 400
+        assert "X-Deadline-Ms" in response.json()["detail"]
+        assert admission_controller.stats()["routes"].get("recommendations", {}).get("admitted", 0) == admitted
+
+    run(scenario)
+
+
+def test_valid_deadline_is_admitted(catalog, run):
+    async def scenario(client):
+        response = await client.post(
+            "/recommendations", json=recommendation_request(), headers={"X-Deadline-Ms": "5000"}
+        )
+        assert response.status_code == 200
+
+    run(scenario)
@@ -0,0 +1,72 @@
+"""
+Tests for serving a memory-mapped columnar catalog: every recommendation
+route answers as it does for the same outfits held in memory
+"""
+import json
+
+import pytest
+
+from models.catalog import OutfitCatalog
+from models.catalog_store import OutfitRecord
+from models.columnar import MappedCatalog, write_columnar_catalog
+from tests.factories import make_outfits, recommendation_request
+
+OCCASION = "/recommendations/occasion?occasion=date"
+# The colors parameter of the occasion route is read from the JSON body
+COLORS = ["black", "Navy"]
+
+
+@pytest.fixture
+def outfits():
+    return make_outfits(300, seed=8)
+
+
+@pytest.fixture
+def mapped(outfits, tmp_path):
+    path = str(tmp_path / "catalog.ogcat")
+    write_columnar_catalog(outfits, path)
+    return MappedCatalog.open(path)
+
+
+def _in_memory(outfits) -> OutfitCatalog:
+    return OutfitCatalog([OutfitRecord.from_dict(outfit) for outfit in outfits])
+
+
+def _streamed_outfits(response):
+    return [json.loads(line) for line in response.text.splitlines()][:-1]
+
+
+def _responses(client):
+    batch = {"requests": [recommendation_request(occasion=occasion) for occasion in ("date", "party", "formal")]}
+
+    async def scenario():
+        return (
+            (await client.post(OCCASION, json=COLORS)).json(),
+            _streamed_outfits(await client.post(f"{OCCASION}&stream=true", json=COLORS)),
+            (await client.post("/recommendations", json=recommendation_request(occasion="date"))).json(),
+            (await client.post("/recommendations/batch", json=batch)).json(),
+        )
+
+    return scenario()
+
+
+def test_mapped_catalog_color_slots_match_the_in_memory_catalog(outfits, mapped):
+    catalog = _in_memory(outfits)
+    for colors in (["black"], ["Navy", "RED"], ["no-such-color"], []):
+        assert mapped.color_slots(colors) == catalog.color_slots(colors)
+
+
+def test_routes_answer_alike_from_a_mapped_catalog(outfits, mapped, catalog_store, run):
+    catalog_store.publish(_in_memory(outfits))
+    expected = run(_responses)
+
+    catalog_store.publish(mapped)
+    occasion, streamed, single, batch = run(_responses)
+
+    assert occasion == expected[0]
+    assert occasion["colors"] == COLORS
+    assert occasion["recommendations"]
+    assert streamed == expected[1]
+    assert streamed
+    assert single == expected[2]
+    assert batch == expected[3]
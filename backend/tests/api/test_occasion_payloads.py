@@ -0,0 +1,63 @@
+"""
+Tests for occasion responses: ETags, 304s and content negotiation
+"""
+from api.routes.recommendations import occasion_payloads
+from tests.factories import make_catalog
+
+OCCASION = "/recommendations/occasion?occasion=casual"
+
+
+def test_matching_if_none_match_gets_304_without_compressing(catalog, run):
+    async def scenario(client):
+        first = await client.post(OCCASION, headers={"Accept-Encoding": "identity"})
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        compressions = occasion_payloads.compressions
+
+        again = await client.post(OCCASION, headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == f'{etag[:-1]}-gzip"'
+        assert occasion_payloads.compressions == compressions
+
+    run(scenario)
+
+
+def test_gzip_variant_is_compressed_once_and_carries_its_own_etag(catalog, run):
+    async def scenario(client):
+        plain = await client.post(OCCASION, headers={"Accept-Encoding": "identity"})
+        compressions = occasion_payloads.compressions
+        for _ in range(2):
+            response = await client.post(OCCASION, headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert response.headers["etag"] == f'{plain.headers["etag"][:-1]}-gzip"'
+            # httpx decodes the body; it must be the identity body
+            assert response.content == plain.content
+        assert occasion_payloads.compressions == compressions + 1
+
+        # The variant's tag validates too
+        again = await client.post(OCCASION, headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+
+    run(scenario)
+
+
+def test_codings_the_client_refuses_are_not_sent(catalog, run):
+    async def scenario(client):
+        for accept in ("identity", "gzip;q=0", "br;q=0, *;q=0"):
+            response = await client.post(OCCASION, headers={"Accept-Encoding": accept})
+            assert "content-encoding" not in response.headers
+
+    run(scenario)
+
+
+def test_catalog_change_changes_the_etag(catalog, catalog_store, run):
+    async def scenario(client):
+        etag = (await client.post(OCCASION)).headers["etag"]
+        catalog_store.publish(make_catalog(prefix="new_"))
+        response = await client.post(OCCASION, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"].split("-")[0].strip('"') != etag.split("-")[0].strip('"')
+
+    run(scenario)
@@ -0,0 +1,98 @@
+"""
+Tests for streamed occasion responses and their cursors
+"""
+import json
+import threading
+
+from api.dependencies.scoring import outfit_model, scoring_pool
+from tests.factories import make_catalog
+
+STREAM = "/recommendations/occasion?occasion=casual&style=smart&stream=true"
+
+
+def _lines(response):
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return lines[:-1], lines[-1]
+
+
+def test_pages_follow_one_ranking_scored_once(catalog, run, monkeypatch):
+    calls = []
+    rank = outfit_model.rank
+
+    def counting_rank(*args, **kwargs):
+        calls.append(args)
+        return rank(*args, **kwargs)
+
+    monkeypatch.setattr(outfit_model, "rank", counting_rank)
+
+    async def scenario(client):
+        everything, trailer = _lines(await client.post(STREAM))
+        assert trailer["next_cursor"] is None
+        assert trailer["count"] == trailer["total_count"] == len(everything)
+
+        paged, cursor = [], None
+        while True:
+            url = f"{STREAM}&limit=7" + (f"&cursor={cursor}" if cursor else "")
+            page, trailer = _lines(await client.post(url))
+            paged += page
+            cursor = trailer["next_cursor"]
+            if cursor is None:
+                break
+        return everything, paged
+
+    everything, paged = run(scenario)
+    assert paged == everything
+    assert len(calls) == 2  # the full stream, then the first page; later pages resume it
+    scores = [outfit["confidence_score"] for outfit in everything]
+    assert scores == sorted(scores, reverse=True)
+    assert {(outfit["style"], outfit["occasion"]) for outfit in everything} == {("smart", "casual")}
+
+
+def test_cursor_from_another_query_is_rejected(catalog, run):
+    async def scenario(client):
+        _, trailer = _lines(await client.post(f"{STREAM}&limit=5"))
+        cursor = trailer["next_cursor"]
+        other = STREAM.replace("style=smart", "style=sporty")
+        assert (await client.post(f"{other}&limit=5&cursor={cursor}")).status_code == 400
+        assert (await client.post(f"{STREAM}&limit=5&cursor={cursor}")).status_code == 200
+
+    run(scenario)
+
+
+def test_cursor_from_before_a_catalog_change_is_rejected(catalog, catalog_store, run):
+    async def scenario(client):
+        _, trailer = _lines(await client.post(f"{STREAM}&limit=5"))
+        catalog_store.publish(make_catalog(prefix="new_"))
+        response = await client.post(f"{STREAM}&limit=5&cursor={trailer['next_cursor']}")
+        assert response.status_code == 400
+
+    run(scenario)
+
+
+def test_malformed_cursor_is_rejected(catalog, run):
+    async def scenario(client):
+        for cursor in ("abc", "abc:x", "abc:5:wrong"):
+            assert (await client.post(f"{STREAM}&cursor={cursor}")).status_code == 400
+
+    run(scenario)
+
+
+def test_ranking_runs_off_the_event_loop(catalog, run, monkeypatch):
+    threads = []
+    rank = outfit_model.rank
+
+    def recording_rank(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return rank(*args, **kwargs)
+
+    monkeypatch.setattr(outfit_model, "rank", recording_rank)
+    monkeypatch.setattr(scoring_pool, "mode", "thread")
+
+    async def scenario(client):
+        response = await client.post(f"{STREAM}&limit=5")
+        assert response.status_code == 200
+        return threading.current_thread()
+
+    loop_thread = run(scenario)
+    assert len(threads) == 1
+    assert threads[0] is not loop_thread
@@ -0,0 +1,76 @@
+"""
+Tests for the recommendation response cache and request coalescing across
+catalog reloads
+"""
+import asyncio
+
+from api.dependencies.scoring import scoring_pool
+from api.routes.recommendations import occasion_payloads, recommendation_cache, recommendation_flight
+from tests.factories import make_catalog, outfit_ids, recommendation_request
+
+
+def test_repeated_request_is_served_from_the_cache(catalog, run):
+    async def scenario(client):
+        first = await client.post("/recommendations", json=recommendation_request())
+        hits = recommendation_cache.hits
+        second = await client.post("/recommendations", json=recommendation_request())
+        assert recommendation_cache.hits == hits + 1
+        assert second.content == first.content
+
+    run(scenario)
+
+
+def test_reload_empties_the_cache(catalog, catalog_store, run):
+    async def scenario(client):
+        before = outfit_ids(await client.post("/recommendations", json=recommendation_request()))
+        catalog_store.publish(make_catalog(prefix="new_"))
+        after = outfit_ids(await client.post("/recommendations", json=recommendation_request()))
+        assert after == ["new_" + outfit_id for outfit_id in before]
+
+    run(scenario)
+
+
+def test_result_scored_during_a_reload_is_not_served_afterwards(catalog, catalog_store, run, monkeypatch):
+    scoring = asyncio.Event()
+    release = asyncio.Event()
+    recommend = scoring_pool.recommend
+
+    async def slow_recommend(*args):
+        outfits = await recommend(*args)
+        scoring.set()
+        await release.wait()
+        return outfits
+
+    async def scenario(client):
+        monkeypatch.setattr(scoring_pool, "recommend", slow_recommend)
+        first = asyncio.create_task(client.post("/recommendations", json=recommendation_request()))
+        await scoring.wait()
+        catalog_store.publish(make_catalog(prefix="new_"))
+        # Does not join the computation running against the old catalog
+        followers = recommendation_flight.followers
+        release.set()
+        second = await client.post("/recommendations", json=recommendation_request())
+        assert recommendation_flight.followers == followers
+
+        stale = await first
+        assert not any(outfit_id.startswith("new_") for outfit_id in outfit_ids(stale))
+        monkeypatch.setattr(scoring_pool, "recommend", recommend)
+        # The old catalog's result was cached under a key no request uses now
+        third = await client.post("/recommendations", json=recommendation_request())
+        assert outfit_ids(third) == outfit_ids(second)
+        assert all(outfit_id.startswith("new_") for outfit_id in outfit_ids(third))
+
+    run(scenario)
+
+
+def test_in_place_change_changes_occasion_payload(catalog, run):
+    async def scenario(client):
+        first = await client.post("/recommendations/occasion", params={"occasion": "casual"})
+        outfit_id = next(outfit["id"] for outfit in catalog if outfit["occasion"] == "casual")
+        catalog.remove(outfit_id)
+        second = await client.post("/recommendations/occasion", params={"occasion": "casual"})
+        assert second.headers["etag"] != first.headers["etag"]
+        assert outfit_id not in {outfit["id"] for outfit in second.json()["recommendations"]}
+        assert len(occasion_payloads.entries) == 1
+
+    run(scenario)
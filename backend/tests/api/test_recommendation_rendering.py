@@ -0,0 +1,95 @@
+"""
+Tests for POST /recommendations bodies spliced from pre-serialized outfit fragments
+"""
+import asyncio
+
+from api.dependencies.catalog import get_fragments
+from api.dependencies.scoring import scoring_pool
+from api.routes.recommendations import _to_outfit_items
+from api.schemas.recommendation import RecommendationResponse
+from models.catalog import OutfitCatalog
+from models.catalog_store import OutfitRecord
+from utils.preprocessing import preprocess_occasion
+from tests.factories import make_outfits, recommendation_request
+
+
+def _catalog(outfits) -> OutfitCatalog:
+    """Catalog with its fragments preloaded, as prepare_catalog leaves a loaded one"""
+    catalog = OutfitCatalog([OutfitRecord.from_dict(outfit) for outfit in outfits])
+    get_fragments(catalog).preload(catalog)
+    return catalog
+
+
+def _expected_body(outfits, occasion: str) -> bytes:
+    return RecommendationResponse(
+        success=True,
+        recommendations=_to_outfit_items(outfits, occasion),
+        message="Recommendations generated successfully",
+    ).model_dump_json().encode()
+
+
+def _recording(monkeypatch, scored):
+    recommend = scoring_pool.recommend
+
+    async def recording_recommend(*args):
+        outfits = await recommend(*args)
+        scored.append(outfits)
+        return outfits
+
+    monkeypatch.setattr(scoring_pool, "recommend", recording_recommend)
+
+
+def test_body_matches_the_response_model(catalog_store, run, monkeypatch):
+    outfits = make_outfits(200, seed=6)
+    # Escaping in both the fragments and the envelope
+    outfits[0]["name"] = 'Café "Noir" — \\ édition'
+    catalog_store.publish(_catalog(outfits))
+    scored = []
+    _recording(monkeypatch, scored)
+    requests = [
+        recommendation_request(),
+        recommendation_request(occasion="Date Night"),
+        recommendation_request(weather={"temperature": -3, "condition": "snow"}),
+        recommendation_request(user_preferences={"styles": [], "colors": [], "avoid_colors": []}),
+    ]
+
+    async def scenario(client):
+        return [await client.post("/recommendations", json=request) for request in requests]
+
+    responses = run(scenario)
+    assert len(scored) == len(requests)
+    for response, outfits, request in zip(responses, scored, requests):
+        assert response.content == _expected_body(outfits, preprocess_occasion(request["occasion"]))
+
+
+def test_reload_during_scoring_renders_the_scored_catalog(catalog_store, run, monkeypatch):
+    outfits = make_outfits(200, seed=6)
+    catalog_store.publish(_catalog(outfits))
+    # Same ids, different content
+    renamed = [{**outfit, "name": "Renamed " + outfit["name"], "items": ["Cape"]} for outfit in outfits]
+    scoring = asyncio.Event()
+    release = asyncio.Event()
+    recommend = scoring_pool.recommend
+    scored = []
+
+    async def slow_recommend(*args):
+        result = await recommend(*args)
+        scored.append(result)
+        scoring.set()
+        await release.wait()
+        return result
+
+    monkeypatch.setattr(scoring_pool, "recommend", slow_recommend)
+
+    async def scenario(client):
+        pending = asyncio.create_task(client.post("/recommendations", json=recommendation_request()))
+        await scoring.wait()
+        catalog_store.publish(_catalog(renamed))
+        release.set()
+        return await pending
+
+    response = run(scenario)
+    body = response.json()["recommendations"]
+    assert body
+    assert not any(outfit["name"].startswith("Renamed") for outfit in body)
+    assert response.content == _expected_body(scored[0], "casual")
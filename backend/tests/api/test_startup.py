@@ -0,0 +1,106 @@
+"""
+Tests for startup: load and warm-up retries, and warm-up traffic tagging
+"""
+import asyncio
+
+from api.dependencies.admission import admission_controller
+from api.dependencies.capture import request_capture
+from api.dependencies.catalog import catalog_store
+from api.dependencies.metrics import metrics
+from api.dependencies.startup import Startup
+from api.routes.recommendations import recommendation_cache
+
+RECORDED = ("outfitgenie_http_", "outfitgenie_recommendation_stage_")
+
+
+def _recorded_metrics():
+    return [line for line in metrics.render().splitlines() if line.startswith(RECORDED)]
+
+
+def test_warmup_is_not_captured_counted_or_cached(app, monkeypatch):
+    captured = []
+    monkeypatch.setattr(request_capture, "offer", lambda *args: captured.append(args))
+    before = _recorded_metrics()
+    admitted = {name: route["admitted"] for name, route in admission_controller.stats()["routes"].items()}
+    startup = Startup(on_failure=lambda: None)
+
+    asyncio.run(startup.run(app, warmup_requests=5))
+
+    assert startup.ready, startup.error
+    assert startup.components["warmup.recommendations"]["requests"] == 5
+    assert captured == []
+    assert _recorded_metrics() == before
+    assert {name: route["admitted"] for name, route in admission_controller.stats()["routes"].items()} == admitted
+    assert len(recommendation_cache) == 0
+    assert recommendation_cache.hits == recommendation_cache.misses == 0
+
+
+def test_failed_warmup_is_retried(app, monkeypatch):
+    startup = Startup(on_failure=lambda: None)
+    warm = startup._warm
+    failures = []
+
+    async def flaky_warm(*args):
+        if len(failures) < 2:
+            failures.append(1)
+            raise RuntimeError("cold pool")
+        await warm(*args)
+
+    monkeypatch.setattr(startup, "_warm", flaky_warm)
+    asyncio.run(startup.run(app, warmup_requests=2, attempts=3, retry_seconds=0.01))
+
+    assert startup.ready
+    assert startup.error is None
+    assert startup.stats()["attempts"] == {"load": 1, "warmup": 3}
+
+
+def test_warmup_failing_every_attempt_calls_on_failure(app, monkeypatch):
+    stopped = []
+    startup = Startup(on_failure=lambda: stopped.append(True))
+
+    async def broken_warm(*args):
+        raise RuntimeError("route broken")
+
+    monkeypatch.setattr(startup, "_warm", broken_warm)
+    asyncio.run(startup.run(app, warmup_requests=2, attempts=2, retry_seconds=0.01))
+
+    assert stopped == [True]
+    assert not startup.ready
+    assert startup.stats()["status"] == "failed"
+    assert "route broken" in startup.error
+
+
+def test_failed_load_is_retried(app, monkeypatch):
+    startup = Startup(on_failure=lambda: None)
+    reload = catalog_store.reload
+    failures = []
+
+    async def flaky_reload():
+        if len(failures) < 2:
+            failures.append(1)
+            raise OSError("catalog not mounted yet")
+        return await reload()
+
+    monkeypatch.setattr(catalog_store, "reload", flaky_reload)
+    asyncio.run(startup.run(app, attempts=3, retry_seconds=0.01))
+
+    assert startup.ready
+    assert startup.error is None
+    assert startup.stats()["attempts"] == {"load": 3, "warmup": 0}
+
+
+def test_load_failing_every_attempt_calls_on_failure(app, monkeypatch):
+    stopped = []
+    startup = Startup(on_failure=lambda: stopped.append(True))
+
+    async def broken_reload():
+        raise OSError("catalog missing")
+
+    monkeypatch.setattr(catalog_store, "reload", broken_reload)
+    asyncio.run(startup.run(app, warmup_requests=2, attempts=2, retry_seconds=0.01))
+
+    assert stopped == [True]
+    assert not startup.ready
+    assert startup.stats()["status"] == "failed"
+    assert startup.stats()["attempts"] == {"load": 2, "warmup": 0}
+    assert "catalog missing" in startup.error
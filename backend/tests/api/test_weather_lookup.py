@@ -0,0 +1,57 @@
+"""
+Tests for location-only recommendation requests, whose weather is looked up server-side
+"""
+import pytest
+
+import api.routes.recommendations as recommendations
+from utils.weather import WeatherProvider, WeatherUnavailableError
+from tests.factories import Clock, StubUpstream, recommendation_request
+
+LOCATION = {"latitude": 59.3293, "longitude": 18.0686}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = StubUpstream()
+    monkeypatch.setattr(recommendations, "weather_provider", WeatherProvider(upstream, timer=Clock()))
+    return upstream
+
+
+def _location_request():
+    request = recommendation_request(location=LOCATION)
+    del request["weather"]
+    return request
+
+
+def test_weather_is_looked_up_from_the_location(catalog, upstream, run):
+    async def scenario(client):
+        looked_up = await client.post("/recommendations", json=_location_request())
+        # The same weather sent by the client gives the same answer
+        weather = {"temperature": 15.0, "condition": "light rain"}
+        sent = await client.post("/recommendations", json=recommendation_request(weather=weather))
+        return looked_up, sent
+
+    looked_up, sent = run(scenario)
+    assert looked_up.status_code == 200
+    assert upstream.calls == [(59.33, 18.07)]
+    assert looked_up.json()["recommendations"] == sent.json()["recommendations"]
+
+
+def test_unavailable_weather_is_a_503(catalog, upstream, run):
+    upstream.error = WeatherUnavailableError("Weather upstream returned HTTP 502")
+
+    async def scenario(client):
+        single = await client.post("/recommendations", json=_location_request())
+        batch = await client.post(
+            "/recommendations/batch", json={"requests": [_location_request(), recommendation_request()]}
+        )
+        return single, batch
+
+    single, batch = run(scenario)
+    assert single.status_code == 503
+    assert single.json()["detail"] == "Weather unavailable: Weather upstream returned HTTP 502"
+    # A batch fails only the items whose lookup failed
+    results = batch.json()["results"]
+    assert batch.status_code == 200
+    assert [result["success"] for result in results] == [False, True]
+    assert "HTTP 502" in results[0]["error"]
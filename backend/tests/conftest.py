@@ -0,0 +1,19 @@
+"""
+Shared test setup
+
+Settings are read from the environment when config.settings is first
+imported: tests run without background startup, warm-up or files written
+outside their temporary directories.
+"""
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("MODEL_PATH", os.path.join(BACKEND_DIR, "models"))
+os.environ.setdefault("STARTUP_BACKGROUND", "false")
+os.environ.setdefault("WARMUP_REQUESTS", "0")
+os.environ.setdefault("CATALOG_WATCH_INTERVAL", "0")
+os.environ.setdefault("PROFILE_STORE_FILE", "")
+os.environ.setdefault("FEEDBACK_DIR", "")
+os.environ.setdefault("REQUEST_CAPTURE_FILE", "")
+os.environ.setdefault("SCORING_POOL", "inline")
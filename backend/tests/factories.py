@@ -0,0 +1,95 @@
+"""
+Synthetic catalogs, requests and stubs shared by the tests
+"""
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.synthetic import generate_catalog, generate_requests
+from models.catalog import OutfitCatalog
+from models.catalog_store import OutfitRecord
+from utils.preprocessing import preprocess_occasion, preprocess_user_preferences, preprocess_weather_data
+from utils.weather import WeatherUpstream
+
+
+def make_outfits(size: int = 200, seed: int = 0, prefix: str = "", base_scale: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Synthetic catalog rows
+
+    Args:
+        size: Number of outfits
+        seed: Random seed
+        prefix: Prepended to every id, to tell outfits of different catalogs apart
+        base_scale: Factor on the base confidence scores; below 1 fewer
+            scores reach the clipping limit of 1.0, so fewer of them tie
+    """
+    outfits = generate_catalog(size, seed)
+    for outfit in outfits:
+        outfit["id"] = prefix + outfit["id"]
+        outfit["confidence_score"] = round(outfit["confidence_score"] * base_scale, 4)
+    return outfits
+
+
+def make_catalog(size: int = 200, seed: int = 0, prefix: str = "", base_scale: float = 1.0) -> OutfitCatalog:
+    """Indexed catalog of make_outfits() records"""
+    return OutfitCatalog(
+        [OutfitRecord.from_dict(outfit) for outfit in make_outfits(size, seed, prefix, base_scale)]
+    )
+
+
+def make_requests(count: int, seed: int = 3) -> List[Tuple[Dict[str, Any], Dict[str, Any], str]]:
+    """Preprocessed (user_preferences, weather, occasion) tuples, as the model receives them"""
+    return [
+        (
+            preprocess_user_preferences(request["user_preferences"]),
+            preprocess_weather_data(request["weather"]),
+            preprocess_occasion(request["occasion"]),
+        )
+        for request in generate_requests(count, seed)
+    ]
+
+
+def recommendation_request(**overrides: Any) -> Dict[str, Any]:
+    """POST /recommendations body"""
+    body = {
+        "user_preferences": {"styles": ["Casual"], "colors": ["Blue", "White"], "avoid_colors": []},
+        "weather": {"temperature": 21, "condition": "clear sky"},
+        "occasion": "casual",
+    }
+    body.update(overrides)
+    return body
+
+
+def outfit_ids(response: httpx.Response) -> List[str]:
+    return [outfit["id"] for outfit in response.json()["recommendations"]]
+
+
+# Weather a StubUpstream reports, its temperature raised by 1 per fetch
+OBSERVATION = {"temperature": 14.0, "condition": "light rain", "humidity": 80, "wind_speed": 12.6}
+
+
+class StubUpstream(WeatherUpstream):
+    """Records fetched locations; fails while ``error`` is set, waits for ``gate`` if given"""
+
+    def __init__(self):
+        self.calls = []
+        self.error = None
+        self.gate = None
+
+    async def fetch(self, client, latitude, longitude):
+        self.calls.append((latitude, longitude))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return {**OBSERVATION, "temperature": OBSERVATION["temperature"] + len(self.calls)}
+
+
+class Clock:
+    """Settable wall clock for components that take a ``timer``"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
@@ -0,0 +1,63 @@
+"""
+Tests for ANN candidate retrieval: parity with exhaustive scoring and recall
+"""
+import pytest
+
+from models.ann import IVFIndex, attach_index, measure_recall
+from models.outfit_model import OutfitRecommendationModel
+from tests.factories import make_catalog, make_requests
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    # Scaled-down base scores keep most scores below the clipping limit, so
+    # rankings are decided by the boosts rather than by ties at 1.0
+    return make_catalog(5000, seed=7, base_scale=0.3)
+
+
+@pytest.fixture(scope="module")
+def requests():
+    return make_requests(300, seed=5)
+
+
+def test_exact_searches_match_exhaustive_scores(catalog, requests):
+    # nprobe covers every cell, so each search ends on its exactness bound
+    catalog.ann_index = IVFIndex.build(catalog.matrix, n_lists=64, candidates=5, nprobe=64)
+    model = OutfitRecommendationModel()
+    result = measure_recall(model, catalog, requests)
+
+    assert catalog.ann_index.exact_searches == catalog.ann_index.searches == len(requests)
+    # Same scores rank for rank; outfits may differ only where scores tie
+    assert result["tie_aware_recall"] == 1.0
+
+
+def test_recall_with_default_settings(catalog, requests):
+    catalog.ann_index = IVFIndex.build(catalog.matrix, candidates=300, nprobe=32)
+    result = measure_recall(OutfitRecommendationModel(), catalog, requests)
+    assert result["recall"] >= 0.9
+    assert result["tie_aware_recall"] >= 0.95
+
+
+def test_index_is_skipped_for_non_default_weights(catalog, requests):
+    catalog.ann_index = IVFIndex.build(catalog.matrix, candidates=5, nprobe=1)
+    model = OutfitRecommendationModel.from_config({"weights": {"color_harmony_boost": 0.2}})
+    searches = catalog.ann_index.searches
+    preferences, weather, occasion = requests[0]
+    assert model.recommend(preferences, weather, occasion, catalog) == model.recommend(
+        preferences, weather, occasion, catalog, use_index=False
+    )
+    assert catalog.ann_index.searches == searches
+
+
+def test_saved_index_is_reused_only_for_the_same_catalog(tmp_path):
+    path = str(tmp_path / "ann_index.npz")
+    first = make_catalog(600, seed=1)
+    built = attach_index(first, path, min_size=100)
+    reloaded = make_catalog(600, seed=1)
+    loaded = attach_index(reloaded, path, min_size=100)
+    assert loaded.build_seconds == 0.0
+    assert (loaded.list_rows == built.list_rows).all()
+
+    other = attach_index(make_catalog(600, seed=2), path, min_size=100)
+    assert other.build_seconds > 0.0
+    assert attach_index(make_catalog(50, seed=1), path, min_size=100) is None
@@ -0,0 +1,43 @@
+"""
+Tests for batch recommendations: same outfits as one request at a time
+"""
+import pytest
+
+from models.ann import IVFIndex
+from models.outfit_model import OutfitRecommendationModel
+from utils.preprocessing import STYLE_ALIASES
+from tests.factories import make_catalog, make_requests
+
+
+@pytest.fixture(scope="module")
+def model():
+    return OutfitRecommendationModel()
+
+
+@pytest.fixture(scope="module")
+def requests():
+    return make_requests(200, seed=11)
+
+
+def test_batch_matches_single_requests_without_prebuilt_structures(model, requests):
+    catalog = make_catalog(2000, seed=3)
+    singles = [model.recommend(*request, catalog) for request in requests]
+    assert model.recommend_batch(requests, catalog) == singles
+
+
+def test_batch_goes_through_tables_and_index_like_single_requests(model, requests):
+    catalog = make_catalog(4000, seed=4)
+    # Shallow buckets: some lookups are answered, the rest fall through to the index
+    catalog.recommendation_tables = model.build_tables(catalog, STYLE_ALIASES.values(), depth=16)
+    # Few candidates from few cells: index answers differ from exhaustive ones
+    catalog.ann_index = IVFIndex.build(catalog.matrix, n_lists=32, candidates=20, nprobe=2)
+
+    singles = [model.recommend(*request, catalog) for request in requests]
+    hits, searches = catalog.recommendation_tables.hits, catalog.ann_index.searches
+    assert model.recommend_batch(requests, catalog) == singles
+    assert catalog.recommendation_tables.hits > hits
+    assert catalog.ann_index.searches > searches
+
+    exhaustive = model.recommend_batch(requests, catalog, use_index=False)
+    assert exhaustive == [model.recommend(*request, catalog, use_index=False) for request in requests]
+    assert exhaustive != singles
@@ -0,0 +1,100 @@
+"""
+The vectorized recommender against the original per-outfit scorer
+
+The reference below is the list-based scorer the columnar encoding
+replaced, plus the palette harmony term computed outfit by outfit.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from models.catalog import WEATHER_APPROPRIATE_STYLES
+from models.color_matcher import ColorMatcher, harmony_index
+from models.outfit_model import OutfitRecommendationModel
+from models.scoring import DEFAULT_WEIGHTS
+from tests.factories import make_catalog, make_outfits, make_requests
+
+
+def _reference_filter(model: OutfitRecommendationModel, weather: Dict[str, Any], outfits: List[Dict[str, Any]]):
+    weather_category = model._get_weather_category(weather.get("temperature", 20))
+    appropriate = WEATHER_APPROPRIATE_STYLES.get(weather_category, [])
+    filtered = [
+        outfit
+        for outfit in outfits
+        if any(style.lower() in outfit.get("style", "").lower() for style in appropriate)
+    ]
+    return filtered or outfits
+
+
+def _reference_score(prefs: Dict[str, Any], affinity: Optional[np.ndarray], outfit: Dict[str, Any]) -> float:
+    """Unrounded, clipped score of one outfit; ``affinity`` is ColorMatcher.color_affinity of the user's colors"""
+    weights = DEFAULT_WEIGHTS
+    score = outfit.get("confidence_score", 0.5)
+    if any(style.lower() in outfit.get("style", "").lower() for style in prefs.get("styles", [])):
+        score += weights.style_boost
+    outfit_colors = [color.lower() for color in outfit.get("colors", [])]
+    score += sum(1 for color in prefs.get("colors", []) if color.lower() in outfit_colors) * weights.color_match_boost
+    score -= (
+        sum(1 for color in prefs.get("avoid_colors", []) if color.lower() in outfit_colors)
+        * weights.avoid_color_penalty
+    )
+    if affinity is not None:
+        known = [index for index in map(harmony_index, set(outfit_colors)) if index is not None]
+        if known:
+            score += sum(affinity[index] for index in known) / len(known) * weights.color_harmony_boost
+    return max(0.0, min(1.0, score))
+
+
+def _on_rounding_boundary(score: float) -> bool:
+    """Whether summation order alone can flip round(score, 2)"""
+    scaled = score * 100
+    return abs(scaled - math.floor(scaled) - 0.5) < 1e-6
+
+
+@pytest.fixture(scope="module")
+def model():
+    return OutfitRecommendationModel()
+
+
+@pytest.mark.parametrize("base_scale", [1.0, 0.3])
+def test_columnar_scores_match_the_per_outfit_scorer(model, base_scale):
+    outfits = make_outfits(800, seed=5, base_scale=base_scale)
+    for prefs, _, _ in make_requests(60, seed=8):
+        affinity = ColorMatcher().color_affinity(prefs.get("colors", []))
+        scored = model._match_user_preferences(
+            outfits, prefs.get("styles", []), prefs.get("colors", []), prefs.get("avoid_colors", [])
+        )
+        scores = {outfit["id"]: outfit["confidence_score"] for outfit in scored}
+        for outfit in outfits:
+            expected = _reference_score(prefs, affinity, outfit)
+            if scores[outfit["id"]] != round(expected, 2):
+                # The harmony mean is summed in another order; only a .xx5 tie can differ
+                assert _on_rounding_boundary(expected)
+                assert scores[outfit["id"]] == pytest.approx(round(expected, 2), abs=0.0100001)
+
+
+@pytest.mark.parametrize("base_scale", [1.0, 0.3])
+def test_recommend_returns_the_stable_top_five_of_the_weather_filtered_outfits(model, base_scale):
+    outfits = make_outfits(800, seed=5, base_scale=base_scale)
+    for prefs, weather, occasion in make_requests(60, seed=8):
+        scored = model._match_user_preferences(
+            outfits, prefs.get("styles", []), prefs.get("colors", []), prefs.get("avoid_colors", [])
+        )
+        scores = {outfit["id"]: outfit["confidence_score"] for outfit in scored}
+        filtered = _reference_filter(model, weather, outfits)
+        expected = sorted(filtered, key=lambda outfit: scores[outfit["id"]], reverse=True)[:5]
+        recommended = model.recommend(prefs, weather, occasion, outfits)
+        assert [outfit["id"] for outfit in recommended] == [outfit["id"] for outfit in expected]
+
+
+def test_indexed_catalog_matches_the_plain_list(model):
+    outfits = make_outfits(1500, seed=6)
+    catalog = make_catalog(1500, seed=6)
+    for prefs, weather, occasion in make_requests(150, seed=9):
+        indexed = model.recommend(prefs, weather, occasion, catalog, use_index=False)
+        plain = model.recommend(prefs, weather, occasion, outfits)
+        assert [(o["id"], o["confidence_score"]) for o in indexed] == [
+            (o["id"], o["confidence_score"]) for o in plain
+        ]
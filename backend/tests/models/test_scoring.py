@@ -0,0 +1,46 @@
+"""
+Tests for the columnar scorer's style and color lookups
+"""
+import numpy as np
+import pytest
+
+from models.scoring import CatalogMatrix
+
+OUTFITS = [
+    {"style": "Smart-Casual", "colors": ["Navy", "grey"], "confidence_score": 0.5},
+    {"style": "casual", "colors": ["red"], "confidence_score": 0.6},
+    {"style": "Formal", "colors": ["black", "navy"], "confidence_score": 0.7},
+]
+
+
+def test_style_matches_are_memoized_and_follow_new_styles():
+    matrix = CatalogMatrix(list(OUTFITS))
+    first = matrix.style_matches(["Casual"])
+    assert first.tolist() == [True, True, False]
+    assert matrix.style_matches(["Casual"]) is first
+    with pytest.raises(ValueError):
+        first[0] = False
+
+    matrix.set_row(3, {"style": "casual-chic", "colors": [], "confidence_score": 0.5})
+    assert matrix.style_matches(["Casual"]).tolist() == [True, True, False, True]
+    assert matrix.style_contains(["casual"]).tolist() == [True, True, False, True]
+
+
+def test_color_codes_accept_any_case():
+    matrix = CatalogMatrix(list(OUTFITS))
+    assert matrix.color_code("navy") == matrix.color_code("NAVY") is not None
+    assert matrix.color_code("teal") is None
+    assert matrix.color_hits(["navy", "Grey", "teal"]).tolist() == [2, 0, 1]
+
+
+def test_score_many_matches_score_row_for_row():
+    matrix = CatalogMatrix(list(OUTFITS))
+    preferences = [
+        {"styles": ["casual"], "colors": ["navy"], "avoid_colors": ["red"]},
+        {"styles": ["formal", "smart"], "colors": ["black", "grey"], "avoid_colors": []},
+        {"styles": [], "colors": [], "avoid_colors": []},
+    ]
+    rows = np.arange(len(OUTFITS))
+    many = matrix.score_many(preferences, rows)
+    for scores, pref in zip(many, preferences):
+        assert scores.tolist() == matrix.score(pref["styles"], pref["colors"], pref["avoid_colors"]).tolist()
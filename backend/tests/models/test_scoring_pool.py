@@ -0,0 +1,113 @@
+"""
+Tests for the scoring pool: sharded results match inline scoring, and
+process-pool failures fall back to thread shards
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from models.columnar import MappedCatalog, write_columnar_catalog
+from models.outfit_model import OutfitRecommendationModel
+from models.scoring_pool import ScoringPool, StaleSnapshotError, _process_shard
+from tests.factories import make_catalog, make_outfits, make_requests
+
+
+@pytest.fixture(scope="module")
+def model():
+    return OutfitRecommendationModel()
+
+
+@pytest.fixture(scope="module")
+def requests():
+    return make_requests(40, seed=15)
+
+
+@pytest.fixture
+def pool(model, request):
+    pool = ScoringPool(model, request.param, workers=2, shard_min_size=100, shards=3)
+    yield pool
+    pool.close()
+
+
+def _recommend_all(pool, requests, catalog):
+    async def main():
+        return [await pool.recommend(*request, catalog) for request in requests]
+
+    return asyncio.run(main())
+
+
+def _wait_for_snapshot(pool, catalog):
+    """Start the background snapshot write and wait until process shards can use it"""
+    deadline = time.monotonic() + 30
+    while pool._snapshot_source(catalog, catalog.matrix) is None:
+        assert time.monotonic() < deadline, "catalog snapshot was not written"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"], indirect=True)
+def test_sharded_scoring_matches_inline(model, pool, requests):
+    catalog = make_catalog(3000, seed=2)
+    if pool.mode == "process":
+        _wait_for_snapshot(pool, catalog)
+
+    assert _recommend_all(pool, requests, catalog) == [model.recommend(*request, catalog) for request in requests]
+    assert pool.requests[f"sharded_{pool.mode}"] == len(requests)
+    assert pool.shard_tasks == 3 * len(requests)
+    assert pool.process_fallbacks == 0
+
+
+@pytest.mark.parametrize("pool", ["process"], indirect=True)
+def test_process_shards_map_a_columnar_catalog_file(model, pool, requests, tmp_path):
+    path = str(tmp_path / "catalog.ogcat")
+    write_columnar_catalog(make_outfits(3000, seed=2), path)
+    catalog = MappedCatalog.open(path)
+
+    assert _recommend_all(pool, requests, catalog) == [model.recommend(*request, catalog) for request in requests]
+    assert pool.requests["sharded_process"] == len(requests)
+    # The catalog file itself is mapped; no snapshot is written
+    assert pool.stats()["snapshot"] is None
+
+
+class _BrokenPool(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("a worker died")
+
+
+class _StalePool(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_exception(StaleSnapshotError("snapshot was replaced"))
+        return future
+
+
+@pytest.mark.parametrize("pool", ["process"], indirect=True)
+@pytest.mark.parametrize("failing", [_BrokenPool, _StalePool])
+def test_failed_process_shards_fall_back_to_threads(model, pool, requests, failing):
+    catalog = make_catalog(3000, seed=2)
+    _wait_for_snapshot(pool, catalog)
+    pool._processes = failing()
+
+    assert _recommend_all(pool, requests[:3], catalog) == [
+        model.recommend(*request, catalog) for request in requests[:3]
+    ]
+    if failing is _BrokenPool:
+        # The broken pool is dropped and the next requests start a fresh one
+        assert pool.process_fallbacks == 1
+        assert pool.requests["sharded_thread"] == 1
+        assert pool.requests["sharded_process"] == 2
+        assert not isinstance(pool._processes, _BrokenPool)
+    else:
+        assert pool.process_fallbacks == 3
+        assert pool.requests["sharded_thread"] == 3
+        assert pool.requests["sharded_process"] == 0
+
+
+def test_worker_rejects_a_replaced_snapshot(requests, tmp_path):
+    path = str(tmp_path / "catalog.ogcat")
+    write_columnar_catalog(make_outfits(100, seed=2), path)
+    user_preferences = requests[0][0]
+    with pytest.raises(StaleSnapshotError):
+        _process_shard((path, (-1, -1)), 0, 100, None, user_preferences, 5)
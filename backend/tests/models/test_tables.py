@@ -0,0 +1,58 @@
+"""
+Tests for materialized recommendation tables: answers must match exhaustive scoring
+"""
+import pytest
+
+from models.outfit_model import OutfitRecommendationModel
+from utils.preprocessing import STYLE_ALIASES
+from tests.factories import make_catalog, make_requests
+
+
+@pytest.fixture(scope="module")
+def model():
+    return OutfitRecommendationModel()
+
+
+@pytest.fixture(scope="module")
+def requests():
+    return make_requests(300, seed=17)
+
+
+@pytest.mark.parametrize("depth", [5, 16, 64])
+def test_table_answers_match_exhaustive_scoring(model, requests, depth):
+    catalog = make_catalog(3000, seed=depth)
+    tables = model.build_tables(catalog, STYLE_ALIASES.values(), depth=depth)
+    catalog.recommendation_tables = tables
+
+    answered = 0
+    for user_preferences, weather, occasion in requests:
+        exhaustive = model.recommend(user_preferences, weather, occasion, catalog, use_index=False)
+        found = model.table_recommend(user_preferences, weather, catalog, 5)
+        if found is not None:
+            answered += 1
+            assert found == exhaustive
+        # Uncertified lookups fall through; recommend() must still agree
+        assert model.recommend(user_preferences, weather, occasion, catalog) == exhaustive
+
+    assert tables.hits >= answered
+    assert tables.lookups == tables.hits + tables.misses + tables.uncertified
+    if depth == 5:
+        # Buckets this shallow rarely hold a provable top 5
+        assert tables.uncertified > 0
+    else:
+        assert answered > 0
+
+
+def test_stale_tables_are_not_used_after_a_catalog_change(model, requests):
+    catalog = make_catalog(2000, seed=5)
+    catalog.recommendation_tables = model.build_tables(catalog, STYLE_ALIASES.values(), depth=64)
+
+    # Replaced in place: same size and styles, but it now beats everything the tables hold
+    catalog.add({**next(iter(catalog)), "confidence_score": 1.0})
+    assert model.get_model_info(catalog)["recommendation_tables"]["stale"]
+
+    for user_preferences, weather, occasion in requests[:50]:
+        assert model.table_recommend(user_preferences, weather, catalog, 5) is None
+        assert model.recommend(user_preferences, weather, occasion, catalog) == model.recommend(
+            user_preferences, weather, occasion, catalog, use_index=False
+        )
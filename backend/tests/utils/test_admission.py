@@ -0,0 +1,105 @@
+"""
+Tests for the admission controller: queueing, shedding, deadlines and degraded mode
+"""
+import asyncio
+import time
+
+import pytest
+
+from utils.admission import AdmissionController, AdmissionRoute, Overloaded
+
+SINGLE = AdmissionRoute("single", degradable=True)
+BATCH = AdmissionRoute("batch", priority=1)
+
+
+def test_full_queue_sheds_at_once():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, degrade_queue_depth=0)
+        running = await controller.admit(BATCH)
+        waiting = asyncio.ensure_future(controller.admit(BATCH))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.admit(BATCH)
+        assert shed.value.reason == "queue_full" and shed.value.retry_after >= 1
+
+        controller.release(running)
+        controller.release(await waiting)
+        assert controller.stats()["routes"]["batch"]["shed"]["queue_full"] == 1
+        assert controller.stats()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_request_that_cannot_make_its_deadline_is_refused_without_queueing():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, degrade_queue_depth=0)
+        # Teach the controller that a batch takes about 50ms
+        ticket = await controller.admit(BATCH)
+        await asyncio.sleep(0.05)
+        controller.release(ticket)
+
+        running = await controller.admit(BATCH)
+        with pytest.raises(Overloaded) as shed:
+            await controller.admit(BATCH, time.monotonic() + 0.01)
+        assert shed.value.reason == "deadline"
+        assert controller.queue_depth == 0
+
+        with pytest.raises(Overloaded):
+            await controller.admit(BATCH, time.monotonic() - 1)
+        controller.release(running)
+
+    asyncio.run(main())
+
+
+def test_deadline_passing_in_the_queue_sheds_and_frees_the_place():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, degrade_queue_depth=0)
+        running = await controller.admit(BATCH)
+        with pytest.raises(Overloaded) as shed:
+            await controller.admit(BATCH, time.monotonic() + 0.02)
+        assert shed.value.reason == "deadline"
+        assert controller.queue_depth == 0
+        controller.release(running)
+        assert controller.stats()["running"] == 0
+
+    asyncio.run(main())
+
+
+def test_single_requests_run_before_queued_batches():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, degrade_queue_depth=0)
+        running = await controller.admit(BATCH)
+        order = []
+
+        async def request(route):
+            ticket = await controller.admit(route)
+            order.append(route.name)
+            controller.release(ticket)
+
+        waiters = [asyncio.ensure_future(request(BATCH)), asyncio.ensure_future(request(SINGLE))]
+        await asyncio.sleep(0)
+        controller.release(running)
+        await asyncio.gather(*waiters)
+        assert order == ["single", "batch"]
+
+    asyncio.run(main())
+
+
+def test_long_queue_admits_degradable_routes_in_degraded_mode():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, degrade_queue_depth=1)
+        running = await controller.admit(BATCH)
+        waiting = asyncio.ensure_future(controller.admit(BATCH))
+        await asyncio.sleep(0)
+        assert controller.degraded_mode
+
+        ticket = await controller.admit(SINGLE)
+        assert ticket.degraded and not ticket.holds_slot
+        controller.release(ticket)
+
+        controller.release(running)
+        controller.release(await waiting)
+        assert not controller.degraded_mode
+        assert controller.degraded_activations == 1
+
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Tests for the micro-batcher: batch limits, error fan-out and close()
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.batching import MicroBatcher
+
+
+class RecordingBatchFn:
+    """Doubles every item and records each batch it was called with"""
+
+    def __init__(self, error: Exception = None, release: threading.Event = None):
+        self.batches = []
+        self.error = error
+        self.release = release
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [item * 2 for item in items]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    async def main():
+        batch_fn = RecordingBatchFn()
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(10)))
+        await batcher.close()
+        return batch_fn, batcher, results
+
+    batch_fn, batcher, results = asyncio.run(main())
+    assert results == [item * 2 for item in range(10)]
+    assert batch_fn.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert batcher.stats()["batch_sizes"] == {2: 1, 4: 2}
+
+
+def test_first_item_waits_at_most_max_wait_ms_for_company():
+    async def main():
+        batch_fn = RecordingBatchFn()
+        batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+
+        # A second item within the wait joins the first one's batch
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.01)
+        assert await asyncio.gather(first, batcher.submit(2)) == [2, 4]
+
+        # A lone item runs alone once the wait is over
+        started = time.perf_counter()
+        assert await batcher.submit(3) == 6
+        elapsed = time.perf_counter() - started
+        await batcher.close()
+        return batch_fn, elapsed
+
+    batch_fn, elapsed = asyncio.run(main())
+    assert batch_fn.batches == [[1, 2], [3]]
+    assert 0.05 <= elapsed < 1.0
+
+
+@pytest.mark.parametrize(
+    "batch_fn, error",
+    [
+        (RecordingBatchFn(error=ValueError("model unavailable")), "model unavailable"),
+        (lambda items: [1], "returned 1 results for 3 items"),
+    ],
+)
+def test_batch_error_reaches_every_item_of_the_batch(batch_fn, error):
+    async def main():
+        batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+        await batcher.close()
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+    assert len(results) == 3
+    assert all(isinstance(result, Exception) and error in str(result) for result in results)
+    assert batcher.stats()["failures"] == 1
+
+
+def test_batcher_keeps_working_after_a_failed_batch():
+    async def main():
+        batch_fn = RecordingBatchFn(error=ValueError("flaky"))
+        batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=1)
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+        batch_fn.error = None
+        result = await batcher.submit(2)
+        await batcher.close()
+        return result
+
+    assert asyncio.run(main()) == 4
+
+
+def test_close_fails_running_and_queued_items():
+    release = threading.Event()
+
+    async def main():
+        batch_fn = RecordingBatchFn(release=release)
+        batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=1)
+        pending = [asyncio.ensure_future(batcher.submit(item)) for item in range(3)]
+        while not batch_fn.batches:
+            await asyncio.sleep(0.001)
+        # Item 0 is running; 1 and 2 are queued
+        await batcher.close()
+        release.set()
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        return batch_fn, batcher, results
+
+    try:
+        batch_fn, batcher, results = asyncio.run(main())
+    finally:
+        release.set()
+    assert batch_fn.batches == [[0]]
+    assert [str(result) for result in results] == ["Micro-batcher closed"] * 3
+    assert batcher.stats()["queued"] == 0
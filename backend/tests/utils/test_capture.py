@@ -0,0 +1,98 @@
+"""
+Tests for request capture: offer, flush and read back
+"""
+import asyncio
+import gzip
+import json
+
+from utils.capture import RequestCapture, read_capture
+
+REQUESTS = [
+    (
+        {"styles": ["Casual"], "colors": ["Navy", "White"], "avoid_colors": []},
+        {"temperature": 21.0, "condition": "clear sky", "humidity": None, "wind_speed": None},
+        "casual",
+    ),
+    (
+        {"styles": ["Formal", "Minimalist"], "colors": [], "avoid_colors": None},
+        {"temperature": -4.5, "condition": "snow", "humidity": 90, "wind_speed": 20.0},
+        "wedding",
+    ),
+    (
+        {"styles": [], "colors": ["Beige"], "avoid_colors": ["Red", "Orange"]},
+        {"temperature": 30.0, "condition": "très chaud", "humidity": 20, "wind_speed": 3.5},
+        "date night",
+    ),
+]
+
+
+def _capture(path, **kwargs) -> RequestCapture:
+    return RequestCapture(str(path), sample_rate=1.0, **kwargs)
+
+
+def _captured(path):
+    return [(request.user_preferences, request.weather, request.occasion) for request in read_capture(str(path))]
+
+
+def test_offered_requests_read_back_as_captured(tmp_path):
+    path = tmp_path / "capture.ndjson.gz"
+    capture = _capture(path)
+
+    async def main():
+        for request in REQUESTS[:2]:
+            assert capture.offer(*request)
+        assert await capture.flush() == 2
+        # A second flush appends a second gzip member
+        assert capture.offer(*REQUESTS[2])
+        assert await capture.flush() == 1
+        assert await capture.flush() == 0
+
+    asyncio.run(main())
+    assert _captured(path) == REQUESTS
+    assert all(isinstance(request.timestamp, float) for request in read_capture(str(path)))
+    assert capture.stats()["written"] == 3
+
+
+def test_torn_batch_ends_the_capture(tmp_path):
+    path = tmp_path / "capture.ndjson.gz"
+    capture = _capture(path)
+
+    async def main():
+        for request in REQUESTS:
+            capture.offer(*request)
+        await capture.flush()
+
+    asyncio.run(main())
+    # A crash halfway through appending the next batch
+    records = b"".join(json.dumps([0.0, [], [], [], {}, "party"]).encode() + b"\n" for _ in range(200))
+    torn = gzip.compress(records)
+    with open(path, "ab") as f:
+        f.write(torn[: len(torn) // 2])
+
+    captured = _captured(path)
+    assert captured[: len(REQUESTS)] == REQUESTS
+    assert all(occasion == "party" for _, _, occasion in captured[len(REQUESTS):])
+    assert len(captured) < len(REQUESTS) + 200
+
+
+def test_capture_stops_once_the_file_reaches_max_bytes(tmp_path):
+    path = tmp_path / "capture.ndjson.gz"
+    capture = _capture(path, max_bytes=64)
+
+    async def main():
+        for request in REQUESTS:
+            capture.offer(*request)
+        assert await capture.flush() == 3
+        size = path.stat().st_size
+        assert size >= 64
+
+        capture.offer(*REQUESTS[0])
+        assert await capture.flush() == 0
+        assert path.stat().st_size == size
+        assert not capture.offer(*REQUESTS[0])
+
+    asyncio.run(main())
+    stats = capture.stats()
+    assert stats["full"] and not stats["enabled"]
+    assert stats["written"] == 3 and stats["dropped"] == 1
+    assert _captured(path) == REQUESTS
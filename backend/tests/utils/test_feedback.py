@@ -0,0 +1,104 @@
+"""
+Tests for the feedback log: replay after restarts and compaction
+"""
+import asyncio
+
+from utils.feedback import FeedbackEvent, FeedbackLog, FeedbackPipeline
+
+
+def _clicks(outfit_id: str, count: int):
+    return [FeedbackEvent(float(i), outfit_id, "click") for i in range(count)]
+
+
+async def _record(directory, events, compact_first: bool = False):
+    """One process lifetime: load, optionally compact, record events, shut down"""
+    pipeline = FeedbackPipeline(str(directory), fsync=False)
+    await pipeline.load()
+    if compact_first:
+        await pipeline.compact()
+    pipeline.submit(events)
+    await pipeline.close()
+    return pipeline
+
+
+async def _restart(directory) -> FeedbackPipeline:
+    pipeline = FeedbackPipeline(str(directory), fsync=False)
+    await pipeline.load()
+    return pipeline
+
+
+def test_restart_replays_written_events(tmp_path):
+    asyncio.run(_record(tmp_path, _clicks("a", 3)))
+    pipeline = asyncio.run(_restart(tmp_path))
+    assert pipeline.counters.get("a")["click"] == 3
+
+
+def test_compaction_before_first_write_keeps_later_events(tmp_path):
+    asyncio.run(_record(tmp_path, _clicks("a", 3)))
+    asyncio.run(_record(tmp_path, _clicks("a", 2), compact_first=True))
+
+    pipeline = asyncio.run(_restart(tmp_path))
+    assert pipeline.counters.get("a")["click"] == 5
+
+    # And again once the second run's segment is compacted too
+    asyncio.run(_record(tmp_path, _clicks("a", 1), compact_first=True))
+    pipeline = asyncio.run(_restart(tmp_path))
+    assert pipeline.counters.get("a")["click"] == 6
+
+
+def test_compaction_skips_segments_another_process_appends_to(tmp_path):
+    async def scenario():
+        writer = FeedbackPipeline(str(tmp_path), fsync=False)
+        await writer.load()
+        writer.submit(_clicks("a", 4))
+        await writer.flush()
+
+        compactor = FeedbackPipeline(str(tmp_path), fsync=False)
+        await compactor.load()
+        assert compactor.counters.get("a")["click"] == 4
+        compactor.submit(_clicks("b", 1))
+        await compactor.close()
+        # Only the compactor's closed segment can be folded
+        assert await compactor.compact() == 1
+        assert writer.log.active_seq in writer.log.segments()
+
+        writer.submit(_clicks("a", 2))
+        await writer.close()
+        restarted = await _restart(tmp_path)
+        assert restarted.counters.get("a")["click"] == 6
+        assert restarted.counters.get("b")["click"] == 1
+
+        # Once the writer has closed its segment it is folded in
+        assert await restarted.compact() == 1
+        assert (await _restart(tmp_path)).counters.get("a")["click"] == 6
+
+    asyncio.run(scenario())
+
+
+def test_segments_left_by_an_interrupted_compaction_are_not_counted_twice(tmp_path):
+    asyncio.run(_record(tmp_path, _clicks("a", 3)))
+    log = FeedbackLog(str(tmp_path))
+    segments = log.segments()
+    contents = {seq: (tmp_path / f"feedback-{seq:08d}.log").read_bytes() for seq in segments}
+
+    pipeline = asyncio.run(_restart(tmp_path))
+    assert asyncio.run(pipeline.compact()) == len(segments)
+    # Simulate a crash after the snapshot was written but before the removals
+    for seq, data in contents.items():
+        (tmp_path / f"feedback-{seq:08d}.log").write_bytes(data)
+
+    pipeline = asyncio.run(_restart(tmp_path))
+    assert pipeline.counters.get("a")["click"] == 3
+    asyncio.run(_record(tmp_path, _clicks("a", 1)))
+    assert asyncio.run(_restart(tmp_path)).counters.get("a")["click"] == 4
+
+
+def test_new_segments_are_numbered_above_compacted_ones(tmp_path):
+    asyncio.run(_record(tmp_path, _clicks("a", 1)))
+    asyncio.run(_record(tmp_path, _clicks("a", 1)))
+    pipeline = asyncio.run(_restart(tmp_path))
+    asyncio.run(pipeline.compact())
+    assert FeedbackLog(str(tmp_path)).segments() == []
+
+    asyncio.run(_record(tmp_path, _clicks("a", 1)))
+    assert FeedbackLog(str(tmp_path)).segments() == [3]
@@ -0,0 +1,76 @@
+"""
+Tests for the metrics registry: per-thread recording merged at scrape time
+"""
+import threading
+
+import pytest
+
+from utils.metrics import MetricsRegistry
+
+
+def _registry():
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("requests_total", "Requests")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    return registry
+
+
+def _samples(registry):
+    return {
+        key: float(value)
+        for key, value in (line.rsplit(" ", 1) for line in registry.render().splitlines() if not line.startswith("#"))
+    }
+
+
+def test_observations_from_many_threads_all_count():
+    registry = _registry()
+    start = threading.Barrier(8)
+
+    def record():
+        start.wait()
+        for i in range(5000):
+            registry.inc("requests_total", route="a")
+            registry.observe("latency_seconds", 0.05 if i % 2 else 0.5, route="a")
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Scrapes while threads record must not fail
+    while any(thread.is_alive() for thread in threads):
+        registry.render()
+    for thread in threads:
+        thread.join()
+
+    samples = _samples(registry)
+    assert samples['test_requests_total{route="a"}'] == 40000
+    assert samples['test_latency_seconds_bucket{route="a",le="0.1"}'] == 20000
+    assert samples['test_latency_seconds_bucket{route="a",le="1"}'] == 40000
+    assert samples['test_latency_seconds_bucket{route="a",le="+Inf"}'] == 40000
+    assert samples['test_latency_seconds_count{route="a"}'] == 40000
+    assert samples['test_latency_seconds_sum{route="a"}'] == pytest.approx(20000 * 0.55)
+
+
+def test_declared_metrics_render_before_any_observation():
+    text = _registry().render()
+    assert "# TYPE test_requests_total counter" in text
+    assert "# TYPE test_latency_seconds histogram" in text
+
+
+def test_reset_and_disabled_registry():
+    registry = _registry()
+    registry.inc("requests_total", 3)
+    registry.reset()
+    assert _samples(registry) == {}
+
+    disabled = MetricsRegistry(enabled=False)
+    disabled.counter("requests_total", "Requests")
+    disabled.inc("requests_total")
+    assert _samples(disabled) == {}
+
+
+def test_undeclared_metric_is_an_error():
+    registry = _registry()
+    with pytest.raises(KeyError):
+        registry.inc("latency_seconds")
+    with pytest.raises(KeyError):
+        registry.observe("nope", 1.0)
@@ -0,0 +1,100 @@
+"""
+Tests for the write-behind profile store
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from utils.profiles import ProfileNotFoundError, ProfileStore
+
+PREFERENCES = {"styles": ["Smart-Casual"], "colors": ["Navy", "grey"], "avoid_colors": ["pink"]}
+
+
+def _stored(path):
+    with sqlite3.connect(path) as db:
+        return {row[0] for row in db.execute("SELECT user_id FROM profiles")}
+
+
+def test_writes_reach_the_file_only_when_flushed(tmp_path):
+    path = str(tmp_path / "data" / "profiles.sqlite3")
+    store = ProfileStore(path)
+    store.load()
+    store.put("u1", PREFERENCES)
+    store.put("u2", PREFERENCES)
+    assert store.stats()["dirty"] == 2
+
+    assert store.flush() == 2
+    assert _stored(path) == {"u1", "u2"}
+
+    store.delete("u2")
+    store.put("u1", {"styles": ["casual"], "colors": ["red"]})
+    assert _stored(path) == {"u1", "u2"}
+    store.close()
+    assert _stored(path) == {"u1"}
+
+    reopened = ProfileStore(path)
+    assert reopened.load() == 1
+    assert reopened.get("u1").styles == ("Casual",)
+    with pytest.raises(ProfileNotFoundError):
+        reopened.get("u2")
+    reopened.close()
+
+
+def test_failed_flush_keeps_the_writes_for_the_next_one(tmp_path, monkeypatch):
+    path = str(tmp_path / "profiles.sqlite3")
+    store = ProfileStore(path)
+    store.put("u1", PREFERENCES)
+    connect = store._connect
+
+    def broken_connect():
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(store, "_connect", broken_connect)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    assert store.stats()["dirty"] == 1 and store.flush_errors == 1
+
+    monkeypatch.setattr(store, "_connect", connect)
+    assert store.flush() == 1
+    assert _stored(path) == {"u1"}
+    store.close()
+
+
+def test_load_keeps_writes_made_before_it_finished(tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    old = ProfileStore(path)
+    old.put("u1", PREFERENCES)
+    old.close()
+
+    store = ProfileStore(path)
+    store.put("u1", {"styles": ["formal"]})
+    store.load()
+    assert store.get("u1").styles == ("Formal",)
+    store.close()
+
+
+def test_background_task_flushes_every_interval(tmp_path):
+    path = str(tmp_path / "profiles.sqlite3")
+    store = ProfileStore(path)
+
+    async def main():
+        task = asyncio.create_task(store.run(0.01))
+        store.put("u1", PREFERENCES)
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if store.flushes:
+                break
+        task.cancel()
+
+    asyncio.run(main())
+    assert _stored(path) == {"u1"}
+    store.close()
+
+
+def test_memory_only_store_writes_nothing():
+    store = ProfileStore(None)
+    store.put("u1", PREFERENCES)
+    assert store.load() == 0
+    assert store.flush() == 0
+    assert store.get("u1").colors
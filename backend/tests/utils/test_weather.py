@@ -0,0 +1,130 @@
+"""
+Tests for the weather provider: time-bucket cache, coalescing and stale fallback
+"""
+import asyncio
+
+import pytest
+
+from utils.weather import WeatherProvider, WeatherUnavailableError
+from tests.factories import OBSERVATION, Clock, StubUpstream
+
+
+def _provider(upstream, clock, **kwargs) -> WeatherProvider:
+    return WeatherProvider(upstream, ttl=600.0, stale_ttl=3600.0, precision=2, timer=clock, **kwargs)
+
+
+def test_lookups_are_cached_per_rounded_location_and_time_bucket():
+    async def main():
+        upstream, clock = StubUpstream(), Clock(1200.0)
+        provider = _provider(upstream, clock)
+
+        first = await provider.get(51.5012, -0.1249)
+        clock.now = 1799.0  # same 600 s bucket
+        assert await provider.get(51.4998, -0.1238) == first
+        assert upstream.calls == [(51.5, -0.12)]
+
+        clock.now = 1800.0  # next bucket
+        assert (await provider.get(51.5012, -0.1249))["temperature"] == first["temperature"] + 1
+        assert len(upstream.calls) == 2
+        assert provider.stats()["hits"] == 1 and provider.stats()["misses"] == 2
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_returned_weather_is_a_copy():
+    async def main():
+        provider = _provider(StubUpstream(), Clock())
+        (await provider.get(10.0, 10.0))["temperature"] = -40.0
+        assert (await provider.get(10.0, 10.0))["temperature"] != -40.0
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_concurrent_lookups_share_one_upstream_request():
+    async def main():
+        upstream, clock = StubUpstream(), Clock()
+        upstream.gate = asyncio.Event()
+        provider = _provider(upstream, clock)
+
+        lookups = [asyncio.ensure_future(provider.get(48.8566, 2.3522)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert provider.stats()["inflight"] == 1
+        upstream.gate.set()
+        results = await asyncio.gather(*lookups)
+
+        assert len(upstream.calls) == 1
+        assert all(result == results[0] for result in results)
+        assert provider.stats()["coalesced"] == 4
+        assert provider.stats()["inflight"] == 0
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def main():
+        upstream = StubUpstream()
+        upstream.gate = asyncio.Event()
+        provider = _provider(upstream, Clock())
+
+        cancelled = asyncio.ensure_future(provider.get(1.0, 1.0))
+        waiting = asyncio.ensure_future(provider.get(1.0, 1.0))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        upstream.gate.set()
+
+        assert (await waiting)["condition"] == OBSERVATION["condition"]
+        assert len(upstream.calls) == 1
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_failed_fetch_serves_stale_data_within_stale_ttl():
+    async def main():
+        upstream, clock = StubUpstream(), Clock(0.0)
+        provider = _provider(upstream, clock)
+        fresh = await provider.get(40.7128, -74.006)
+
+        upstream.error = WeatherUnavailableError("Weather upstream returned HTTP 502")
+        clock.now = 3600.0
+        assert await provider.get(40.7128, -74.006) == fresh
+        assert provider.stats()["stale_served"] == 1
+
+        clock.now = 3601.0
+        with pytest.raises(WeatherUnavailableError, match="HTTP 502"):
+            await provider.get(40.7128, -74.006)
+        assert provider.stats()["upstream_errors"] == 2
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_failure_without_cached_data_raises_weather_unavailable():
+    async def main():
+        upstream = StubUpstream()
+        upstream.error = ConnectionResetError("upstream hung up")
+        provider = _provider(upstream, Clock())
+        with pytest.raises(WeatherUnavailableError, match="upstream hung up"):
+            await provider.get(35.0, 139.0)
+        # The failed fetch is not kept in flight: the next lookup tries again
+        upstream.error = None
+        assert (await provider.get(35.0, 139.0))["condition"] == OBSERVATION["condition"]
+        assert len(upstream.calls) == 2
+        await provider.aclose()
+
+    asyncio.run(main())
+
+
+def test_slow_upstream_times_out():
+    async def main():
+        upstream = StubUpstream()
+        upstream.gate = asyncio.Event()  # never set
+        provider = _provider(upstream, Clock(), timeout=0.01)
+        with pytest.raises(WeatherUnavailableError, match="Timeout"):
+            await provider.get(0.0, 0.0)
+        await provider.aclose()
+
+    asyncio.run(main())
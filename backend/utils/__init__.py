@@ -1,22 +1,57 @@
 """
 Utility functions package
+
+Exports are imported on first access: importing the preprocessing helpers
+does not load the HTTP client behind the weather provider.
 """
-from .preprocessing import (
-    normalize_color_names,
-    normalize_style_names,
-    preprocess_user_preferences,
-    preprocess_weather_data,
-    preprocess_occasion,
-    extract_color_features,
-    validate_recommendation_input,
-)
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_exports
+
+_EXPORTS = {
+    "canonical_color": ".preprocessing",
+    "canonical_style": ".preprocessing",
+    "normalize_color_names": ".preprocessing",
+    "normalize_style_names": ".preprocessing",
+    "preprocess_user_preferences": ".preprocessing",
+    "preprocess_weather_data": ".preprocessing",
+    "preprocess_occasion": ".preprocessing",
+    "extract_color_features": ".preprocessing",
+    "validate_recommendation_input": ".preprocessing",
+    "TTLCache": ".cache",
+    "SingleFlight": ".singleflight",
+    "FragmentCache": ".serialization",
+    "OutfitFragment": ".serialization",
+    "ProfileStore": ".profiles",
+    "UserProfile": ".profiles",
+    "RequestCapture": ".capture",
+    "AdmissionController": ".admission",
+    "PayloadCache": ".payloads",
+    "WeatherProvider": ".weather",
+    "WeatherUnavailableError": ".weather",
+}
+
+if TYPE_CHECKING:
+    from .preprocessing import (
+        canonical_color,
+        canonical_style,
+        normalize_color_names,
+        normalize_style_names,
+        preprocess_user_preferences,
+        preprocess_weather_data,
+        preprocess_occasion,
+        extract_color_features,
+        validate_recommendation_input,
+    )
+    from .cache import TTLCache
+    from .singleflight import SingleFlight
+    from .serialization import FragmentCache, OutfitFragment
+    from .profiles import ProfileStore, UserProfile
+    from .capture import RequestCapture
+    from .admission import AdmissionController
+    from .payloads import PayloadCache
+    from .weather import WeatherProvider, WeatherUnavailableError
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
-__all__ = [
-    "normalize_color_names",
-    "normalize_style_names",
-    "preprocess_user_preferences",
-    "preprocess_weather_data",
-    "preprocess_occasion",
-    "extract_color_features",
-    "validate_recommendation_input",
-]
+__all__ = list(_EXPORTS)
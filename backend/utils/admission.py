@@ -0,0 +1,270 @@
+"""
+Deadline-aware admission control
+Limits how many expensive requests run at once, queues the overflow by
+priority, sheds requests that cannot finish before their deadline and
+switches to a degraded mode while the queue is long
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+SHED_REASONS = ("queue_full", "deadline", "degraded_miss")
+
+
+class AdmissionRoute(NamedTuple):
+    """An admission-controlled route"""
+
+    name: str
+    # Lower runs first when requests queue
+    priority: int = 0
+    # Can be answered from cached or materialized results under pressure
+    degradable: bool = False
+
+
+class Overloaded(Exception):
+    """A request was shed"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Admission of one request: its slot, deadline and mode"""
+
+    __slots__ = ("route", "deadline", "degraded", "admitted_at", "holds_slot")
+
+    def __init__(self, route: AdmissionRoute, deadline: Optional[float]):
+        self.route = route
+        # time.monotonic() by which the client wants the response
+        self.deadline = deadline
+        self.degraded = False
+        self.admitted_at = 0.0
+        self.holds_slot = False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None without one"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+class _RouteStats:
+    __slots__ = ("in_flight", "queued", "service_seconds", "admitted", "degraded", "shed")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        # Exponentially weighted mean time from admission to response
+        self.service_seconds = 0.0
+        self.admitted = 0
+        self.degraded = 0
+        self.shed = dict.fromkeys(SHED_REASONS, 0)
+
+
+class AdmissionController:
+    """
+    Concurrency gate in front of expensive routes
+
+    At most ``max_concurrency`` admitted requests run at once; the rest wait
+    in a priority queue of at most ``max_queue``. Each route's recent
+    service time (EWMA) estimates when a queued request would finish, and a
+    request whose deadline falls before that is refused at once instead of
+    queueing. While ``degrade_queue_depth`` or more requests wait, degradable
+    routes skip the queue and run in degraded mode, answering only from
+    cached or materialized results. Routes that are not admission-controlled
+    (health checks, metrics) never wait.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        max_queue: int = 512,
+        degrade_queue_depth: int = 128,
+        smoothing: float = 0.2,
+    ):
+        """
+        Args:
+            max_concurrency: Admitted requests running at once
+            max_queue: Requests waiting for a slot; more are shed
+            degrade_queue_depth: Queue length that turns on degraded mode;
+                0 disables degraded mode
+            smoothing: Weight of the newest sample in the service time EWMA
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.degrade_queue_depth = degrade_queue_depth
+        self.smoothing = smoothing
+        self._running = 0
+        # (priority, sequence, future) of waiting requests
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._routes: Dict[str, _RouteStats] = {}
+        self.degraded_mode = False
+        self.degraded_activations = 0
+
+    def _stats(self, route: AdmissionRoute) -> _RouteStats:
+        stats = self._routes.get(route.name)
+        if stats is None:
+            stats = self._routes[route.name] = _RouteStats()
+        return stats
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    def _service_estimate(self) -> float:
+        """Mean recent service time over the routes seen, weighted by in-flight work"""
+        busy = [stats for stats in self._routes.values() if stats.service_seconds > 0]
+        if not busy:
+            return 0.0
+        weights = [stats.in_flight + stats.queued + 1 for stats in busy]
+        return sum(stats.service_seconds * w for stats, w in zip(busy, weights)) / sum(weights)
+
+    def expected_wait(self, priority: int = 0) -> float:
+        """
+        Seconds a request of this priority would wait for a slot
+
+        Requests of the same or a higher priority (lower number) queue
+        ahead of it; each slot frees up after about one service time.
+        """
+        if self._running < self.max_concurrency and not self._waiting:
+            return 0.0
+        ahead = sum(1 for entry in self._queue if entry[0] <= priority and not entry[2].done())
+        return (ahead // self.max_concurrency + 1) * self._service_estimate()
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait before retrying"""
+        return max(1, math.ceil(self.expected_wait(0)))
+
+    def _update_mode(self):
+        degraded = 0 < self.degrade_queue_depth <= self._waiting
+        if degraded and not self.degraded_mode:
+            self.degraded_activations += 1
+        self.degraded_mode = degraded
+
+    def _shed(self, route: AdmissionRoute, reason: str) -> Overloaded:
+        self._stats(route).shed[reason] += 1
+        return Overloaded(reason, self.retry_after())
+
+    def record_shed(self, ticket: Ticket, reason: str) -> int:
+        """
+        Count a request an admitted handler could not serve
+
+        Returns:
+            Retry-After seconds for the response
+        """
+        return self._shed(ticket.route, reason).retry_after
+
+    async def admit(self, route: AdmissionRoute, deadline: Optional[float] = None) -> Ticket:
+        """
+        Wait for a slot, or admit in degraded mode
+
+        Args:
+            route: Route being requested
+            deadline: time.monotonic() by which the response is due
+
+        Returns:
+            Ticket to pass to release() once the response is sent
+
+        Raises:
+            Overloaded: The request is shed
+        """
+        ticket = Ticket(route, deadline)
+        stats = self._stats(route)
+        remaining = ticket.remaining()
+        if remaining is not None and remaining <= 0:
+            raise self._shed(route, "deadline")
+
+        if self._running < self.max_concurrency and not self._waiting:
+            # A free slot always admits, so a stale estimate cannot shed an idle server
+            self._running += 1
+            ticket.holds_slot = True
+        elif route.degradable and self.degraded_mode:
+            ticket.degraded = True
+            stats.degraded += 1
+        else:
+            if self._waiting >= self.max_queue:
+                raise self._shed(route, "queue_full")
+            if remaining is not None and self.expected_wait(route.priority) + stats.service_seconds > remaining:
+                raise self._shed(route, "deadline")
+            await self._wait(ticket, stats, remaining)
+
+        ticket.admitted_at = time.monotonic()
+        stats.in_flight += 1
+        stats.admitted += 1
+        return ticket
+
+    async def _wait(self, ticket: Ticket, stats: _RouteStats, timeout: Optional[float]):
+        """Queue for a slot; release() hands it over by resolving the future"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (ticket.route.priority, next(self._sequence), future))
+        self._waiting += 1
+        stats.queued += 1
+        self._update_mode()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise self._shed(ticket.route, "deadline")
+        except asyncio.CancelledError:
+            # The client went away; a slot handed over meanwhile is passed on
+            if future.done() and not future.cancelled():
+                self._running -= 1
+                self._wake()
+            raise
+        finally:
+            stats.queued -= 1
+            if not future.done() or future.cancelled():
+                self._waiting -= 1
+            self._update_mode()
+        ticket.holds_slot = True
+
+    def _wake(self):
+        """Hand free slots to the first waiting requests"""
+        while self._queue and self._running < self.max_concurrency:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._running += 1
+            self._waiting -= 1
+            future.set_result(None)
+
+    def release(self, ticket: Ticket):
+        """Return the ticket's slot and record its service time"""
+        stats = self._stats(ticket.route)
+        stats.in_flight -= 1
+        # Degraded requests hold no slot, and their quick answers would skew the estimate
+        if ticket.holds_slot:
+            elapsed = time.monotonic() - ticket.admitted_at
+            if stats.service_seconds == 0:
+                stats.service_seconds = elapsed
+            else:
+                stats.service_seconds += self.smoothing * (elapsed - stats.service_seconds)
+            self._running -= 1
+            self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        """Slot use, queue depth, mode and per-route counters"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "max_queue": self.max_queue,
+            "degrade_queue_depth": self.degrade_queue_depth,
+            "degraded_mode": self.degraded_mode,
+            "degraded_activations": self.degraded_activations,
+            "routes": {
+                name: {
+                    "in_flight": stats.in_flight,
+                    "queued": stats.queued,
+                    "service_ms": round(stats.service_seconds * 1000, 3),
+                    "admitted": stats.admitted,
+                    "degraded": stats.degraded,
+                    "shed": dict(stats.shed),
+                }
+                for name, stats in self._routes.items()
+            },
+        }
@@ -0,0 +1,180 @@
+"""
+Async micro-batching
+Collects concurrent single-item calls into batches for a batched function
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Called with (batch size, seconds the oldest item waited, seconds the batch ran)
+BatchObserver = Callable[[int, float, float], None]
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Queue in front of a batched function
+
+    ``submit`` enqueues one item and awaits its result. A worker task takes
+    the first waiting item, keeps collecting until ``max_batch_size`` items
+    or ``max_wait_ms`` have passed, then runs the batch function in a
+    dedicated thread so the event loop stays free. Items arriving while a
+    batch runs form the next batch.
+
+    Larger ``max_batch_size`` and ``max_wait_ms`` raise throughput at the
+    cost of latency for lone requests.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Sequence[T]], List[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        observer: Optional[BatchObserver] = None,
+    ):
+        """
+        Args:
+            batch_fn: Maps a list of items to a list of results, in order
+            max_batch_size: Largest batch passed to batch_fn
+            max_wait_ms: Longest time the first item in a batch waits for more
+            observer: Called after every batch
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.observer = observer
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Batch being collected or run, failed by close()
+        self._batch: List[Tuple[T, asyncio.Future, float]] = []
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+        self.batch_sizes: Dict[int, int] = {}
+
+    def _start(self):
+        if self._worker is None or self._worker.done():
+            if self._executor is None:
+                # One thread: batches run back to back, and the batch
+                # function may use several cores itself
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batch")
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def submit(self, item: T) -> R:
+        """
+        Queue one item and wait for its result
+
+        Raises:
+            Whatever the batch function raised for the batch containing it
+        """
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[T, asyncio.Future, float]]:
+        batch = self._batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.perf_counter()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            # asyncio.wait rather than wait_for, so an item that arrives just
+            # as the deadline passes is kept instead of lost
+            getter = asyncio.ensure_future(self._queue.get())
+            done, _ = await asyncio.wait((getter,), timeout=remaining)
+            if done:
+                batch.append(getter.result())
+                continue
+            getter.cancel()
+            try:
+                batch.append(await getter)
+            except asyncio.CancelledError:
+                pass
+            break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            live = [entry for entry in batch if not entry[1].done()]
+            if not live:
+                continue
+
+            started = time.perf_counter()
+            waited = started - min(entry[2] for entry in live)
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.batch_fn, [entry[0] for entry in live]
+                )
+                if len(results) != len(live):
+                    raise RuntimeError(
+                        f"Batch function returned {len(results)} results for {len(live)} items"
+                    )
+            except Exception as e:
+                self.failures += 1
+                for _, future, _ in live:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(live, results):
+                    if not future.done():
+                        future.set_result(result)
+            ran = time.perf_counter() - started
+
+            self.batches += 1
+            self.items += len(live)
+            self.wait_seconds += waited
+            self.run_seconds += ran
+            self.batch_sizes[len(live)] = self.batch_sizes.get(len(live), 0) + 1
+            if self.observer is not None:
+                self.observer(len(live), waited, ran)
+
+    async def close(self):
+        """Stop the worker and fail anything still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        abandoned = list(self._batch)
+        self._batch = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                abandoned.append(self._queue.get_nowait())
+        for _, future, _ in abandoned:
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher closed"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counters and the batch size distribution"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "failures": self.failures,
+            "mean_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+            "mean_wait_ms": round(self.wait_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+            "mean_run_ms": round(self.run_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
@@ -0,0 +1,188 @@
+"""
+Sampled request capture
+A share of normalized recommendation requests is buffered in memory and
+appended in gzip-compressed batches to a local file, for offline replay
+(scripts/replay.py)
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CapturedRequest(NamedTuple):
+    """A normalized request as the model receives it"""
+
+    timestamp: float
+    user_preferences: Dict[str, Any]
+    weather: Dict[str, Any]
+    occasion: str
+
+
+def _encode(request: CapturedRequest) -> bytes:
+    timestamp, user_preferences, weather, occasion = request
+    # Kept as normalized (avoid_colors may be [] or None), so replays match
+    record = [
+        round(timestamp, 3),
+        user_preferences.get("styles"),
+        user_preferences.get("colors"),
+        user_preferences.get("avoid_colors"),
+        weather,
+        occasion,
+    ]
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """
+    Requests of a capture file, oldest first
+
+    The file is a series of gzip members of NDJSON records
+    ``[timestamp, styles, colors, avoid_colors, weather, occasion]``, with
+    preferences as they were captured. A batch torn by a crash mid-write
+    ends the iteration.
+    """
+    with gzip.open(path, "rb") as f:
+        try:
+            for line in f:
+                try:
+                    timestamp, styles, colors, avoid_colors, weather, occasion = json.loads(line)
+                except ValueError:
+                    return
+                yield CapturedRequest(
+                    timestamp,
+                    {"styles": styles, "colors": colors, "avoid_colors": avoid_colors},
+                    weather,
+                    occasion,
+                )
+        except (EOFError, OSError, zlib.error):
+            return
+
+
+class RequestCapture:
+    """
+    Samples normalized requests into a compact append-only file
+
+    offer() runs on the request path: it draws the sample and appends to an
+    in-memory list, dropping requests when the list is full. A background
+    task (run) compresses and writes the list in a worker thread. Capture
+    stops once the file reaches ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        sample_rate: float = 0.01,
+        buffer_size: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path: Capture file; None disables capture
+            sample_rate: Share of requests captured (0-1)
+            buffer_size: Requests held in memory between writes
+            max_bytes: File size at which capture stops
+        """
+        self.path = path
+        self.sample_rate = sample_rate if path else 0.0
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self._pending: List[CapturedRequest] = []
+        self._random = random.Random()
+        self.size = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_errors = 0
+        self.full = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and not self.full
+
+    def offer(self, user_preferences: Dict[str, Any], weather: Dict[str, Any], occasion: str) -> bool:
+        """
+        Capture a normalized request if it is sampled
+
+        Returns:
+            True if the request was buffered for writing
+        """
+        if not self.enabled or self._random.random() >= self.sample_rate:
+            return False
+        self.sampled += 1
+        if len(self._pending) >= self.buffer_size:
+            self.dropped += 1
+            return False
+        self._pending.append(CapturedRequest(time.time(), user_preferences, weather, occasion))
+        return True
+
+    def _write(self, requests: List[CapturedRequest]) -> int:
+        """Append one gzip member holding the requests; blocking"""
+        data = gzip.compress(b"".join(_encode(request) for request in requests), compresslevel=6)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            self.size = f.tell()
+        return len(requests)
+
+    async def flush(self) -> int:
+        """
+        Write the buffered requests
+
+        Returns:
+            Number of requests written
+        """
+        if not self._pending or self.path is None:
+            return 0
+        requests, self._pending = self._pending, []
+        if self.size == 0 and os.path.exists(self.path):
+            self.size = os.path.getsize(self.path)
+        if self.size >= self.max_bytes:
+            self.full = True
+            self.dropped += len(requests)
+            logger.info("Request capture %s reached %d bytes; capture stopped", self.path, self.size)
+            return 0
+        try:
+            written = await asyncio.to_thread(self._write, requests)
+        except Exception:
+            self.write_errors += 1
+            self.dropped += len(requests)
+            raise
+        self.written += written
+        return written
+
+    async def run(self, interval: float):
+        """Write buffered requests every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing captured requests to %s failed", self.path)
+
+    async def close(self):
+        """Write whatever is still buffered"""
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Sampling, drop and write counters"""
+        return {
+            "path": self.path,
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "buffered": len(self._pending),
+            "buffer_size": self.buffer_size,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "file_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "full": self.full,
+        }
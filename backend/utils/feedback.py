@@ -0,0 +1,562 @@
+"""
+Recommendation feedback ingestion
+Events are accepted into a fixed-size in-memory ring buffer, written in
+batches to an append-only log of rotating segment files, and folded into
+per-outfit counters that compaction snapshots to disk
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: one process per feedback directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("click", "save", "dismiss")
+_ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+SEGMENT_PREFIX = "feedback-"
+SEGMENT_SUFFIX = ".log"
+SNAPSHOT_FILE = "counters.json"
+LOCK_FILE = "compact.lock"
+
+
+class FeedbackEvent(NamedTuple):
+    """One interaction with a recommended outfit"""
+
+    timestamp: float
+    outfit_id: str
+    action: str
+    user_id: Optional[str] = None
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of feedback events
+
+    Used from the event loop only. When full, new events are refused rather
+    than evicting unwritten ones; callers pass the refusal on as backpressure.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots: List[Optional[FeedbackEvent]] = [None] * capacity
+        self._head = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def offer(self, events: Sequence[FeedbackEvent]) -> bool:
+        """
+        Append all events, or none of them when they do not fit
+
+        Returns:
+            True if the events were accepted
+        """
+        if self._size + len(events) > self.capacity:
+            return False
+        tail = (self._head + self._size) % self.capacity
+        for event in events:
+            self._slots[tail] = event
+            tail = (tail + 1) % self.capacity
+        self._size += len(events)
+        return True
+
+    def drain(self, limit: int) -> List[FeedbackEvent]:
+        """Remove and return up to ``limit`` of the oldest events"""
+        count = min(limit, self._size)
+        events = []
+        for _ in range(count):
+            events.append(self._slots[self._head])
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.capacity
+        self._size -= count
+        return events
+
+
+class FeedbackCounters:
+    """Per-outfit action counts, read in O(1) by outfit id"""
+
+    def __init__(self, counts: Optional[Dict[str, List[int]]] = None):
+        self._counts: Dict[str, List[int]] = counts or {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, events: Sequence[FeedbackEvent]):
+        for event in events:
+            counts = self._counts.get(event.outfit_id)
+            if counts is None:
+                counts = self._counts[event.outfit_id] = [0] * len(ACTIONS)
+            counts[_ACTION_INDEX[event.action]] += 1
+
+    def merge(self, counts: Dict[str, List[int]]):
+        """Add counts taken from another counter's snapshot"""
+        for outfit_id, added in counts.items():
+            total = self._counts.setdefault(outfit_id, [0] * len(ACTIONS))
+            for i, count in enumerate(added):
+                total[i] += count
+
+    def get(self, outfit_id: str) -> Dict[str, int]:
+        """Action counts of an outfit, zero for outfits without feedback"""
+        counts = self._counts.get(outfit_id)
+        return dict(zip(ACTIONS, counts if counts is not None else [0] * len(ACTIONS)))
+
+    def snapshot(self) -> Dict[str, List[int]]:
+        return {outfit_id: list(counts) for outfit_id, counts in self._counts.items()}
+
+
+def _encode(event: FeedbackEvent) -> bytes:
+    return json.dumps(list(event), separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _read_segment(path: str) -> List[FeedbackEvent]:
+    """Events of a segment file; a line torn by a crash mid-write is skipped"""
+    events = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                timestamp, outfit_id, action, user_id = json.loads(line)
+            except ValueError:
+                continue
+            if action in _ACTION_INDEX:
+                events.append(FeedbackEvent(timestamp, outfit_id, action, user_id))
+    return events
+
+
+def _flock(f, exclusive: bool = True, blocking: bool = True) -> bool:
+    """
+    Lock an open file for as long as it stays open
+
+    Returns:
+        False when ``blocking`` is off and another file handle holds the
+        lock; always True where flock is unavailable
+    """
+    if fcntl is None:
+        return True
+    flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    if not blocking:
+        flags |= fcntl.LOCK_NB
+    try:
+        fcntl.flock(f.fileno(), flags)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def folded_segments(snapshot: Dict[str, Any], segments: Sequence[int]) -> Set[int]:
+    """Segments whose events the snapshot already counts"""
+    folded = snapshot.get("segments")
+    if folded is None:
+        # Snapshots written before the folded list was kept
+        return {seq for seq in segments if seq <= snapshot["through"]}
+    return set(folded)
+
+
+class FeedbackLog:
+    """
+    Append-only event log split into numbered segment files
+
+    Appends go to this log's active segment, which is rotated once it
+    reaches ``segment_bytes``. Several processes can share a directory:
+    each holds an exclusive lock on its active segment, so compaction,
+    which only takes segments it can lock, never removes a segment that is
+    still being appended to. Segment numbers are never reused, not even
+    after compaction has removed the newest segments, because the snapshot
+    keeps the highest number folded. A new log always starts a fresh segment.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024, fsync: bool = True):
+        """
+        Args:
+            directory: Directory holding segments and the counter snapshot
+            segment_bytes: Size at which the active segment is rotated
+            fsync: fsync after every appended batch
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._active = None
+        self._active_seq = 0
+        self._active_bytes = 0
+        self.events_written = 0
+        self.batches_written = 0
+        self.fsyncs = 0
+        self.rotations = 0
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+
+    @property
+    def active_seq(self) -> Optional[int]:
+        """Segment this log appends to, None before its first append"""
+        return self._active_seq if self._active is not None else None
+
+    def segments(self) -> List[int]:
+        """Sequence numbers of the segment files on disk, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        seqs = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    seqs.append(int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(seqs)
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    def read_snapshot(self) -> Dict[str, Any]:
+        """
+        Counter snapshot: 'counts' per outfit, the folded 'segments' and the
+        highest segment number folded so far ('through')
+        """
+        if not os.path.exists(self._snapshot_path()):
+            return {"through": 0, "segments": [], "counts": {}}
+        with open(self._snapshot_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_snapshot(self, snapshot: Dict[str, Any]):
+        """Replace the snapshot atomically"""
+        path = self._snapshot_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    @contextlib.contextmanager
+    def locked(self, exclusive: bool = True) -> Iterator[None]:
+        """
+        Hold the directory's compaction lock
+
+        Compaction takes it exclusively; replay takes it shared, so it never
+        sees a snapshot without the segments it replaced.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_FILE), "a+b") as f:
+            _flock(f, exclusive)
+            yield
+
+    def _open(self, seq: int):
+        """
+        Create and lock a segment numbered ``seq`` or higher
+
+        Numbers taken by another process are skipped, as is a new file that
+        a compaction removed before it could be locked.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(self._path(seq), os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+            except FileExistsError:
+                seq += 1
+                continue
+            f = os.fdopen(fd, "ab")
+            _flock(f)
+            if os.fstat(f.fileno()).st_nlink == 0:
+                f.close()
+                seq += 1
+                continue
+            break
+        self._active = f
+        self._active_seq = seq
+        self._active_bytes = 0
+
+    def _next_seq(self) -> int:
+        """A number above every segment on disk or folded into the snapshot"""
+        # Listed before the snapshot is read: a compaction removing segments
+        # in between has already recorded them as folded
+        segments = self.segments()
+        through = self.read_snapshot()["through"]
+        return max(segments[-1] if segments else 0, through, self._active_seq) + 1
+
+    def append(self, events: Sequence[FeedbackEvent]):
+        """
+        Write a batch with one write call and at most one fsync
+
+        Blocking; run it off the event loop.
+        """
+        if not events:
+            return
+        if self._active is None:
+            self._open(self._next_seq())
+        elif self._active_bytes >= self.segment_bytes:
+            self._active.close()
+            self._active = None
+            self._open(self._next_seq())
+            self.rotations += 1
+        data = b"".join(_encode(event) for event in events)
+        self._active.write(data)
+        self._active.flush()
+        if self.fsync:
+            os.fsync(self._active.fileno())
+            self.fsyncs += 1
+        self._active_bytes += len(data)
+        self.events_written += len(events)
+        self.batches_written += 1
+
+    def claim(self, seqs: Sequence[int]) -> List[Tuple[int, Any]]:
+        """
+        Lock the given segments that no log is appending to
+
+        Returns:
+            (seq, open file) of each segment locked; closing the file
+            releases it
+        """
+        claimed = []
+        for seq in seqs:
+            if seq == self.active_seq:
+                continue
+            try:
+                f = open(self._path(seq), "rb")
+            except FileNotFoundError:
+                continue
+            if _flock(f, blocking=False):
+                claimed.append((seq, f))
+            else:
+                f.close()
+        return claimed
+
+    def read(self, seq: int) -> List[FeedbackEvent]:
+        return _read_segment(self._path(seq))
+
+    def remove(self, seq: int):
+        os.remove(self._path(seq))
+
+    def close(self):
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+
+
+class FeedbackPipeline:
+    """
+    Ring buffer -> segment log -> per-outfit counters
+
+    ``submit`` only touches memory; ``run`` drains the buffer in batches to
+    the log off the event loop and counts events once they are written.
+    ``compact`` folds segments no process appends to any more into the
+    counter snapshot and deletes them, so restarts replay only what the
+    snapshot does not count yet.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str],
+        buffer_size: int = 65536,
+        batch_size: int = 4096,
+        segment_bytes: int = 16 * 1024 * 1024,
+        fsync: bool = True,
+    ):
+        """
+        Args:
+            directory: Log directory; None keeps counters in memory only
+            buffer_size: Events held before submissions are refused
+            batch_size: Most events written per log append
+            segment_bytes: Size at which a log segment is rotated
+            fsync: fsync the log after every batch
+        """
+        self.buffer = RingBuffer(buffer_size)
+        self.batch_size = batch_size
+        self.log = FeedbackLog(directory, segment_bytes, fsync) if directory else None
+        self.counters = FeedbackCounters()
+        # Batch taken from the buffer whose write failed; retried first
+        self._unwritten: List[FeedbackEvent] = []
+        # Held while writing, so load never sees a segment being created
+        self._writing = asyncio.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.write_errors = 0
+        self.loaded = False
+        self.compactions = 0
+        self.compacted_through = 0
+        self.last_compaction_seconds = 0.0
+
+    def submit(self, events: Sequence[FeedbackEvent]) -> bool:
+        """
+        Queue events for writing
+
+        Returns:
+            False when the buffer cannot take them all (nothing is queued)
+        """
+        if not self.buffer.offer(events):
+            self.rejected += len(events)
+            return False
+        self.accepted += len(events)
+        return True
+
+    def _replay(self, exclude: Optional[int]) -> Tuple[FeedbackCounters, int, int]:
+        """Counters from the snapshot plus the segments it does not fold in; blocking"""
+        with self.log.locked(exclusive=False):
+            snapshot = self.log.read_snapshot()
+            segments = self.log.segments()
+            folded = folded_segments(snapshot, segments)
+            counters = FeedbackCounters(snapshot["counts"])
+            replayed = 0
+            for seq in segments:
+                if seq not in folded and seq != exclude:
+                    events = self.log.read(seq)
+                    counters.add(events)
+                    replayed += len(events)
+        return counters, snapshot["through"], replayed
+
+    async def load(self) -> int:
+        """
+        Rebuild the counters from the snapshot and the segments written
+        before this process started
+
+        Returns:
+            Number of events replayed from segments
+        """
+        if self.log is None:
+            self.loaded = True
+            return 0
+        async with self._writing:
+            # The segment this process appends to is already in the counters
+            active = self.log.active_seq
+        counters, through, replayed = await asyncio.to_thread(self._replay, active)
+        counters.merge(self.counters.snapshot())
+        self.counters = counters
+        self.compacted_through = through
+        self.loaded = True
+        logger.info("Loaded feedback counters for %d outfits (%d events replayed)", len(counters), replayed)
+        return replayed
+
+    async def flush(self) -> int:
+        """
+        Write buffered events to the log, one batch at a time
+
+        Returns:
+            Number of events written
+        """
+        written = 0
+        async with self._writing:
+            while self._unwritten or len(self.buffer):
+                batch = self._unwritten or self.buffer.drain(self.batch_size)
+                self._unwritten = batch
+                if self.log is not None:
+                    try:
+                        await asyncio.to_thread(self.log.append, batch)
+                    except Exception:
+                        self.write_errors += 1
+                        raise
+                self._unwritten = []
+                self.counters.add(batch)
+                written += len(batch)
+        return written
+
+    def _compact(self) -> int:
+        """
+        Fold every segment no log is appending to into a new snapshot, then
+        delete them; blocking
+
+        Returns:
+            Number of segments folded
+        """
+        started = time.perf_counter()
+        with self.log.locked():
+            snapshot = self.log.read_snapshot()
+            segments = self.log.segments()
+            folded = folded_segments(snapshot, segments)
+            claimed = self.log.claim([seq for seq in segments if seq not in folded])
+            if not claimed:
+                return 0
+            try:
+                merged = FeedbackCounters(snapshot["counts"])
+                for seq, _ in claimed:
+                    merged.add(self.log.read(seq))
+                seqs = [seq for seq, _ in claimed]
+                self.log.write_snapshot(
+                    {
+                        "through": max(snapshot["through"], seqs[-1]),
+                        # Folded segments a crash left on disk stay listed until removed
+                        "segments": sorted((folded & set(segments)) | set(seqs)),
+                        "counts": merged.snapshot(),
+                    }
+                )
+                # A crash before the removals is harmless: replay skips folded segments
+                for seq in seqs:
+                    self.log.remove(seq)
+            finally:
+                for _, f in claimed:
+                    f.close()
+            self.compacted_through = max(snapshot["through"], seqs[-1])
+        self.last_compaction_seconds = time.perf_counter() - started
+        return len(seqs)
+
+    async def compact(self) -> int:
+        """
+        Fold segments no process is appending to into the counter snapshot
+        and delete them
+
+        Returns:
+            Number of segments compacted
+        """
+        if self.log is None or not self.loaded:
+            return 0
+        compacted = await asyncio.to_thread(self._compact)
+        if compacted:
+            self.compactions += 1
+        return compacted
+
+    async def run(self, interval: float, compact_interval: float):
+        """
+        Flush every ``interval`` seconds and compact every ``compact_interval``
+        seconds until cancelled
+
+        A failed write is logged and retried with the same batch; events keep
+        accumulating in the buffer meanwhile.
+        """
+        last_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing feedback events failed")
+                continue
+            if compact_interval > 0 and time.monotonic() - last_compaction >= compact_interval:
+                last_compaction = time.monotonic()
+                try:
+                    await self.compact()
+                except Exception:
+                    logger.exception("Compacting the feedback log failed")
+
+    async def close(self):
+        """Write everything still buffered and close the active segment"""
+        try:
+            await self.flush()
+        finally:
+            if self.log is not None:
+                self.log.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer fill, write and compaction counters"""
+        log = self.log
+        return {
+            "buffered": len(self.buffer) + len(self._unwritten),
+            "capacity": self.buffer.capacity,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": log.events_written if log is not None else 0,
+            "batches": log.batches_written if log is not None else 0,
+            "fsyncs": log.fsyncs if log is not None else 0,
+            "write_errors": self.write_errors,
+            "segments": len(log.segments()) if log is not None else 0,
+            "rotations": log.rotations if log is not None else 0,
+            "compactions": self.compactions,
+            "compacted_through": self.compacted_through,
+            "last_compaction_ms": round(self.last_compaction_seconds * 1000, 3),
+            "outfits": len(self.counters),
+        }
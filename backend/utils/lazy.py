@@ -0,0 +1,37 @@
+"""
+Deferred imports for package exports
+"""
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Module ``__getattr__`` and ``__dir__`` that import each export on first access
+
+    Importing one submodule of the package then no longer imports every
+    other one (and whatever they depend on).
+
+    Args:
+        package: The package's ``__name__``
+        exports: Exported name -> submodule defining it, relative to the package
+
+    Returns:
+        (__getattr__, __dir__) to assign in the package's ``__init__``
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Later lookups find the name directly
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
+
@@ -0,0 +1,302 @@
+"""
+In-process metrics
+Counters and latency histograms rendered in the Prometheus text format
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds, from 50 µs to 2.5 s
+DEFAULT_LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (name, type, help, [(labels, value)]) produced at scrape time
+Collected = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+
+    Not thread-safe on its own; MetricsRegistry gives each thread its own.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other: "Histogram"):
+        """Add another histogram's observations (same buckets) to this one"""
+        for index, count in enumerate(list(other.counts)):
+            self.counts[index] += count
+        self.sum += other.sum
+        # Derived from the buckets so a concurrent observe cannot leave them inconsistent
+        self.count = sum(self.counts)
+
+
+class _Shard:
+    """One thread's counters and histograms; only that thread writes to it"""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels)
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Registry of counters, histograms and scrape-time collectors
+
+    Each thread records into its own shard, so observations from the event
+    loop and the scoring pool threads take no lock; a scrape merges the
+    shards. Shards of finished threads are kept, as their counts still
+    belong to the totals. A scrape racing an observation may miss that
+    observation until the next scrape, but never sees a torn histogram.
+
+    With ``enabled=False`` nothing is recorded, and callers on hot paths are
+    expected to check ``enabled`` (or skip installing their hooks) so that
+    disabled metrics cost nothing.
+    """
+
+    def __init__(self, namespace: str = "outfitgenie", enabled: bool = True):
+        """
+        Args:
+            namespace: Prefix for every metric name
+            enabled: Record observations
+        """
+        self.namespace = namespace
+        self.enabled = enabled
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: List[Callable[[], Iterable[Collected]]] = []
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        # Taken once per thread, to register its shard, and by scrapes
+        self._lock = threading.Lock()
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def counter(self, name: str, help_text: str):
+        """Declare a counter"""
+        self._help[name] = ("counter", help_text)
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    ):
+        """Declare a histogram"""
+        self._help[name] = ("histogram", help_text)
+        self._buckets[name] = buckets
+
+    def add_collector(self, collector: Callable[[], Iterable[Collected]]):
+        """
+        Register a callback producing gauge/counter samples when scraped
+
+        Used for values owned elsewhere (cache counters, catalog size) so
+        they are read only at scrape time.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        counters = self._shard().counters
+        series = counters.get(name)
+        if series is None:
+            if self._help[name][0] != "counter":
+                raise KeyError(name)
+            series = counters[name] = {}
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Record a histogram observation"""
+        if not self.enabled:
+            return
+        histograms = self._shard().histograms
+        series = histograms.get(name)
+        if series is None:
+            series = histograms[name] = {}
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self._buckets[name])
+        histogram.observe(value)
+
+    def reset(self):
+        """Drop every recorded observation"""
+        with self._lock:
+            for shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+
+    def _merged(self) -> Tuple[Dict[str, Dict[Labels, float]], Dict[str, Dict[Labels, Histogram]]]:
+        """Every declared metric's series, summed over the thread shards"""
+        counters: Dict[str, Dict[Labels, float]] = {}
+        histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        for name, (metric_type, _) in self._help.items():
+            (counters if metric_type == "counter" else histograms)[name] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            # Copied first: the owning thread may add series meanwhile
+            for name, series in list(shard.counters.items()):
+                merged = counters[name]
+                for labels, value in list(series.items()):
+                    merged[labels] = merged.get(labels, 0.0) + value
+            for name, series in list(shard.histograms.items()):
+                merged = histograms[name]
+                for labels, histogram in list(series.items()):
+                    if labels not in merged:
+                        merged[labels] = Histogram(self._buckets[name])
+                    merged[labels].merge(histogram)
+        return counters, histograms
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            Text ending with a newline
+        """
+        lines: List[str] = []
+        counters, histograms = self._merged()
+
+        for name, series in counters.items():
+            full_name = self._name(name)
+            lines.append(f"# HELP {full_name} {self._help[name][1]}")
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in series.items():
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name, series in histograms.items():
+            full_name = self._name(name)
+            lines.append(f"# HELP {full_name} {self._help[name][1]}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f"{full_name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}"
+                    )
+                lines.append(
+                    f"{full_name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}"
+                )
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+        for collector in self._collectors:
+            for name, metric_type, help_text, samples in collector():
+                full_name = self._name(name)
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                for labels, value in samples:
+                    key = tuple(sorted(labels.items()))
+                    lines.append(f"{full_name}{_format_labels(key)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Splits one request into consecutive timed stages
+
+    ``lap(stage)`` records the time since the previous lap (or since the
+    timer started) under ``stage``; ``mark()`` restarts the clock without
+    recording, for spans another component already timed.
+    """
+
+    __slots__ = ("_observe", "_last", "used")
+
+    def __init__(self, observe: Callable[[str, float], None]):
+        """
+        Args:
+            observe: Called with (stage, seconds)
+        """
+        self._observe = observe
+        self._last = time.perf_counter()
+        self.used = False
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self._observe(stage, now - self._last)
+        self._last = now
+        self.used = True
+
+    def mark(self):
+        self._last = time.perf_counter()
+
+
+class _NullStageTimer:
+    """Stand-in used when metrics are disabled"""
+
+    __slots__ = ()
+    used = False
+
+    def lap(self, stage: str):
+        pass
+
+    def mark(self):
+        pass
+
+
+NULL_STAGE_TIMER = _NullStageTimer()
@@ -0,0 +1,235 @@
+"""
+Cached response payloads with ETags and precompressed variants
+A payload is rendered once per cache entry; its gzip and brotli encodings
+are computed the first time a client accepts them and kept with it
+"""
+import gzip
+import hashlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .cache import TTLCache
+
+# Preferred first when a client accepts several equally
+ENCODINGS = ("br", "gzip")
+
+
+@lru_cache(maxsize=None)
+def _brotli():
+    """The brotli module, or None when it is not installed (brotli is optional)"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Content codings this process can produce"""
+    return tuple(encoding for encoding in ENCODINGS if encoding != "br" or _brotli() is not None)
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the repr of the given values, stable across processes"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def negotiate(accept_encoding: Optional[str], available: Tuple[str, ...]) -> Optional[str]:
+    """
+    Content coding to send for an Accept-Encoding header
+
+    Highest q-value wins, ties go to the order of ``available``; ``*``
+    covers codings not listed. None means the identity coding.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches a payload's ETag
+
+    Weak comparison, as for GET; the tags of the encoded variants
+    (``"<tag>-gzip"``) match too, since they carry the same content.
+    """
+    if not if_none_match:
+        return False
+    tag = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == tag or candidate.split("-", 1)[0] == tag:
+            return True
+    return False
+
+
+class EncodedPayload:
+    """A rendered response body, its ETag and its compressed variants"""
+
+    __slots__ = ("body", "etag", "media_type", "_variants")
+
+    def __init__(self, body: bytes, etag: str, media_type: str = "application/json"):
+        self.body = body
+        self.etag = etag
+        self.media_type = media_type
+        # encoding -> compressed body, or None when compression did not pay off
+        self._variants: Dict[str, Optional[bytes]] = {}
+
+    def variant(self, encoding: str) -> Optional[bytes]:
+        """Compressed body if it was already computed, None if it did not pay off"""
+        return self._variants.get(encoding)
+
+    def has_variant(self, encoding: str) -> bool:
+        return encoding in self._variants
+
+    def set_variant(self, encoding: str, body: Optional[bytes]):
+        self._variants[encoding] = body
+
+
+class PayloadCache:
+    """
+    Rendered payloads keyed by query, served with conditional and encoded responses
+
+    Each entry is rendered once, and compressed at most once per coding.
+    Compression runs only for bodies of at least ``min_compress_bytes``,
+    and a variant that comes out no smaller than the body is not used.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl: float = 300.0,
+        min_compress_bytes: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        """
+        Args:
+            maxsize: Payloads kept
+            ttl: Payload lifetime in seconds
+            min_compress_bytes: Smaller bodies are always sent uncompressed
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: brotli quality (0-11)
+        """
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.min_compress_bytes = min_compress_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.not_modified = 0
+        self.sent: Dict[str, int] = {"identity": 0, **{encoding: 0 for encoding in ENCODINGS}}
+        self.compressions = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+
+    def clear(self, *_):
+        """Drop every payload; registered as a catalog change listener"""
+        self.entries.clear()
+
+    def reset(self):
+        """Drop every payload and zero the response counters"""
+        self.entries.reset()
+        self.not_modified = self.compressions = self.bytes_sent = self.bytes_saved = 0
+        self.sent = dict.fromkeys(self.sent, 0)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Tuple[bytes, str]]) -> EncodedPayload:
+        """
+        Cached payload for a key, rendering it on a miss
+
+        Args:
+            key: Query the payload answers
+            render: Returns (body, etag)
+        """
+        payload = self.entries.get(key)
+        if payload is None:
+            body, etag = render()
+            payload = EncodedPayload(body, etag)
+            self.entries.set(key, payload)
+        return payload
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "gzip":
+            # mtime=0 keeps the bytes, and so the variant, deterministic
+            return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        return _brotli().compress(body, quality=self.brotli_quality)
+
+    def negotiated(self, payload: EncodedPayload, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Content coding to answer a client's Accept-Encoding with, without compressing
+
+        None means the identity coding: the body is too small, the client
+        accepts no coding we produce, or that coding already did not pay off.
+        """
+        if len(payload.body) < self.min_compress_bytes:
+            return None
+        encoding = negotiate(accept_encoding, available_encodings())
+        if encoding is None or (payload.has_variant(encoding) and payload.variant(encoding) is None):
+            return None
+        return encoding
+
+    def needs_compression(self, payload: EncodedPayload, encoding: Optional[str]) -> bool:
+        """Whether encoded() would compress, so callers can run it off the event loop"""
+        return encoding is not None and not payload.has_variant(encoding)
+
+    def encoded(self, payload: EncodedPayload, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Body to send in a negotiated coding, compressing on first use
+
+        Args:
+            payload: Cached payload
+            encoding: Coding returned by negotiated()
+
+        Returns:
+            (body, content coding or None for identity)
+        """
+        if encoding is None:
+            return payload.body, None
+        if not payload.has_variant(encoding):
+            compressed = self._compress(payload.body, encoding)
+            self.compressions += 1
+            payload.set_variant(encoding, compressed if len(compressed) < len(payload.body) else None)
+        body = payload.variant(encoding)
+        return (payload.body, None) if body is None else (body, encoding)
+
+    def record(self, payload: EncodedPayload, body: Optional[bytes], encoding: Optional[str]):
+        """Count one response: a 304 when ``body`` is None"""
+        if body is None:
+            self.not_modified += 1
+            self.bytes_saved += len(payload.body)
+            return
+        self.sent[encoding or "identity"] += 1
+        self.bytes_sent += len(body)
+        self.bytes_saved += len(payload.body) - len(body)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters plus conditional and encoded response counts"""
+        return {
+            **self.entries.stats(),
+            "not_modified": self.not_modified,
+            "sent": dict(self.sent),
+            "compressions": self.compressions,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_saved,
+            "encodings": list(available_encodings()),
+        }
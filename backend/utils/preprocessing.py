@@ -1,20 +1,18 @@
 """
 Data preprocessing utilities for outfit recommendation system
 """
+import re
+import sys
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Any
 
+# Canonical forms are memoized; the bound keeps hostile input from growing the cache
+NORMALIZATION_CACHE_SIZE = 4096
 
-def normalize_color_names(colors: List[str]) -> List[str]:
-    """
-    Normalize color names to standard values
-
-    Args:
-        colors: List of color names
-
-    Returns:
-        List of normalized color names
-    """
-    color_mapping = {
+# Abbreviations expanded inside color names (matched as whole words)
+COLOR_ABBREVIATIONS = MappingProxyType(
+    {
         "grey": "gray",
         "lite": "light",
         "dk": "dark",
@@ -27,16 +25,103 @@ def normalize_color_names(colors: List[str]) -> List[str]:
         "blk": "black",
         "wht": "white",
     }
+)
+
+STYLE_ALIASES = MappingProxyType(
+    {
+        "smart-casual": "smart casual",
+        "smart_casual": "smart casual",
+        "biz": "business",
+        "biz-casual": "business casual",
+        "athletic": "sporty",
+        "active": "sporty",
+        "professional": "business",
+    }
+)
+
+OCCASION_ALIASES = MappingProxyType(
+    {
+        "work": "business",
+        "office": "business",
+        "meeting": "business",
+        "interview": "formal",
+        "wedding": "formal",
+        "night out": "party",
+        "clubbing": "party",
+        "gym": "sports",
+        "workout": "sports",
+        "exercise": "sports",
+        "hiking": "outdoor",
+        "camping": "outdoor",
+        "beach": "casual",
+        "everyday": "casual",
+        "date night": "date",
+        "romantic": "date",
+    }
+)
+
+WEATHER_CONDITION_ALIASES = MappingProxyType(
+    {
+        "clear sky": "sunny",
+        "few clouds": "partly cloudy",
+        "scattered clouds": "cloudy",
+        "broken clouds": "cloudy",
+        "overcast clouds": "cloudy",
+        "light rain": "rainy",
+        "moderate rain": "rainy",
+        "heavy rain": "rainy",
+        "thunderstorm": "stormy",
+        "snow": "snowy",
+        "mist": "foggy",
+        "fog": "foggy",
+    }
+)
+
+WARM_COLORS = frozenset({"red", "orange", "yellow", "pink", "burgundy"})
+COOL_COLORS = frozenset({"blue", "green", "purple", "navy", "teal"})
+NEUTRAL_COLORS = frozenset({"black", "white", "gray", "beige", "brown"})
+
+# Runs of letters; everything else (spaces, hyphens, digits) passes through as-is
+_WORD = re.compile(r"[a-z]+")
+
+
+def _expand_color_word(match: "re.Match") -> str:
+    word = match.group(0)
+    return COLOR_ABBREVIATIONS.get(word, word)
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def canonical_color(color: str) -> str:
+    """
+    Canonical form of a single color name
 
-    normalized = []
-    for color in colors:
-        color_lower = color.lower().strip()
-        # Apply mappings
-        for key, value in color_mapping.items():
-            color_lower = color_lower.replace(key, value)
-        normalized.append(color_lower.title())
+    Abbreviations are expanded word by word in a single pass, so a full
+    word is never rewritten by an abbreviation it happens to contain
+    (e.g. "blue" stays "blue", "dk blu" becomes "dark blue").
+    The result is interned, so equal canonical colors are the same object.
+    """
+    expanded = _WORD.sub(_expand_color_word, color.lower().strip())
+    return sys.intern(expanded.title())
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def canonical_style(style: str) -> str:
+    """Canonical (interned) form of a single style name"""
+    style_lower = style.lower().strip()
+    return sys.intern(STYLE_ALIASES.get(style_lower, style_lower).title())
 
-    return normalized
+
+def normalize_color_names(colors: List[str]) -> List[str]:
+    """
+    Normalize color names to standard values
+
+    Args:
+        colors: List of color names
+
+    Returns:
+        List of normalized color names
+    """
+    return [canonical_color(color) for color in colors]
 
 
 def normalize_style_names(styles: List[str]) -> List[str]:
@@ -49,24 +134,7 @@ def normalize_style_names(styles: List[str]) -> List[str]:
     Returns:
         List of normalized style names
     """
-    style_mapping = {
-        "smart-casual": "smart casual",
-        "smart_casual": "smart casual",
-        "biz": "business",
-        "biz-casual": "business casual",
-        "athletic": "sporty",
-        "active": "sporty",
-        "professional": "business",
-    }
-
-    normalized = []
-    for style in styles:
-        style_lower = style.lower().strip()
-        # Apply mappings
-        normalized_style = style_mapping.get(style_lower, style_lower)
-        normalized.append(normalized_style.title())
-
-    return normalized
+    return [canonical_style(style) for style in styles]
 
 
 def preprocess_user_preferences(user_preferences: Dict[str, Any]) -> Dict[str, Any]:
@@ -117,23 +185,8 @@ def preprocess_weather_data(weather_data: Dict[str, Any]) -> Dict[str, Any]:
 
     # Normalize weather condition
     if "condition" in processed:
-        condition = processed["condition"].lower().strip()
         # Map various weather descriptions to standard categories
-        condition_mapping = {
-            "clear sky": "sunny",
-            "few clouds": "partly cloudy",
-            "scattered clouds": "cloudy",
-            "broken clouds": "cloudy",
-            "overcast clouds": "cloudy",
-            "light rain": "rainy",
-            "moderate rain": "rainy",
-            "heavy rain": "rainy",
-            "thunderstorm": "stormy",
-            "snow": "snowy",
-            "mist": "foggy",
-            "fog": "foggy",
-        }
-        processed["condition"] = condition_mapping.get(condition, condition)
+        processed["condition"] = _canonical_condition(processed["condition"])
 
     # Ensure humidity is in valid range (0-100)
     if "humidity" in processed:
@@ -154,6 +207,13 @@ def preprocess_weather_data(weather_data: Dict[str, Any]) -> Dict[str, Any]:
     return processed
 
 
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
+def _canonical_condition(condition: str) -> str:
+    condition = condition.lower().strip()
+    return sys.intern(WEATHER_CONDITION_ALIASES.get(condition, condition))
+
+
+@lru_cache(maxsize=NORMALIZATION_CACHE_SIZE)
 def preprocess_occasion(occasion: str) -> str:
     """
     Normalize occasion names
@@ -162,29 +222,10 @@ def preprocess_occasion(occasion: str) -> str:
         occasion: Raw occasion string
 
     Returns:
-        Normalized occasion name
+        Normalized (interned) occasion name
     """
-    occasion_mapping = {
-        "work": "business",
-        "office": "business",
-        "meeting": "business",
-        "interview": "formal",
-        "wedding": "formal",
-        "night out": "party",
-        "clubbing": "party",
-        "gym": "sports",
-        "workout": "sports",
-        "exercise": "sports",
-        "hiking": "outdoor",
-        "camping": "outdoor",
-        "beach": "casual",
-        "everyday": "casual",
-        "date night": "date",
-        "romantic": "date",
-    }
-
     occasion_lower = occasion.lower().strip()
-    return occasion_mapping.get(occasion_lower, occasion_lower)
+    return sys.intern(OCCASION_ALIASES.get(occasion_lower, occasion_lower))
 
 
 def extract_color_features(colors: List[str]) -> Dict[str, Any]:
@@ -198,17 +239,12 @@ def extract_color_features(colors: List[str]) -> Dict[str, Any]:
     Returns:
         Dict of color features
     """
-    # Basic color categorization
-    warm_colors = ["red", "orange", "yellow", "pink", "burgundy"]
-    cool_colors = ["blue", "green", "purple", "navy", "teal"]
-    neutral_colors = ["black", "white", "gray", "beige", "brown"]
-
     color_set = set(c.lower() for c in colors)
 
     return {
-        "has_warm": any(c in color_set for c in warm_colors),
-        "has_cool": any(c in color_set for c in cool_colors),
-        "has_neutral": any(c in color_set for c in neutral_colors),
+        "has_warm": not WARM_COLORS.isdisjoint(color_set),
+        "has_cool": not COOL_COLORS.isdisjoint(color_set),
+        "has_neutral": not NEUTRAL_COLORS.isdisjoint(color_set),
         "color_count": len(colors),
         "diversity": len(set(colors)),
     }
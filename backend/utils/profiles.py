@@ -0,0 +1,321 @@
+"""
+Server-side user profiles
+Normalized preferences and their encodings are kept in memory, keyed by
+user id, and written behind to a local SQLite database
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from .preprocessing import extract_color_features, preprocess_user_preferences
+
+logger = logging.getLogger(__name__)
+
+COLOR_FEATURES = ("has_warm", "has_cool", "has_neutral", "color_count", "diversity")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    styles TEXT NOT NULL,
+    colors TEXT NOT NULL,
+    avoid_colors TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class ProfileNotFoundError(LookupError):
+    """No profile is stored for a user id"""
+
+
+class UserProfile(NamedTuple):
+    """
+    Normalized preferences of one user with their precomputed encodings
+
+    Names are the interned canonical forms, so profiles sharing a style or
+    color share the string.
+    """
+
+    styles: Tuple[str, ...]
+    colors: Tuple[str, ...]
+    avoid_colors: Tuple[str, ...]
+    # Sorted (styles, colors, avoid_colors): the preference part of the response cache key
+    key: Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]
+    # One bit per name in the store's vocabulary (see ProfileStore.vocabulary)
+    style_mask: int
+    color_mask: int
+    avoid_mask: int
+    # extract_color_features() values, in COLOR_FEATURES order
+    color_features: Tuple[Any, ...]
+    updated_at: float
+
+    def preferences(self) -> Dict[str, Any]:
+        """User preferences as preprocess_user_preferences returns them"""
+        return {
+            "styles": list(self.styles),
+            "colors": list(self.colors),
+            "avoid_colors": list(self.avoid_colors) or None,
+        }
+
+    def features(self) -> Dict[str, Any]:
+        """extract_color_features() of the preferred colors"""
+        return dict(zip(COLOR_FEATURES, self.color_features))
+
+
+class ProfileStore:
+    """
+    User profiles in memory, persisted write-behind to SQLite
+
+    Writes change the in-memory profile at once and mark the user dirty; a
+    background task (run) writes dirty profiles in one transaction per
+    flush. A crash loses at most the writes of the last flush interval.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite database file, its directory created on first use;
+                None keeps profiles in memory only
+        """
+        self.path = path
+        self._profiles: Dict[str, UserProfile] = {}
+        # Users whose row must be written: upserted if present, deleted if not
+        self._dirty: Set[str] = set()
+        self._styles: Dict[str, int] = {}
+        self._colors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes and owns the connection
+        self._flush_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.loaded = False
+        self.writes = 0
+        self.deletes = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+        self.last_flush_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._profiles
+
+    @staticmethod
+    def _mask(vocabulary: Dict[str, int], names: Iterable[str]) -> int:
+        mask = 0
+        for name in names:
+            bit = vocabulary.get(name)
+            if bit is None:
+                bit = vocabulary[name] = len(vocabulary)
+            mask |= 1 << bit
+        return mask
+
+    def _encode(self, normalized: Dict[str, Any], updated_at: float) -> UserProfile:
+        """Profile from already normalized preferences; call with the lock held"""
+        styles = tuple(normalized.get("styles") or ())
+        colors = tuple(normalized.get("colors") or ())
+        avoid_colors = tuple(normalized.get("avoid_colors") or ())
+        features = extract_color_features(list(colors))
+        return UserProfile(
+            styles=styles,
+            colors=colors,
+            avoid_colors=avoid_colors,
+            key=(tuple(sorted(styles)), tuple(sorted(colors)), tuple(sorted(avoid_colors))),
+            style_mask=self._mask(self._styles, styles),
+            color_mask=self._mask(self._colors, colors),
+            avoid_mask=self._mask(self._colors, avoid_colors),
+            color_features=tuple(features[name] for name in COLOR_FEATURES),
+            updated_at=updated_at,
+        )
+
+    def vocabulary(self) -> Dict[str, Dict[str, int]]:
+        """Bit position of every style and color name seen, for decoding masks"""
+        with self._lock:
+            return {"styles": dict(self._styles), "colors": dict(self._colors)}
+
+    def get(self, user_id: str) -> UserProfile:
+        """
+        Stored profile of a user
+
+        Raises:
+            ProfileNotFoundError: No profile for user_id
+        """
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            raise ProfileNotFoundError(f"No profile for user {user_id!r}")
+        return profile
+
+    def put(self, user_id: str, user_preferences: Dict[str, Any]) -> UserProfile:
+        """
+        Normalize and store a user's preferences
+
+        Args:
+            user_id: User identifier
+            user_preferences: Raw preferences with styles, colors, avoid_colors
+
+        Returns:
+            The stored profile
+        """
+        normalized = preprocess_user_preferences(user_preferences)
+        with self._lock:
+            profile = self._encode(normalized, time.time())
+            self._profiles[user_id] = profile
+            self._dirty.add(user_id)
+            self.writes += 1
+        return profile
+
+    def delete(self, user_id: str) -> bool:
+        """
+        Remove a user's profile
+
+        Returns:
+            True if a profile was stored
+        """
+        with self._lock:
+            if self._profiles.pop(user_id, None) is None:
+                return False
+            self._dirty.add(user_id)
+            self.deletes += 1
+        return True
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(_SCHEMA)
+        return self._db
+
+    def load(self) -> int:
+        """
+        Read every stored profile into memory
+
+        Profiles written before the load finished are newer than their rows
+        and are kept.
+
+        Returns:
+            Number of profiles read
+        """
+        if self.path is None:
+            self.loaded = True
+            return 0
+        with self._flush_lock:
+            rows = self._connect().execute(
+                "SELECT user_id, styles, colors, avoid_colors, updated_at FROM profiles"
+            ).fetchall()
+        with self._lock:
+            for user_id, styles, colors, avoid_colors, updated_at in rows:
+                if user_id in self._profiles or user_id in self._dirty:
+                    continue
+                normalized = {
+                    "styles": json.loads(styles),
+                    "colors": json.loads(colors),
+                    "avoid_colors": json.loads(avoid_colors),
+                }
+                self._profiles[user_id] = self._encode(normalized, updated_at)
+            self.loaded = True
+        logger.info("Loaded %d user profiles from %s", len(rows), self.path)
+        return len(rows)
+
+    def flush(self) -> int:
+        """
+        Write dirty profiles to the database in one transaction
+
+        Blocking; the background task runs it in a worker thread. Failed
+        writes stay dirty and are retried by the next flush.
+
+        Returns:
+            Number of rows written or deleted
+        """
+        if self.path is None:
+            with self._lock:
+                self._dirty.clear()
+            return 0
+        with self._flush_lock:
+            started = time.perf_counter()
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                profiles = {user_id: self._profiles.get(user_id) for user_id in dirty}
+            if not profiles:
+                return 0
+            upserts = [
+                (
+                    user_id,
+                    json.dumps(profile.styles),
+                    json.dumps(profile.colors),
+                    json.dumps(profile.avoid_colors),
+                    profile.updated_at,
+                )
+                for user_id, profile in profiles.items()
+                if profile is not None
+            ]
+            deletes = [(user_id,) for user_id, profile in profiles.items() if profile is None]
+            try:
+                db = self._connect()
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO profiles (user_id, styles, colors, avoid_colors, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        upserts,
+                    )
+                    db.executemany("DELETE FROM profiles WHERE user_id = ?", deletes)
+            except Exception:
+                with self._lock:
+                    self._dirty |= dirty
+                self.flush_errors += 1
+                raise
+            self.flushes += 1
+            self.rows_flushed += len(profiles)
+            self.last_flush_seconds = time.perf_counter() - started
+            return len(profiles)
+
+    async def run(self, interval: float):
+        """
+        Flush dirty profiles every ``interval`` seconds until cancelled
+
+        A failed flush is logged and retried on the next tick.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            if not self._dirty:
+                continue
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                logger.exception("Flushing user profiles to %s failed", self.path)
+
+    def close(self):
+        """Flush outstanding writes and close the database"""
+        try:
+            self.flush()
+        finally:
+            with self._flush_lock:
+                if self._db is not None:
+                    self._db.close()
+                    self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Profile count, pending writes and flush counters"""
+        return {
+            "path": self.path,
+            "loaded": self.loaded,
+            "profiles": len(self._profiles),
+            "dirty": len(self._dirty),
+            "styles": len(self._styles),
+            "colors": len(self._colors),
+            "writes": self.writes,
+            "deletes": self.deletes,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+        }
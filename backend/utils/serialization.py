@@ -0,0 +1,185 @@
+"""
+Pre-serialized JSON fragments for outfit responses
+"""
+import json
+from collections import OrderedDict
+from typing import Annotated, Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+# Fields every response sets per request, in schema order
+SPLICED_FIELDS = ("style", "occasion", "confidence_score")
+
+
+# json.dumps builds a new encoder per call when given options; share one
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def dumps(value: Any) -> bytes:
+    """JSON bytes in exactly the format Starlette's JSONResponse renders"""
+    return _encoder.encode(value).encode("utf-8")
+
+
+def split_envelope(envelope: Dict[str, Any], field: str) -> Tuple[bytes, bytes]:
+    """
+    Serialize a response dict around its ``field`` list
+
+    Args:
+        envelope: Response dict; its ``field`` value is ignored
+        field: Top-level key holding the item list
+
+    Returns:
+        (prefix, suffix): prefix + b",".join(items) + suffix is what dumps()
+        gives for the dict with the serialized items in place
+    """
+    marker = dumps(field) + b":["
+    body = dumps({**envelope, field: []})
+    # Quotes inside JSON strings are escaped, so the first match is the key
+    start = body.index(marker) + len(marker)
+    return body[:start], body[start:]
+
+
+def splice(envelope: Dict[str, Any], field: str, items: List[bytes]) -> bytes:
+    """Serialize a response dict whose ``field`` list is given as pre-rendered items"""
+    prefix, suffix = split_envelope(envelope, field)
+    return prefix + b",".join(items) + suffix
+
+
+class OutfitFragment(NamedTuple):
+    """Serialized outfit split around the fields a response sets per request"""
+
+    head: bytes  # '{"id":...,"style":'
+    style: bytes  # the outfit's own style
+    tail: bytes  # ',"image_url":...}'
+
+    def render(self, occasion: bytes, score: bytes, style: Optional[bytes] = None) -> bytes:
+        """
+        Outfit JSON with per-request values spliced in
+
+        Args:
+            occasion: Serialized occasion
+            score: Serialized confidence score
+            style: Serialized style (default: the outfit's own)
+        """
+        return b"".join(
+            (
+                self.head,
+                self.style if style is None else style,
+                b',"occasion":',
+                occasion,
+                b',"confidence_score":',
+                score,
+                self.tail,
+            )
+        )
+
+
+class FragmentCache:
+    """
+    Validated, serialized outfits keyed by outfit id
+
+    Each outfit is validated against the response schema once, when its
+    fragment is built; responses assembled from fragments skip validation.
+    Entries are dropped least-recently-used past ``maxsize``.
+    """
+
+    def __init__(self, schema: Type[BaseModel], maxsize: int = 100000, version: int = 0):
+        """
+        Args:
+            schema: Outfit response model; its style, occasion and
+                confidence_score fields must be adjacent and in that order
+            maxsize: Most fragments kept
+            version: Catalog version the fragments describe
+        """
+        fields = list(schema.model_fields)
+        start = fields.index(SPLICED_FIELDS[0])
+        if tuple(fields[start : start + len(SPLICED_FIELDS)]) != SPLICED_FIELDS:
+            raise ValueError(f"{schema.__name__} must declare {', '.join(SPLICED_FIELDS)} in order")
+        self.schema = schema
+        self.maxsize = maxsize
+        self.version = version
+        self._before = fields[:start]
+        self._after = fields[start + len(SPLICED_FIELDS) :]
+        score_field = schema.model_fields["confidence_score"]
+        self._score = TypeAdapter(Annotated[score_field.annotation, score_field])
+        self._fragments: "OrderedDict[str, OutfitFragment]" = OrderedDict()
+        self.built = 0
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def _build(self, outfit: Dict[str, Any]) -> OutfitFragment:
+        # Per-request fields get placeholders; only the static ones are kept
+        data = self.schema.model_validate(
+            {**outfit, "occasion": "", "confidence_score": 0.0}
+        ).model_dump(mode="json")
+        head = dumps({name: data[name] for name in self._before})[:-1]
+        head += b',"style":' if self._before else b'"style":'
+        tail = dumps({name: data[name] for name in self._after})
+        tail = b"," + tail[1:] if self._after else b"}"
+        self.built += 1
+        return OutfitFragment(head, dumps(data["style"]), tail)
+
+    def score(self, value: Any) -> bytes:
+        """
+        Serialized confidence score, validated like the schema field
+
+        Raises:
+            pydantic.ValidationError: The score is out of range or not a number
+        """
+        if type(value) is not float or not 0.0 <= value <= 1.0:
+            value = self._score.validate_python(value)
+        # What the JSON encoder writes for a finite float
+        return float.__repr__(value).encode()
+
+    def get(self, outfit: Dict[str, Any]) -> OutfitFragment:
+        """
+        Fragment for a catalog outfit, built on first use
+
+        Raises:
+            pydantic.ValidationError: The outfit does not fit the schema
+        """
+        outfit_id = outfit["id"]
+        fragment = self._fragments.get(outfit_id)
+        if fragment is not None:
+            self._fragments.move_to_end(outfit_id)
+            self.hits += 1
+            return fragment
+        fragment = self._build(outfit)
+        self._fragments[outfit_id] = fragment
+        if len(self._fragments) > self.maxsize:
+            self._fragments.popitem(last=False)
+        return fragment
+
+    def preload(self, outfits: Iterable[Dict[str, Any]]) -> int:
+        """
+        Build fragments ahead of the first request, up to ``maxsize``
+
+        Outfits that fail validation are skipped; requests that return them
+        raise the error instead.
+
+        Returns:
+            Number of fragments built
+        """
+        built = self.built
+        for outfit in outfits:
+            if len(self._fragments) >= self.maxsize:
+                break
+            if outfit is None or outfit.get("id") in self._fragments:
+                continue
+            try:
+                self._fragments[outfit["id"]] = self._build(outfit)
+            except (ValueError, KeyError):
+                continue
+        return self.built - built
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and build/hit counters"""
+        return {
+            "size": len(self._fragments),
+            "maxsize": self.maxsize,
+            "version": self.version,
+            "built": self.built,
+            "hits": self.hits,
+        }
@@ -0,0 +1,89 @@
+"""
+Request coalescing for identical in-flight computations
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time
+
+    The first caller for a key (the leader) starts the computation; callers
+    arriving while it runs (followers) await the same result instead of
+    recomputing it. Nothing is kept once the computation finishes, so this
+    works with or without a result cache in front of it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.failures = 0
+        self.max_followers = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        self.max_followers = max(self.max_followers, self._waiters.pop(key, 0))
+        # Mark the error retrieved even if every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Result of fn(), shared with concurrent callers using the same key
+
+        Args:
+            key: Hashable identity of the computation
+            fn: Coroutine function started when no computation for key is running
+
+        Returns:
+            The computation's result; followers receive the leader's object
+
+        Raises:
+            Exception: Whatever the computation raised, for every caller
+        """
+        joined = self.join(key)
+        if joined is not None:
+            return await joined
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self._waiters[key] = 0
+        task.add_done_callback(lambda done: self._finished(key, done))
+        self.leaders += 1
+        # Shielded so one cancelled caller does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def join(self, key: Hashable) -> Optional[Awaitable[Any]]:
+        """
+        Follow the computation running for a key, if there is one
+
+        Args:
+            key: Hashable identity of the computation
+
+        Returns:
+            Awaitable for the running computation's result, or None when
+            nothing is running for key
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            return None
+        self._waiters[key] += 1
+        self.followers += 1
+        return asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader/follower counters and the share of callers that were coalesced"""
+        callers = self.leaders + self.followers
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "failures": self.failures,
+            "max_followers": self.max_followers,
+            "coalesced_ratio": round(self.followers / callers, 4) if callers else 0.0,
+        }
@@ -0,0 +1,237 @@
+"""
+Server-side weather lookup
+Fetches current weather for a location through one pooled HTTP client, with
+a cache keyed by rounded coordinates and time bucket, coalescing of
+concurrent lookups and stale fallback when the upstream fails
+
+httpx is imported when the first lookup creates the client, so processes
+that never look up weather do not pay for it.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+OPENWEATHERMAP_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+
+class WeatherUnavailableError(Exception):
+    """No fresh or stale weather could be produced for a location"""
+
+
+class WeatherUpstream:
+    """
+    Source of current weather observations
+
+    Subclasses return a dict in WeatherData shape (temperature in Celsius,
+    condition, humidity, wind_speed in km/h).
+    """
+
+    async def fetch(self, client: "httpx.AsyncClient", latitude: float, longitude: float) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class OpenWeatherMapUpstream(WeatherUpstream):
+    """
+    OpenWeatherMap current-weather API
+
+    ``base_url`` can point at a local stub server that speaks the same
+    response format.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str = OPENWEATHERMAP_URL):
+        """
+        Args:
+            api_key: OpenWeatherMap API key
+            base_url: Current-weather endpoint
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+
+    async def fetch(self, client: "httpx.AsyncClient", latitude: float, longitude: float) -> Dict[str, Any]:
+        if not self.api_key:
+            raise WeatherUnavailableError("No weather API key configured")
+        import httpx
+
+        # httpx errors carry the request URL, which includes the API key
+        try:
+            response = await client.get(
+                self.base_url,
+                params={"lat": latitude, "lon": longitude, "appid": self.api_key, "units": "metric"},
+            )
+        except httpx.HTTPError as e:
+            raise WeatherUnavailableError(f"Weather upstream request failed: {type(e).__name__}") from None
+        if response.status_code != 200:
+            raise WeatherUnavailableError(f"Weather upstream returned HTTP {response.status_code}")
+        data = response.json()
+
+        main = data.get("main") or {}
+        conditions = data.get("weather") or [{}]
+        wind_speed = (data.get("wind") or {}).get("speed")
+        return {
+            "temperature": float(main["temp"]),
+            "condition": conditions[0].get("description") or conditions[0].get("main") or "clear",
+            "humidity": main.get("humidity"),
+            # Metric units report wind in m/s; WeatherData uses km/h
+            "wind_speed": round(wind_speed * 3.6, 1) if wind_speed is not None else None,
+        }
+
+
+class WeatherProvider:
+    """
+    Cached, coalescing weather lookups
+
+    Coordinates are rounded to ``precision`` decimal places (2 places is
+    about 1 km) and time is cut into ``ttl``-second buckets; an entry is
+    fresh while its bucket is current. Concurrent lookups for the same
+    location and bucket share one upstream request. When the upstream
+    fails or times out, an entry up to ``stale_ttl`` seconds old is served
+    instead.
+    """
+
+    def __init__(
+        self,
+        upstream: WeatherUpstream,
+        ttl: float = 600.0,
+        stale_ttl: float = 3600.0,
+        precision: int = 2,
+        timeout: float = 3.0,
+        max_connections: int = 20,
+        maxsize: int = 10000,
+        timer: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            upstream: Weather source
+            ttl: Time bucket length in seconds
+            stale_ttl: Maximum age of an entry served after a failure
+            precision: Decimal places kept from latitude and longitude
+            timeout: Total deadline for one upstream fetch, in seconds
+            max_connections: Connection pool size of the shared client
+            maxsize: Locations kept in the cache
+            timer: Wall clock, injectable for tests
+        """
+        self.upstream = upstream
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.precision = precision
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.maxsize = maxsize
+        self._timer = timer
+        self._client: Optional["httpx.AsyncClient"] = None
+        # location -> (bucket, fetched_at, observation)
+        self._entries: "OrderedDict[Tuple[float, float], Tuple[int, float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[float, float, int], asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_errors = 0
+        self.stale_served = 0
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Shared pooled client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _location(self, latitude: float, longitude: float) -> Tuple[float, float]:
+        return round(latitude, self.precision), round(longitude, self.precision)
+
+    def _store(self, location: Tuple[float, float], bucket: int, observation: Dict[str, Any]):
+        self._entries[location] = (bucket, self._timer(), observation)
+        self._entries.move_to_end(location)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _fetch(self, location: Tuple[float, float], bucket: int) -> Dict[str, Any]:
+        try:
+            observation = await asyncio.wait_for(
+                self.upstream.fetch(self.client, *location), timeout=self.timeout
+            )
+        except Exception as e:
+            self.upstream_errors += 1
+            entry = self._entries.get(location)
+            if entry is not None and self._timer() - entry[1] <= self.stale_ttl:
+                self.stale_served += 1
+                logger.warning("Weather fetch for %s failed (%r); serving stale data", location, e)
+                return entry[2]
+            if isinstance(e, WeatherUnavailableError):
+                raise
+            raise WeatherUnavailableError(f"Weather lookup failed: {e!r}") from e
+        self._store(location, bucket, observation)
+        return observation
+
+    def _finished(self, key: Tuple[float, float, int], task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark the error retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def get(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """
+        Current weather for a location
+
+        Args:
+            latitude: Degrees north
+            longitude: Degrees east
+
+        Returns:
+            Weather dict in WeatherData shape (a copy; safe to mutate)
+
+        Raises:
+            WeatherUnavailableError: Upstream failed and nothing stale is cached
+        """
+        location = self._location(latitude, longitude)
+        bucket = int(self._timer() // self.ttl)
+
+        entry = self._entries.get(location)
+        if entry is not None and entry[0] == bucket:
+            self._entries.move_to_end(location)
+            self.hits += 1
+            return dict(entry[2])
+
+        self.misses += 1
+        key = (location[0], location[1], bucket)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(location, bucket))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not cancel the shared fetch
+        return dict(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and upstream counters"""
+        return {
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_errors": self.upstream_errors,
+            "stale_served": self.stale_served,
+        }